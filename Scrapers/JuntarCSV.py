@@ -1,9 +1,18 @@
+import argparse
 import pandas as pd
 import json
 import os
+import sqlite3
 import time
 
-# --- CONFIGURACIÓN Y FUNCIONES AUXILIARES (sin cambios) ---
+import columnar
+import consolidacion
+import entorno
+entorno.usar_modulos_unlp()
+import instrumentacion  # UNLP/instrumentacion.py
+import registros  # UNLP/registros.py
+
+# --- CONFIGURACIÓN Y FUNCIONES AUXILIARES ---
 ARCHIVOS_CSV = {
     'encuesta_materia': 'resultados_encuestas_multihilo.csv',
     'encuesta_docente': 'resultados_por_docente.csv',
@@ -11,6 +20,17 @@ ARCHIVOS_CSV = {
     'comentarios': 'comentarios_encuestas.csv'
 }
 ARCHIVO_JSON_SALIDA = 'datos_consolidados_eficiente.json'
+DIRECTORIO_FRAGMENTOS = 'datos_consolidados'
+# Con --sqlite se consolida desde la base de UNLP/almacen.py: sus vistas tienen las columnas de cada CSV.
+VISTAS_SQLITE = {
+    'encuesta_materia': 'v_encuesta_materia',
+    'encuesta_docente': 'v_encuesta_docente',
+    'censo_docentes': 'v_censo_docentes',
+    'comentarios': 'v_comentarios'
+}
+BASE_SQLITE = None
+# Con --parquet se consolida desde una exportación columnar (columnar.py, --exportar-parquet).
+DIRECTORIO_PARQUET = None
 COLUMNAS = { 'periodo': 'periodo', 'materia_codigo': 'materia_codigo', 'materia_nombre': 'materia_nombre', 'comision': 'comision', 'comentario': 'comentario', 'docente_nombre': 'docente_nombre', 'docente_rango': 'docente_rango', 'pregunta': 'pregunta', 'opcion_respuesta': 'opcion_respuesta', 'cantidad_votos': 'cantidad_votos', 'docente_id_encuesta': 'docente' }
 
 def _crear_json_encuesta(grupo):
@@ -37,16 +57,62 @@ def _crear_json_docentes(grupo):
         })
     return docentes_obj
 
-def consolidar_datos_eficiente():
-    inicio = time.time()
-    
-    dfs = {nombre: pd.read_csv(ruta, dtype=str).fillna('') for nombre, ruta in ARCHIVOS_CSV.items() if os.path.exists(ruta)}
-    if 'censo_docentes' not in dfs or dfs['censo_docentes'].empty:
+def cargar_csvs(archivos=ARCHIVOS_CSV):
+    """Un DataFrame por CSV, compacto: dimensiones categóricas y votos Int32 (UNLP/registros.py)."""
+    return {nombre: registros.leer_csv(ruta) for nombre, ruta in archivos.items() if os.path.exists(ruta)}
+
+def cargar_sqlite(ruta, periodo=None):
+    """Los mismos DataFrames que cargar_csvs(), leídos de las vistas de la base (opcionalmente de un solo periodo)."""
+    filtro, parametros = (" WHERE periodo = ?", (periodo,)) if periodo is not None else ("", ())
+    conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        return {nombre: registros.compactar(pd.read_sql_query(f"SELECT * FROM {vista}{filtro}", conexion, params=parametros, dtype=str))
+                for nombre, vista in VISTAS_SQLITE.items()}
+    finally:
+        conexion.close()
+
+def periodos_sqlite(ruta):
+    """Como consolidacion.periodos_streaming(), pero consultando la base periodo por periodo."""
+    conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        periodos = list(dict.fromkeys(periodo for (periodo,) in conexion.execute("SELECT periodo FROM v_censo_docentes")))
+        con_datos = {nombre for nombre, vista in VISTAS_SQLITE.items() if conexion.execute(f"SELECT 1 FROM {vista} LIMIT 1").fetchone()}
+    finally:
+        conexion.close()
+    for periodo in periodos:
+        with instrumentacion.medir('carga'):
+            dfs = cargar_sqlite(ruta, periodo)
+        yield periodo, consolidacion.agregar_datos(dfs, con_datos)[periodo]
+        print(f"  -> Periodo '{periodo}' consolidado.")
+
+def periodos_parquet(directorio):
+    """Como consolidacion.periodos_streaming(), leyendo de la exportación Parquet una partición por vez."""
+    indice = columnar.leer_indice(directorio)
+    con_datos = {nombre for nombre, dataset in indice['datasets'].items() if dataset['filas']}
+    for periodo in indice['datasets'].get('censo_docentes', {}).get('particiones', {}):
+        with instrumentacion.medir('carga'):
+            dfs = columnar.cargar_parquet(directorio, [periodo], indice=indice)
+        yield periodo, consolidacion.agregar_datos(dfs, con_datos)[periodo]
+        print(f"  -> Periodo '{periodo}' consolidado.")
+
+def cargar_datos():
+    with instrumentacion.medir('carga'):
+        if DIRECTORIO_PARQUET:
+            return columnar.cargar_parquet(DIRECTORIO_PARQUET)
+        return cargar_sqlite(BASE_SQLITE) if BASE_SQLITE else cargar_csvs()
+
+def _error_sin_censo():
+    if DIRECTORIO_PARQUET:
+        print(f"ERROR: La exportación '{DIRECTORIO_PARQUET}' no tiene censo de docentes. Abortando.")
+    elif BASE_SQLITE:
+        print(f"ERROR: La base '{BASE_SQLITE}' no tiene censo de docentes (vista 'v_censo_docentes'). Abortando.")
+    else:
         print("ERROR: Archivo 'censo_docentes_multihilo.csv' es requerido y no puede estar vacío. Abortando.")
-        return
 
-    print("Datos cargados. Iniciando agregación...")
-    
+def agregar_datos_referencia(dfs):
+    """Implementación original con groupby().apply() e iterrows(). Se conserva como referencia:
+    consolidacion.agregar_datos() produce el mismo JSON byte a byte (ver bench_juntar.py)."""
+    dfs = dict(dfs) # se renombran columnas más abajo: no tocar el diccionario del llamador
     # --- PROCESAMIENTO Y AGREGACIÓN (Lógica mejorada) ---
     
     # DataFrame base con todas las materias únicas
@@ -110,13 +176,159 @@ def consolidar_datos_eficiente():
             datos_consolidados[periodo] = {}
         
         datos_consolidados[periodo][materia_codigo] = row.to_dict()
+    return datos_consolidados
+
+def escribir_salida(periodos, salida, compacto=False, comprimir=False, particionado=None):
+    """Vuelca los (periodo, datos_periodo) en un único JSON o, con `particionado`, en fragmentos + índice."""
+    if particionado:
+        escritor = consolidacion.escribir_fragmentos(periodos, salida, particionado, compacto, comprimir)
+        print(f"Fragmentos en '{salida}': {escritor.escritos} escritos, {escritor.sin_cambios} sin cambios, {escritor.eliminados} eliminados.")
+    else:
+        consolidacion.escribir_json(periodos, salida, compacto, comprimir)
+
+def consolidar_datos_eficiente(salida=ARCHIVO_JSON_SALIDA, compacto=False, comprimir=False, particionado=None):
+    inicio = time.time()
+    
+    dfs = cargar_datos()
+    if 'censo_docentes' not in dfs or dfs['censo_docentes'].empty:
+        _error_sin_censo()
+        return
+
+    print("Datos cargados. Iniciando agregación vectorizada...")
+    datos_consolidados = consolidacion.agregar_datos(dfs)
 
-    print(f"Estructuración completada. Guardando en '{ARCHIVO_JSON_SALIDA}'...")
-    with open(ARCHIVO_JSON_SALIDA, 'w', encoding='utf-8') as f:
-        json.dump(datos_consolidados, f, ensure_ascii=False, indent=2)
+    print(f"Estructuración completada. Guardando en '{salida}'...")
+    escribir_salida(datos_consolidados.items(), salida, compacto, comprimir, particionado)
         
     fin = time.time()
     print(f"¡Proceso finalizado con éxito en {fin - inicio:.2f} segundos!")
 
+def consolidar_datos_streaming(salida=ARCHIVO_JSON_SALIDA, compacto=False, comprimir=False, particionado=None):
+    """Mismo resultado, pero procesando un periodo por vez: la memoria no crece con el histórico."""
+    inicio = time.time()
+    if DIRECTORIO_PARQUET:
+        if not columnar.leer_indice(DIRECTORIO_PARQUET)['datasets'].get('censo_docentes', {}).get('filas'):
+            _error_sin_censo()
+            return
+        periodos = periodos_parquet(DIRECTORIO_PARQUET)
+    elif BASE_SQLITE:
+        periodos = periodos_sqlite(BASE_SQLITE)
+    else:
+        ruta_censo = ARCHIVOS_CSV['censo_docentes']
+        if not os.path.exists(ruta_censo) or pd.read_csv(ruta_censo, dtype=str, nrows=1).empty:
+            _error_sin_censo()
+            return
+        periodos = consolidacion.periodos_streaming(ARCHIVOS_CSV)
+
+    print(f"Consolidando por periodo hacia '{salida}'...")
+    escribir_salida(periodos, salida, compacto, comprimir, particionado)
+
+    fin = time.time()
+    print(f"¡Proceso finalizado con éxito en {fin - inicio:.2f} segundos!")
+
+# --- Consolidación incremental ---
+# Junto a la salida se guarda '<salida>.estado.json' con las opciones usadas, el tamaño y la fecha de
+# modificación de cada CSV y la huella de cada (periodo, materia). Si los CSV no cambiaron no se hace
+# nada; si cambiaron, sólo se re-agregan las materias cuya huella cambió y el resto se toma de la
+# salida anterior. El resultado es el mismo que el de una consolidación completa.
+
+def _ruta_estado(salida):
+    return salida.rstrip('/\\') + '.estado.json'
+
+def _firmas_csv():
+    if DIRECTORIO_PARQUET:
+        archivos = {'parquet': os.path.join(DIRECTORIO_PARQUET, columnar.ARCHIVO_INDICE)}
+    elif BASE_SQLITE:
+        archivos = {'sqlite': BASE_SQLITE, 'sqlite-wal': BASE_SQLITE + '-wal'}
+    else:
+        archivos = ARCHIVOS_CSV
+    return {nombre: [os.stat(ruta).st_size, os.stat(ruta).st_mtime_ns] for nombre, ruta in archivos.items() if os.path.exists(ruta)}
+
+def consolidar_datos_incremental(salida=ARCHIVO_JSON_SALIDA, compacto=False, comprimir=False, particionado=None):
+    inicio = time.time()
+    opciones = {'compacto': compacto, 'gzip': comprimir, 'particionado': particionado}
+    estado = {}
+    if os.path.exists(_ruta_estado(salida)) and os.path.exists(salida):
+        with open(_ruta_estado(salida), encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get('opciones') != opciones:
+            print("Las opciones de salida cambiaron desde la última consolidación: se rehace completa.")
+            estado = {}
+    firmas = _firmas_csv()
+    if estado and estado.get('archivos') == firmas:
+        print(f"Los CSV no cambiaron desde la última consolidación: '{salida}' ya está al día.")
+        return
+
+    dfs = cargar_datos()
+    if 'censo_docentes' not in dfs or dfs['censo_docentes'].empty:
+        _error_sin_censo()
+        return
+
+    with instrumentacion.medir('huellas'):
+        huellas = consolidacion.huellas_por_materia(dfs)
+    datos_anteriores = consolidacion.leer_salida(salida, particionado) if estado else {}
+    periodos, cambiadas = consolidacion.periodos_incrementales(dfs, huellas, estado.get('huellas', {}), datos_anteriores)
+    total = sum(len(materias) for materias in huellas.values())
+    print(f"Datos cargados. Materias a re-agregar: {cambiadas} (huellas calculadas para {total}).")
+    escribir_salida(periodos, salida, compacto, comprimir, particionado)
+
+    # El estado se escribe después de la salida: si el proceso se corta antes, la próxima corrida rehace lo necesario.
+    temporal = _ruta_estado(salida) + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'opciones': opciones, 'archivos': firmas, 'huellas': huellas}, f, ensure_ascii=False)
+    os.replace(temporal, _ruta_estado(salida))
+
+    fin = time.time()
+    print(f"¡Proceso finalizado con éxito en {fin - inicio:.2f} segundos!")
+
 if __name__ == "__main__":
-    consolidar_datos_eficiente()
+    parser = argparse.ArgumentParser(description="Consolida los CSV del scraping en un único JSON (o en fragmentos con índice).")
+    parser.add_argument('--salida', default=None, help=f"Archivo JSON de salida (por defecto '{ARCHIVO_JSON_SALIDA}', con '.gz' si se comprime); con --particionado, el directorio (por defecto '{DIRECTORIO_FRAGMENTOS}').")
+    parser.add_argument('--particionado', choices=['periodo', 'materia'], default=None, help="Escribe un archivo por periodo o por (periodo, materia), más un 'indice.json' con tamaños y hashes.")
+    parser.add_argument('--streaming', action='store_true', help="Procesa un periodo por vez (memoria acotada por el periodo más grande).")
+    parser.add_argument('--incremental', action='store_true', help="Re-agrega sólo las materias que cambiaron desde la última consolidación (ver '<salida>.estado.json').")
+    parser.add_argument('--sqlite', default=None, metavar='BASE', help="Consolidar desde una base SQLite de los scrapers (UNLP/almacen.py) en lugar de los CSV.")
+    parser.add_argument('--parquet', default=None, metavar='DIR', help="Consolidar desde una exportación Parquet (ver --exportar-parquet) en lugar de los CSV. Requiere pyarrow.")
+    parser.add_argument('--exportar-parquet', default=None, metavar='DIR', help="En lugar de consolidar, exporta los datos (de los CSV o de --sqlite) a Parquet particionado por periodo. Requiere pyarrow.")
+    parser.add_argument('--compacto', action='store_true', help="JSON sin indentación ni espacios (bastante más chico).")
+    parser.add_argument('--gzip', action='store_true', help="Comprime la salida con gzip.")
+    parser.add_argument('--metricas', default=None, metavar='BASE', help="Exportar los tiempos de cada fase a BASE.json y BASE.prom (Prometheus).")
+    parser.add_argument('--perfil', action='store_true', help="Con --metricas, perfilador por muestreo en BASE.folded (flamegraph).")
+    args = parser.parse_args()
+
+    if args.perfil and not args.metricas:
+        parser.error("--perfil requiere --metricas BASE.")
+    if args.metricas:
+        instrumentacion.activar(args.metricas, args.perfil)
+
+    if args.sqlite:
+        if not os.path.exists(args.sqlite):
+            parser.error(f"No existe la base '{args.sqlite}'.")
+        BASE_SQLITE = args.sqlite
+    if args.parquet:
+        if args.sqlite:
+            parser.error("--parquet y --sqlite no se pueden combinar.")
+        if not os.path.exists(os.path.join(args.parquet, columnar.ARCHIVO_INDICE)):
+            parser.error(f"'{args.parquet}' no es una exportación Parquet (falta '{columnar.ARCHIVO_INDICE}').")
+        DIRECTORIO_PARQUET = args.parquet
+    if (args.parquet or args.exportar_parquet) and columnar.pq is None:
+        parser.error("Las opciones de Parquet requieren 'pyarrow' (pip install pyarrow).")
+    if args.exportar_parquet:
+        inicio = time.time()
+        indice = columnar.exportar_parquet(cargar_datos(), args.exportar_parquet)
+        filas = sum(dataset['filas'] for dataset in indice['datasets'].values())
+        print(f"Exportadas {filas} filas de {len(indice['datasets'])} datasets ({len(indice['periodos'])} periodos) a '{args.exportar_parquet}' en {time.time() - inicio:.2f} segundos.")
+        exit()
+    if args.particionado:
+        salida = args.salida or DIRECTORIO_FRAGMENTOS
+    else:
+        salida = args.salida or (ARCHIVO_JSON_SALIDA + '.gz' if args.gzip else ARCHIVO_JSON_SALIDA)
+    if args.incremental and args.streaming:
+        parser.error("--incremental y --streaming no se pueden combinar.")
+    if args.incremental:
+        consolidar = consolidar_datos_incremental
+    else:
+        consolidar = consolidar_datos_streaming if args.streaming else consolidar_datos_eficiente
+    consolidar(salida, args.compacto, args.gzip, args.particionado)
+    if instrumentacion.METRICAS.etapas:
+        print(f"Tiempos por fase:\n{instrumentacion.METRICAS.texto_etapas()}")
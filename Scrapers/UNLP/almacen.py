@@ -0,0 +1,326 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from escritor import EscritorEnHilo
+
+# --- Almacén SQLite ---
+# Alternativa a los CSV como destino de los scrapers: una base SQLite normalizada, en modo WAL,
+#   periodos(texto)  materias(periodo, codigo, nombre)  docentes(nombre)  preguntas(texto)  nombres_materia(texto)
+#   votos(materia, nombre, docente, pregunta, opcion, cantidad, cantidad_texto)  -- docente_id = 0: encuesta de la materia
+#   censo(materia, nombre, docente, rango)  comentarios(materia, nombre, comision, comentario)
+#   unidades(dataset, clave)                              -- diario de progreso (como diario.py)
+# con índices únicos sobre las claves naturales (las mismas de diario.CLAVES_NATURALES) e
+# índices por docente y por código de materia para consultar a través de los periodos.
+#
+# materias.nombre es el nombre del censo (el que usa la consolidación), pero cada fila guarda además
+# el nombre con que vino en su dataset (nombre_id): los comentarios lo traen limpio, sin el "(codigo)".
+# votos.cantidad es el entero para consultar ('3.0' -> 3, 'N/A' -> NULL) y cantidad_texto el texto
+# original cuando no es un entero canónico, como lo deja registros.votos_a_entero() en el CSV.
+#
+# Cada dataset tiene su EscritorSQLite (mismo hilo con cola que EscritorCSV) que inserta cada lote
+# en una transacción. La primera vez que una unidad aparece en la corrida (con filas, o al confirmarse sin
+# ninguna) se borran sus filas anteriores, así que volver a bajar una unidad la reemplaza en lugar de duplicarla. Las vistas
+# v_encuesta_materia, v_encuesta_docente, v_censo_docentes y v_comentarios devuelven exactamente
+# las filas de los CSV, ya deduplicados (JuntarCSV.py --sqlite consolida desde ellas).
+
+ARCHIVO_BASE = 'encuestas.sqlite'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS periodos (id INTEGER PRIMARY KEY, texto TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS materias (id INTEGER PRIMARY KEY, periodo_id INTEGER NOT NULL, codigo TEXT NOT NULL, nombre TEXT NOT NULL,
+                                     UNIQUE (periodo_id, codigo));
+CREATE TABLE IF NOT EXISTS docentes (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS preguntas (id INTEGER PRIMARY KEY, texto TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS nombres_materia (id INTEGER PRIMARY KEY, texto TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS votos (id INTEGER PRIMARY KEY, materia_id INTEGER NOT NULL, docente_id INTEGER NOT NULL DEFAULT 0,
+                                  pregunta_id INTEGER NOT NULL, opcion TEXT NOT NULL, cantidad INTEGER, nombre_id INTEGER, cantidad_texto TEXT,
+                                  UNIQUE (materia_id, docente_id, pregunta_id, opcion));
+CREATE TABLE IF NOT EXISTS censo (id INTEGER PRIMARY KEY, materia_id INTEGER NOT NULL, docente_id INTEGER NOT NULL, rango TEXT NOT NULL, nombre_id INTEGER,
+                                  UNIQUE (materia_id, docente_id, rango));
+CREATE TABLE IF NOT EXISTS comentarios (id INTEGER PRIMARY KEY, materia_id INTEGER NOT NULL, comision TEXT NOT NULL, comentario TEXT NOT NULL, nombre_id INTEGER);
+CREATE TABLE IF NOT EXISTS unidades (dataset TEXT NOT NULL, clave TEXT NOT NULL, fecha TEXT NOT NULL, PRIMARY KEY (dataset, clave));
+
+CREATE INDEX IF NOT EXISTS idx_materias_codigo ON materias (codigo);
+CREATE INDEX IF NOT EXISTS idx_votos_docente ON votos (docente_id, materia_id);
+CREATE INDEX IF NOT EXISTS idx_censo_docente ON censo (docente_id);
+CREATE INDEX IF NOT EXISTS idx_comentarios_materia ON comentarios (materia_id);
+
+CREATE VIEW IF NOT EXISTS v_encuesta_materia AS
+    SELECT p.texto AS periodo, m.codigo AS materia_codigo, COALESCE(n.texto, m.nombre) AS materia_nombre, q.texto AS pregunta, v.opcion AS opcion_respuesta,
+           COALESCE(v.cantidad_texto, v.cantidad) AS cantidad_votos
+    FROM votos v JOIN materias m ON m.id = v.materia_id JOIN periodos p ON p.id = m.periodo_id JOIN preguntas q ON q.id = v.pregunta_id
+    LEFT JOIN nombres_materia n ON n.id = v.nombre_id
+    WHERE v.docente_id = 0 ORDER BY v.id;
+CREATE VIEW IF NOT EXISTS v_encuesta_docente AS
+    SELECT p.texto AS periodo, m.codigo AS materia_codigo, COALESCE(n.texto, m.nombre) AS materia_nombre, d.nombre AS docente, q.texto AS pregunta, v.opcion AS opcion_respuesta,
+           COALESCE(v.cantidad_texto, v.cantidad) AS cantidad_votos
+    FROM votos v JOIN materias m ON m.id = v.materia_id JOIN periodos p ON p.id = m.periodo_id JOIN preguntas q ON q.id = v.pregunta_id JOIN docentes d ON d.id = v.docente_id
+    LEFT JOIN nombres_materia n ON n.id = v.nombre_id
+    WHERE v.docente_id <> 0 ORDER BY v.id;
+CREATE VIEW IF NOT EXISTS v_censo_docentes AS
+    SELECT p.texto AS periodo, m.codigo AS materia_codigo, COALESCE(n.texto, m.nombre) AS materia_nombre, d.nombre AS docente_nombre, c.rango AS docente_rango
+    FROM censo c JOIN materias m ON m.id = c.materia_id JOIN periodos p ON p.id = m.periodo_id JOIN docentes d ON d.id = c.docente_id
+    LEFT JOIN nombres_materia n ON n.id = c.nombre_id
+    ORDER BY c.id;
+CREATE VIEW IF NOT EXISTS v_comentarios AS
+    SELECT p.texto AS periodo, m.codigo AS materia_codigo, COALESCE(n.texto, m.nombre) AS materia_nombre, c.comision, c.comentario
+    FROM comentarios c JOIN materias m ON m.id = c.materia_id JOIN periodos p ON p.id = m.periodo_id
+    LEFT JOIN nombres_materia n ON n.id = c.nombre_id
+    ORDER BY c.id;
+"""
+
+# Vista equivalente a cada dataset de los scrapers (y a cada CSV de JuntarCSV.ARCHIVOS_CSV).
+VISTAS = {'materia': 'v_encuesta_materia', 'docente': 'v_encuesta_docente', 'censo': 'v_censo_docentes', 'comentarios': 'v_comentarios'}
+
+def conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=60, isolation_level=None) # transacciones explícitas
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+# Columnas agregadas después de la primera versión del esquema: las bases viejas las reciben con ALTER TABLE
+# (quedan en NULL en las filas existentes, y las vistas caen en materias.nombre y votos.cantidad).
+COLUMNAS_AGREGADAS = {'votos': ['nombre_id INTEGER', 'cantidad_texto TEXT'], 'censo': ['nombre_id INTEGER'], 'comentarios': ['nombre_id INTEGER']}
+
+def _migrar(conexion):
+    for tabla, columnas in COLUMNAS_AGREGADAS.items():
+        existentes = {fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla})")}
+        if not existentes: continue # base nueva: la crea ESQUEMA
+        for columna in columnas:
+            if columna.split()[0] not in existentes:
+                conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna}")
+                for vista in VISTAS.values(): # CREATE VIEW IF NOT EXISTS no reemplaza las vistas viejas
+                    conexion.execute(f"DROP VIEW IF EXISTS {vista}")
+
+def crear_esquema(ruta):
+    conexion = conectar(ruta)
+    _migrar(conexion)
+    conexion.executescript(ESQUEMA)
+    conexion.close()
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        try:
+            return int(float(valor))
+        except (TypeError, ValueError):
+            return None
+
+def _votos(valor):
+    """(cantidad, cantidad_texto): el texto sólo se guarda si el entero no lo reproduce ('3.0', 'N/A', '')."""
+    cantidad = _entero(valor)
+    return cantidad, None if cantidad is not None and str(cantidad) == valor else valor
+
+class DiarioSQLite:
+    """Misma interfaz que diario.DiarioProgreso, guardado en la tabla 'unidades'. Las marcas las
+    escribe el EscritorSQLite del dataset, en su propio hilo, apenas confirmadas las filas."""
+    def __init__(self, ruta, dataset):
+        self.ruta = ruta
+        self.dataset = dataset
+        self._lock = threading.Lock()
+        self._nuevas = []
+        conexion = conectar(ruta)
+        self.completadas = {tuple(json.loads(clave)) for (clave,) in conexion.execute("SELECT clave FROM unidades WHERE dataset = ?", (dataset,))}
+        conexion.close()
+
+    def completado(self, clave):
+        return tuple(clave) in self.completadas
+
+    def marcar(self, clave):
+        with self._lock:
+            self.completadas.add(tuple(clave))
+            self._nuevas.append(json.dumps(list(clave), ensure_ascii=False))
+
+    def desmarcar(self, prefijo):
+        """Quita las unidades cuya clave empieza con `prefijo` (como DiarioProgreso.desmarcar)."""
+        prefijo = tuple(prefijo)
+        with self._lock:
+            quitadas = {clave for clave in self.completadas if clave[:len(prefijo)] == prefijo}
+            self.completadas -= quitadas
+            self._nuevas = [clave for clave in self._nuevas if tuple(json.loads(clave))[:len(prefijo)] != prefijo]
+        if not quitadas: return
+        conexion = conectar(self.ruta)
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.executemany("DELETE FROM unidades WHERE dataset = ? AND clave = ?", [(self.dataset, json.dumps(list(clave), ensure_ascii=False)) for clave in quitadas])
+            conexion.execute("COMMIT")
+        finally:
+            conexion.close()
+
+    def volcar(self, conexion, vaciar=None):
+        """Guarda las marcas nuevas. `vaciar(clave)` se llama antes con cada una, en la misma transacción
+        (el escritor borra ahí lo que tenía de corridas anteriores una unidad que ahora vino sin filas)."""
+        with self._lock:
+            nuevas, self._nuevas = self._nuevas, []
+        if not nuevas: return
+        fecha = time.strftime('%Y-%m-%d %H:%M:%S')
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if vaciar is not None:
+                for clave in nuevas:
+                    vaciar(tuple(json.loads(clave)))
+            conexion.executemany("INSERT OR REPLACE INTO unidades VALUES (?, ?, ?)", [(self.dataset, clave, fecha) for clave in nuevas])
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def cerrar(self):
+        pass # las marcas pendientes las vuelca el escritor al cerrarse
+
+class EscritorSQLite(EscritorEnHilo):
+    """Misma interfaz que escritor.EscritorCSV; cada lote se normaliza e inserta en una transacción."""
+    def __init__(self, ruta, dataset, fieldnames, columnas_unidad, diario=None, **opciones):
+        self.ruta = ruta
+        self.dataset = dataset
+        self.diario = diario
+        self._indices = {columna: i for i, columna in enumerate(fieldnames)}
+        self._columnas_unidad = [self._indices[c] for c in columnas_unidad]
+        self._ids = {}
+        self._materias = {}
+        self._reemplazadas = set()
+        self._nombres = set()
+        super().__init__(f"{ruta}:{dataset}", fieldnames, **opciones)
+
+    def _bucle(self):
+        self._conexion = conectar(self.ruta)
+        try:
+            super()._bucle()
+        finally:
+            self._conexion.close()
+
+    def _id(self, tabla, columna, valor):
+        cache = self._ids.setdefault(tabla, {})
+        if valor not in cache:
+            self._conexion.execute(f"INSERT OR IGNORE INTO {tabla} ({columna}) VALUES (?)", (valor,))
+            cache[valor] = self._conexion.execute(f"SELECT id FROM {tabla} WHERE {columna} = ?", (valor,)).fetchone()[0]
+        return cache[valor]
+
+    def _id_materia(self, periodo, codigo, nombre):
+        clave = (periodo, codigo)
+        if clave not in self._materias:
+            periodo_id = self._id('periodos', 'texto', periodo)
+            self._conexion.execute("INSERT OR IGNORE INTO materias (periodo_id, codigo, nombre) VALUES (?, ?, ?)", (periodo_id, codigo, nombre))
+            self._materias[clave] = self._conexion.execute("SELECT id FROM materias WHERE periodo_id = ? AND codigo = ?", (periodo_id, codigo)).fetchone()[0]
+        return self._materias[clave]
+
+    def _reemplazar_unidad(self, unidad, materia_id):
+        """Borra lo que la unidad tenía de corridas anteriores (una sola vez por corrida)."""
+        if unidad in self._reemplazadas: return
+        self._reemplazadas.add(unidad)
+        if self.dataset == 'materia':
+            self._conexion.execute("DELETE FROM votos WHERE materia_id = ? AND docente_id = 0", (materia_id,))
+        elif self.dataset == 'docente':
+            self._conexion.execute("DELETE FROM votos WHERE materia_id = ? AND docente_id = ?", (materia_id, self._id('docentes', 'nombre', unidad[2])))
+        elif self.dataset == 'censo':
+            self._conexion.execute("DELETE FROM censo WHERE materia_id = ?", (materia_id,))
+        else:
+            self._conexion.execute("DELETE FROM comentarios WHERE materia_id = ?", (materia_id,))
+
+    def _vaciar_unidad(self, unidad):
+        """Llamado con cada unidad confirmada: si no trajo filas en esta corrida, igual se borran las anteriores."""
+        if unidad in self._reemplazadas or (self.dataset == 'docente' and unidad[-1] == '*'): return
+        fila = self._conexion.execute("SELECT m.id FROM materias m JOIN periodos p ON p.id = m.periodo_id WHERE p.texto = ? AND m.codigo = ?", unidad[:2]).fetchone()
+        if fila is None:
+            self._reemplazadas.add(unidad)
+        else:
+            self._reemplazar_unidad(unidad, fila[0])
+
+    def _escribir_lote(self, lote):
+        i = self._indices
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            votos, comentarios = [], []
+            for fila in lote:
+                materia_id = self._id_materia(fila[i['periodo']], fila[i['materia_codigo']], fila[i['materia_nombre']])
+                nombre_id = self._id('nombres_materia', 'texto', fila[i['materia_nombre']])
+                self._reemplazar_unidad(tuple(fila[j] for j in self._columnas_unidad), materia_id)
+                if self.dataset in ('materia', 'docente'):
+                    docente_id = self._id('docentes', 'nombre', fila[i['docente']]) if self.dataset == 'docente' else 0
+                    votos.append((materia_id, nombre_id, docente_id, self._id('preguntas', 'texto', fila[i['pregunta']]), fila[i['opcion_respuesta']])
+                                 + _votos(fila[i['cantidad_votos']]))
+                elif self.dataset == 'censo':
+                    self._conexion.execute("INSERT INTO censo (materia_id, nombre_id, docente_id, rango) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                                           (materia_id, nombre_id, self._id('docentes', 'nombre', fila[i['docente_nombre']]), fila[i['docente_rango']]))
+                    # El nombre de la materia lo manda el censo: como en consolidacion.agregar_datos(), gana el último
+                    # nombre distinto que aparece, se haya insertado o no la fila (puede repetir docente y rango).
+                    if (materia_id, fila[i['materia_nombre']]) not in self._nombres:
+                        self._nombres.add((materia_id, fila[i['materia_nombre']]))
+                        self._conexion.execute("UPDATE materias SET nombre = ? WHERE id = ? AND nombre <> ?", (fila[i['materia_nombre']], materia_id, fila[i['materia_nombre']]))
+                else:
+                    comentarios.append((materia_id, nombre_id, fila[i['comision']], fila[i['comentario']]))
+            # Misma regla que diario.deduplicar_csv(): ante una clave natural repetida, queda la primera.
+            self._conexion.executemany("INSERT INTO votos (materia_id, nombre_id, docente_id, pregunta_id, opcion, cantidad, cantidad_texto) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING", votos)
+            self._conexion.executemany("INSERT INTO comentarios (materia_id, nombre_id, comision, comentario) VALUES (?, ?, ?, ?)", comentarios)
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _despues_de_confirmar(self):
+        if self.diario is not None:
+            self.diario.volcar(self._conexion, self._vaciar_unidad)
+
+def abrir_salida_sqlite(ruta, dataset, fieldnames, columnas_unidad):
+    """Equivalente a diario.abrir_csv_reanudable() + EscritorCSV: devuelve (escritor, diario)."""
+    crear_esquema(ruta)
+    diario = DiarioSQLite(ruta, dataset)
+    return EscritorSQLite(ruta, dataset, fieldnames, columnas_unidad, diario), diario
+
+# --- Consultas ---
+def resultados_docente(ruta, nombre):
+    """Todas las respuestas de un docente en todos los periodos (usa idx_votos_docente)."""
+    conexion = conectar(ruta)
+    try:
+        return conexion.execute("SELECT * FROM v_encuesta_docente WHERE docente = ?", (nombre,)).fetchall()
+    finally:
+        conexion.close()
+
+def importar_csv(ruta, dataset, ruta_csv, fieldnames, columnas_unidad):
+    """Carga un CSV existente en la base (sus unidades reemplazan a las que ya estuvieran)."""
+    escritor = EscritorSQLite(ruta, dataset, fieldnames, columnas_unidad)
+    with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+        lector = csv.reader(f)
+        encabezado = next(lector, None)
+        if encabezado is not None:
+            indices = [encabezado.index(c) for c in fieldnames]
+            lote = []
+            for fila in lector:
+                lote.append(tuple(fila[j] for j in indices))
+                if len(lote) >= escritor.filas_por_lote:
+                    escritor.escribir(lote)
+                    lote = []
+            escritor.escribir(lote)
+    escritor.cerrar()
+    return escritor.filas_escritas
+
+if __name__ == "__main__":
+    import parser_rapido
+    SALIDAS = dict(parser_rapido.SALIDAS_MATERIA, docente=parser_rapido.SALIDA_DOCENTE)
+    COLUMNAS_UNIDAD = {'docente': ['periodo', 'materia_codigo', 'docente']}
+
+    parser = argparse.ArgumentParser(description="Almacén SQLite de las encuestas: importar los CSV o consultar.")
+    parser.add_argument('--base', default=ARCHIVO_BASE, help=f"Base SQLite (por defecto '{ARCHIVO_BASE}').")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    importar = subcomandos.add_parser('importar', help="Importa los CSV del directorio actual (o de --directorio).")
+    importar.add_argument('--directorio', default='.')
+    docente = subcomandos.add_parser('docente', help="Muestra los resultados de un docente en todos los periodos.")
+    docente.add_argument('nombre')
+    args = parser.parse_args()
+
+    crear_esquema(args.base)
+    if args.comando == 'importar':
+        for dataset, (nombre_archivo, fieldnames, _) in SALIDAS.items():
+            ruta_csv = os.path.join(args.directorio, nombre_archivo)
+            if not os.path.exists(ruta_csv): continue
+            filas = importar_csv(args.base, dataset, ruta_csv, fieldnames, COLUMNAS_UNIDAD.get(dataset, ['periodo', 'materia_codigo']))
+            print(f"-> {nombre_archivo}: {filas} filas importadas en '{args.base}'.")
+    else:
+        for fila in resultados_docente(args.base, args.nombre):
+            print(' | '.join('' if valor is None else str(valor) for valor in fila))
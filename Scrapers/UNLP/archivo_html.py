@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- Archivo de páginas HTML ---
+# Guarda cada página descargada comprimida y direccionada por contenido:
+#   <directorio>/indice.sqlite        índice (URL, payload) -> blob, con estado, encoding y fecha
+#   <directorio>/blobs/ab/abcd....z   contenido comprimido (zstd si está instalado, si no zlib)
+# La clave de cada página es el SHA-256 de (URL, payload), y el nombre del blob el SHA-256
+# del HTML, así que dos páginas idénticas ocupan un solo blob.
+
+MODOS = ('grabar', 'reproducir', 'offline')
+
+def clave_pagina(url, payload):
+    datos = json.dumps([url, sorted(payload.items()) if payload else None], ensure_ascii=False)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+def _comprimir(contenido):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(contenido)
+    return 'zlib', zlib.compress(contenido, 9)
+
+def _descomprimir(codec, datos):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("El archivo contiene blobs zstd y 'zstandard' no está instalado.")
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return zlib.decompress(datos)
+
+def ruta_blob(directorio, blob):
+    return os.path.join(directorio, 'blobs', blob[:2], blob + '.z')
+
+def leer_blob(directorio, blob):
+    """Lee y descomprime un blob sin abrir el índice (lo usan también los procesos de reproceso)."""
+    with open(ruta_blob(directorio, blob), 'rb') as f:
+        codec, datos = f.read().split(b'\n', 1)
+    return _descomprimir(codec.decode('ascii'), datos)
+
+class RespuestaArchivada:
+    """Imitación mínima de requests.Response para las páginas servidas desde el archivo."""
+    def __init__(self, url, status_code, encoding, content):
+        self.url = url
+        self.status_code = status_code
+        self.encoding = encoding
+        self.content = content
+        self.desde_archivo = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} (archivado) para {self.url}", response=self)
+
+class ArchivoHTML:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(os.path.join(directorio, 'blobs'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(os.path.join(directorio, 'indice.sqlite'), check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""CREATE TABLE IF NOT EXISTS paginas (
+            clave TEXT PRIMARY KEY, url TEXT NOT NULL, payload TEXT, anio_sem TEXT, cod TEXT, docente TEXT,
+            estado INTEGER NOT NULL, encoding TEXT, blob TEXT NOT NULL, codec TEXT NOT NULL,
+            tamanio INTEGER NOT NULL, tamanio_comprimido INTEGER NOT NULL, fecha REAL NOT NULL)""")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_paginas_periodo ON paginas (anio_sem, cod, docente)")
+        self._conexion.commit()
+
+    def guardar(self, url, payload, estado, encoding, contenido):
+        blob = hashlib.sha256(contenido).hexdigest()
+        ruta = ruta_blob(self.directorio, blob)
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                codec = f.readline().strip().decode('ascii')
+            tamanio_comprimido = os.path.getsize(ruta)
+        else:
+            codec, comprimido = _comprimir(contenido)
+            tamanio_comprimido = len(comprimido)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(codec.encode('ascii') + b'\n' + comprimido)
+            os.replace(temporal, ruta)
+        payload = payload or {}
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave_pagina(url, payload), url, json.dumps(payload, ensure_ascii=False, sort_keys=True),
+                 payload.get('anioSem'), payload.get('cod'), payload.get('docente'),
+                 estado, encoding, blob, codec, len(contenido), tamanio_comprimido, time.time()))
+            self._conexion.commit()
+        return blob
+
+    def leer_blob(self, blob):
+        return leer_blob(self.directorio, blob)
+
+    def obtener(self, url, payload):
+        with self._lock:
+            fila = self._conexion.execute("SELECT estado, encoding, blob FROM paginas WHERE clave = ?", (clave_pagina(url, payload),)).fetchone()
+        if fila is None: return None
+        estado, encoding, blob = fila
+        return RespuestaArchivada(url, estado, encoding, self.leer_blob(blob))
+
+    def consultar(self, sql, parametros=()):
+        """Consulta de sólo lectura sobre el índice (para reprocesos y herramientas)."""
+        with self._lock:
+            return self._conexion.execute(sql, parametros).fetchall()
+
+    def resumen(self):
+        paginas, tamanio, comprimido = self.consultar("SELECT COUNT(*), COALESCE(SUM(tamanio), 0), COALESCE(SUM(tamanio_comprimido), 0) FROM paginas")[0]
+        return f"{paginas} páginas, {tamanio / 1e6:.1f} MB -> {comprimido / 1e6:.1f} MB comprimidos"
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
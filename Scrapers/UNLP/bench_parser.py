@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import extractores
+import parser_rapido
+
+# --- Comparación y micro-benchmark de parsers ---
+# Verifica que parser_rapido.py produzca exactamente los mismos registros que la
+# implementación de referencia con BeautifulSoup (extractores.py) sobre las páginas
+# guardadas en fixtures/, y mide cuánto tarda cada uno en parsear + extraer.
+#
+# Uso: python bench_parser.py [iteraciones]
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CONTEXTO = {'periodo': '2023 - Segundo Semestre', 'materia_codigo': 'E0201', 'materia_nombre': 'MATEMATICA A (E0201)', 'docente': 'PÉREZ, Juan (JTP)'}
+
+def cargar_fixtures():
+    fixtures = {}
+    for nombre in sorted(os.listdir(DIRECTORIO_FIXTURES)):
+        if nombre.endswith('.html'):
+            with open(os.path.join(DIRECTORIO_FIXTURES, nombre), encoding='utf-8') as f:
+                fixtures[nombre] = f.read()
+    return fixtures
+
+def extraer_todo(modulo, html):
+    """Parsea una página y corre todos los extractores del módulo sobre el mismo árbol."""
+    arbol = modulo.parsear_pagina(html)
+    resultado = {nombre: extractor(arbol, CONTEXTO) for nombre, (_, _, extractor) in modulo.SALIDAS_MATERIA.items()}
+    resultado['docente'] = modulo.SALIDA_DOCENTE[2](arbol, CONTEXTO)
+    resultado['periodos'] = modulo.extraer_periodos(arbol)
+    for select in ('anioSem', 'cod', 'docente'):
+        resultado[f'opciones_{select}'] = modulo.extraer_opciones_select(arbol, select)
+    return resultado
+
+def verificar_equivalencia(fixtures):
+    ok = True
+    for nombre, html in fixtures.items():
+        referencia = extraer_todo(extractores, html)
+        rapido = extraer_todo(parser_rapido, html)
+        for clave in referencia:
+            if referencia[clave] != rapido[clave]:
+                ok = False
+                print(f"DIFERENCIA en {nombre} [{clave}]:\n  bs4:    {referencia[clave]}\n  rápido: {rapido[clave]}")
+        print(f"  {nombre}: " + ", ".join(f"{clave}={len(valor or [])}" for clave, valor in referencia.items()))
+    return ok
+
+def medir(modulo, fixtures, iteraciones):
+    inicio = time.perf_counter()
+    for _ in range(iteraciones):
+        for html in fixtures.values():
+            extraer_todo(modulo, html)
+    return (time.perf_counter() - inicio) / (iteraciones * len(fixtures))
+
+if __name__ == "__main__":
+    ITERACIONES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    fixtures = cargar_fixtures()
+    print(f"1. Verificando equivalencia sobre {len(fixtures)} fixtures...")
+    if not verificar_equivalencia(fixtures):
+        print("ERROR: los parsers no producen los mismos registros.")
+        sys.exit(1)
+    print("-> Ambos parsers producen registros idénticos.")
+
+    print(f"\n2. Midiendo {ITERACIONES} iteraciones por fixture...")
+    t_bs4 = medir(extractores, fixtures, ITERACIONES)
+    t_rapido = medir(parser_rapido, fixtures, ITERACIONES)
+    print(f"-> BeautifulSoup: {t_bs4 * 1000:.3f} ms/página")
+    print(f"-> lxml + XPath:  {t_rapido * 1000:.3f} ms/página")
+    print(f"-> Aceleración:   {t_bs4 / t_rapido:.1f}x")
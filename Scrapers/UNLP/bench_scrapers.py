@@ -0,0 +1,179 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import sitio_simulado
+
+# --- Benchmark offline de los scrapers y de la consolidación ---
+# Levanta sitio_simulado.py dentro de este proceso, corre cada scraper de punta a punta contra él
+# (cada uno en un directorio temporal vacío, con ENCUESTAS_URL apuntando al sitio) y reporta:
+#   req/s      peticiones atendidas por segundo durante la corrida
+#   p50/p99    latencia de las respuestas medida en el servidor (demora simulada + generación)
+#   CPU/pág    tiempo de CPU del proceso del scraper (usuario + sistema) por página descargada
+#   RSS pico   memoria residente máxima del proceso del scraper
+# Después mide JuntarCSV.py (consolidar_datos_eficiente, y la variante --streaming) sobre CSV
+# sintéticos de bench_juntar.py. Con la misma semilla y los mismos parámetros la carga de trabajo es
+# idéntica, así que los resultados se pueden guardar (--guardar) y comparar contra una corrida
+# anterior (--comparar), que termina con error si alguna métrica empeora más que --tolerancia.
+# CPU y RSS por proceso requieren os.wait4 (Linux / macOS); en Windows se informan vacíos.
+# Cada scraper corre con ENCUESTAS_METRICAS (ver instrumentacion.py) y el JSON guardado incluye su
+# tiempo medio por etapa; con ENCUESTAS_LOG=WARNING en el entorno se mide sin los mensajes por unidad.
+#
+# Uso: python bench_scrapers.py [--scrapers unificado materia ...] [--latencia 20] [--errores 0.01]
+#                               [--escalas 1 10] [--guardar base.json | --comparar base.json]
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_SCRAPERS = os.path.dirname(DIRECTORIO)
+# (argumentos, respuesta al menú interactivo de periodos)
+SCRAPERS = {
+    'materia': (['multithread_materia.py'], '0\n'),
+    'comentarios': (['multithread_comentarios.py'], '0\n'),
+    'profesor_rango': (['multithread_profesor_rango.py'], '0\n'),
+    'profesor': (['multithread_profesor.py'], '0\n'),
+    'unificado': (['multithread_unificado.py', '--periodos', 'todos'], None),
+    'unificado_docentes': (['multithread_unificado.py', '--periodos', 'todos', '--docentes'], None),
+    'unificado_async': (['multithread_unificado.py', '--periodos', 'todos', '--docentes', '--motor', 'async'], None),
+}
+CONSOLIDACIONES = {'eficiente': [], 'streaming': ['--streaming']}
+# Métricas que se comparan contra una corrida anterior: True si más es mejor.
+METRICAS = {'req_s': True, 'cpu_ms_pagina': False, 'rss_mb': False, 'segundos': False}
+
+def ejecutar(argumentos, directorio, entrada=None, entorno=None):
+    """Corre un proceso hijo; devuelve (código, segundos, CPU en segundos, RSS pico en MB) de ese hijo."""
+    with open(os.path.join(directorio, 'salida.log'), 'w', encoding='utf-8') as log:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen([sys.executable] + argumentos, cwd=directorio, env=entorno, stdout=log, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.PIPE if entrada else subprocess.DEVNULL)
+        if entrada:
+            proceso.stdin.write(entrada.encode())
+            proceso.stdin.close()
+        if not hasattr(os, 'wait4'):
+            return proceso.wait(), time.perf_counter() - inicio, None, None
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        segundos = time.perf_counter() - inicio
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    # ru_maxrss está en KB en Linux y en bytes en macOS.
+    rss = uso.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return proceso.returncode, segundos, uso.ru_utime + uso.ru_stime, round(rss, 1)
+
+def _filas_csv(directorio):
+    filas = 0
+    for nombre in os.listdir(directorio):
+        if nombre.endswith('.csv'):
+            with open(os.path.join(directorio, nombre), newline='', encoding='utf-8-sig') as f:
+                filas += sum(1 for _ in csv.reader(f)) - 1
+    return filas
+
+def _mostrar_error(directorio, codigo):
+    with open(os.path.join(directorio, 'salida.log'), encoding='utf-8', errors='replace') as f:
+        cola = f.read()[-1500:]
+    print(f"   ERROR: el proceso terminó con código {codigo}. Últimas líneas:\n{cola}")
+
+def medir_scraper(nombre, sitio, url):
+    argumentos, entrada = SCRAPERS[nombre]
+    entorno = dict(os.environ, ENCUESTAS_URL=url, ENCUESTAS_METRICAS='metricas')
+    for variable in ('ENCUESTAS_ARCHIVO', 'ENCUESTAS_PERFIL'):
+        entorno.pop(variable, None)
+    with tempfile.TemporaryDirectory() as directorio:
+        sitio.reiniciar_registro()
+        codigo, segundos, cpu, rss = ejecutar([os.path.join(DIRECTORIO, argumentos[0])] + argumentos[1:], directorio, entrada, entorno)
+        servidor = sitio_simulado.resumen(sitio.reiniciar_registro())
+        if codigo != 0: _mostrar_error(directorio, codigo)
+        paginas = servidor['peticiones'] - servidor['errores']
+        etapas = {}
+        if os.path.exists(os.path.join(directorio, 'metricas.json')):
+            with open(os.path.join(directorio, 'metricas.json'), encoding='utf-8') as f:
+                etapas = {etapa: medida['media_ms'] for etapa, medida in json.load(f)['etapas'].items()}
+        return dict(servidor, codigo=codigo, segundos=round(segundos, 2), filas=_filas_csv(directorio),
+                    cpu_ms_pagina=round(cpu * 1000 / paginas, 2) if cpu is not None and paginas else None, rss_mb=rss,
+                    etapas_media_ms=etapas)
+
+def medir_consolidacion(escala):
+    sys.path.insert(0, DIRECTORIO_SCRAPERS)
+    import bench_juntar
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        _, filas = bench_juntar.generar_csvs(directorio, escala)
+        for modo, opciones in CONSOLIDACIONES.items():
+            codigo, segundos, cpu, rss = ejecutar([os.path.join(DIRECTORIO_SCRAPERS, 'JuntarCSV.py')] + opciones, directorio)
+            if codigo != 0: _mostrar_error(directorio, codigo)
+            resultados[f'{modo}@{escala}x'] = {'codigo': codigo, 'filas': filas, 'segundos': round(segundos, 2),
+                                               'cpu_s': round(cpu, 2) if cpu is not None else None, 'rss_mb': rss}
+    return resultados
+
+def comparar(actual, anterior, tolerancia):
+    """Lista de regresiones: métricas que empeoraron más que `tolerancia` (proporción) respecto de `anterior`."""
+    regresiones = []
+    for seccion in ('scrapers', 'consolidacion'):
+        for nombre, medidas in actual.get(seccion, {}).items():
+            previas = anterior.get(seccion, {}).get(nombre, {})
+            for metrica, mayor_es_mejor in METRICAS.items():
+                antes, ahora = previas.get(metrica), medidas.get(metrica)
+                if not antes or ahora is None: continue
+                cambio = (ahora - antes) / antes * (-1 if mayor_es_mejor else 1)
+                marca = 'REGRESIÓN' if cambio > tolerancia else ''
+                print(f"  {nombre:<26} {metrica:<14} {antes:>9} -> {ahora:<9} ({'peor' if cambio > 0 else 'mejor'} {abs(cambio):.0%}) {marca}")
+                if marca: regresiones.append((nombre, metrica))
+    return regresiones
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline: scrapers contra sitio_simulado.py y consolidación sobre CSV sintéticos.")
+    parser.add_argument('--scrapers', nargs='*', choices=list(SCRAPERS), default=list(SCRAPERS), help="Scrapers a medir (por defecto todos; sin valores, ninguno).")
+    parser.add_argument('--periodos', type=int, default=2)
+    parser.add_argument('--materias', type=int, default=40, help="Materias por periodo (por defecto 40).")
+    parser.add_argument('--docentes', type=int, default=6, help="Máximo de docentes por materia (por defecto 6).")
+    parser.add_argument('--latencia', type=float, default=20, help="Demora media de cada respuesta en ms (por defecto 20).")
+    parser.add_argument('--errores', type=float, default=0.0, help="Proporción de respuestas 503 (por defecto 0).")
+    parser.add_argument('--relleno', type=int, default=0, help="KB de marcado inerte agregado a cada página (por defecto 0).")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--escalas', nargs='*', type=int, default=[1, 10], help="Escalas de bench_juntar.py para la consolidación (por defecto 1 10; sin valores, no se mide).")
+    parser.add_argument('--guardar', default=None, metavar='ARCHIVO', help="Guardar los resultados en JSON.")
+    parser.add_argument('--comparar', default=None, metavar='ARCHIVO', help="Comparar contra resultados guardados con --guardar.")
+    parser.add_argument('--tolerancia', type=float, default=0.15, help="Empeoramiento admitido al comparar (por defecto 0.15 = 15%%).")
+    args = parser.parse_args()
+
+    parametros = {clave: getattr(args, clave) for clave in ('periodos', 'materias', 'docentes', 'latencia', 'errores', 'relleno', 'semilla')}
+    resultados = {'parametros': parametros, 'scrapers': {}, 'consolidacion': {}}
+    fallo = False
+    if args.scrapers:
+        sitio = sitio_simulado.SitioSimulado(args.periodos, args.materias, args.docentes, latencia=args.latencia,
+                                             errores=args.errores, relleno=args.relleno, semilla=args.semilla)
+        servidor = sitio_simulado.iniciar(sitio)
+        print(f"1. Scrapers contra {servidor.url} ({args.periodos} periodos x {args.materias} materias, latencia {args.latencia} ms, errores {args.errores:.0%})")
+        print(f"   {'scraper':<20} {'pet.':>6} {'err.':>5} {'filas':>7} {'seg.':>7} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>7} {'CPU ms/pág':>10} {'RSS MB':>7}")
+        for nombre in args.scrapers:
+            r = medir_scraper(nombre, sitio, servidor.url)
+            resultados['scrapers'][nombre] = r
+            fallo = fallo or r['codigo'] != 0
+            print(f"   {nombre:<20} {r['peticiones']:>6} {r['errores']:>5} {r['filas']:>7} {r['segundos']:>7} {r['req_s']:>7} "
+                  f"{r['p50_ms'] or '-':>7} {r['p99_ms'] or '-':>7} {r['cpu_ms_pagina'] or '-':>10} {r['rss_mb'] or '-':>7}")
+        servidor.shutdown()
+    if args.escalas:
+        print("\n2. Consolidación (JuntarCSV.py) sobre CSV sintéticos")
+        print(f"   {'modo':<20} {'filas':>9} {'seg.':>7} {'CPU s':>7} {'RSS MB':>7}")
+        for escala in args.escalas:
+            for nombre, r in medir_consolidacion(escala).items():
+                resultados['consolidacion'][nombre] = r
+                fallo = fallo or r['codigo'] != 0
+                print(f"   {nombre:<20} {r['filas']:>9} {r['segundos']:>7} {r['cpu_s'] or '-':>7} {r['rss_mb'] or '-':>7}")
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en '{args.guardar}'.")
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        print(f"\n3. Comparación contra '{args.comparar}' (tolerancia {args.tolerancia:.0%})")
+        if anterior.get('parametros') != parametros:
+            print(f"   ATENCIÓN: parámetros distintos ({anterior.get('parametros')}); la comparación no es directa.")
+        regresiones = comparar(resultados, anterior, args.tolerancia)
+        if regresiones:
+            print(f"ERROR: {len(regresiones)} métricas empeoraron más de {args.tolerancia:.0%}.")
+            fallo = True
+    if fallo: sys.exit(1)
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import json
+import os
+import re
+import socket
+import threading
+import time
+
+from almacen import conectar
+from diario import deduplicar_csv
+from extractores import codificacion_salida
+from instrumentacion import log
+
+# --- Cola de trabajo compartida con leases (crawl distribuido) ---
+# Para repartir un crawl entre varios procesos o máquinas, las unidades de trabajo se publican en
+# una tabla SQLite en lugar de recorrerse en un solo proceso:
+#   unidades(id, tipo, datasets, periodo_value, periodo_texto, materia_value, materia_texto,
+#            docente_value, estado, trabajador, vence, intentos, error, fecha)
+# con las mismas claves que fallidos.jsonl. `multithread_unificado.py --cola --publicar` carga las
+# unidades (periodo, materia). Cada trabajador (`multithread_unificado.py --cola`) toma lotes con
+# un lease que vence a los `duracion_lease` segundos y que un hilo de latido renueva mientras el
+# proceso siga vivo. Al bajar una materia, sus docentes se publican como unidades
+# (periodo, materia, docente), que puede tomar cualquier trabajador.
+#
+# Una unidad pasa a 'hecha' recién cuando sus filas quedaron en disco, en el callback de
+# confirmación del escritor (DiarioCola envuelve al diario de progreso). Si un trabajador muere, su
+# lease vence y otro toma la unidad. Si una unidad agota `max_intentos` leases vencidos, o falla tras
+# los reintentos (fallidos.py), queda 'fallida'; `python cola_trabajo.py reintentar` la devuelve a la cola.
+#
+# Cada trabajador escribe sus CSV en <parciales>/<trabajador>/. `python cola_trabajo.py unir` los
+# junta en los CSV habituales y de cada unidad toma sólo las filas del trabajador que la completó,
+# así que nada se duplica aunque un lease se haya perdido a mitad de camino.
+# SQLite necesita bloqueos de archivo confiables: entre máquinas, la base tiene que estar en un
+# sistema de archivos compartido que los respete (no en cualquier montaje NFS).
+
+ARCHIVO_COLA = 'cola_trabajo.sqlite'
+DIRECTORIO_PARCIALES = 'parciales'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS unidades (id INTEGER PRIMARY KEY, tipo TEXT NOT NULL, datasets TEXT NOT NULL,
+                                     periodo_value TEXT NOT NULL, periodo_texto TEXT NOT NULL,
+                                     materia_value TEXT NOT NULL, materia_texto TEXT NOT NULL, docente_value TEXT NOT NULL DEFAULT '',
+                                     estado TEXT NOT NULL DEFAULT 'pendiente', trabajador TEXT, vence REAL,
+                                     intentos INTEGER NOT NULL DEFAULT 0, error TEXT, fecha TEXT,
+                                     UNIQUE (tipo, periodo_value, materia_value, docente_value));
+CREATE INDEX IF NOT EXISTS idx_unidades_estado ON unidades (estado, id);
+"""
+
+_COLUMNAS = ['id', 'tipo', 'datasets', 'periodo_value', 'periodo_texto', 'materia_value', 'materia_texto', 'docente_value']
+
+def nombre_trabajador():
+    """Nombre por defecto de un trabajador (se usa también como nombre de su directorio parcial)."""
+    return re.sub(r'[^\w.-]', '_', f"{socket.gethostname()}-{os.getpid()}")
+
+def clave_unidad(u):
+    """Clave de la unidad en el diario de progreso: [periodo, materia] o [periodo, materia, docente]."""
+    if u['tipo'] == 'docente':
+        return (u['periodo_texto'], u['materia_value'], u['docente_value'])
+    return (u['periodo_texto'], u['materia_value'])
+
+class ColaTrabajo:
+    def __init__(self, ruta=ARCHIVO_COLA, trabajador=None, duracion_lease=120, max_intentos=3):
+        self.ruta = ruta
+        self.trabajador = trabajador or nombre_trabajador()
+        self.duracion_lease = duracion_lease
+        self.max_intentos = max_intentos
+        # Unidades tomadas por este proceso y aún sin confirmar: clave -> [id, datasets que faltan].
+        self._en_curso = {}
+        self._lock = threading.Lock()
+        self._latido = None
+        self._detener = threading.Event()
+        conexion = conectar(ruta)
+        conexion.executescript(ESQUEMA)
+        conexion.close()
+
+    def _ejecutar(self, funcion):
+        """Corre `funcion(conexion)` en una transacción de escritura (una conexión por llamada: la usan varios hilos)."""
+        conexion = conectar(self.ruta)
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcion(conexion)
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            return resultado
+        finally:
+            conexion.close()
+
+    def publicar(self, unidades):
+        """Agrega unidades (dicts como los de fallidos.jsonl); las que ya estaban no se tocan. Devuelve cuántas eran nuevas."""
+        filas = [(u['tipo'], json.dumps(sorted(u['datasets'])), u['periodo_value'], u['periodo_texto'], u['materia_value'], u['materia_texto'],
+                  u.get('docente_value') or '') for u in unidades]
+        if not filas: return 0
+        def insertar(conexion):
+            antes = conexion.total_changes
+            conexion.executemany("INSERT OR IGNORE INTO unidades (tipo, datasets, periodo_value, periodo_texto, materia_value, materia_texto, docente_value) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", filas)
+            return conexion.total_changes - antes
+        return self._ejecutar(insertar)
+
+    def publicar_docentes(self, periodo_value, periodo_texto, materia_value, materia_texto, docentes):
+        """Publica los docentes de una materia ya bajada; con eso la materia deja de esperar por ellos."""
+        self.publicar([{'tipo': 'docente', 'datasets': ['docente'], 'periodo_value': periodo_value, 'periodo_texto': periodo_texto,
+                        'materia_value': materia_value, 'materia_texto': materia_texto, 'docente_value': d} for d in docentes])
+        self.confirmar('docente', (periodo_texto, materia_value))
+
+    def tomar(self, cantidad):
+        """Toma hasta `cantidad` unidades pendientes (o con el lease vencido) con un lease nuevo a nombre de este trabajador."""
+        if cantidad <= 0: return []
+        ahora = time.time()
+        def reclamar(conexion):
+            # Unidades que ya mataron (o colgaron) a demasiados trabajadores: no se vuelven a repartir.
+            conexion.execute("UPDATE unidades SET estado = 'fallida', error = 'lease vencido ' || intentos || ' veces', vence = NULL "
+                             "WHERE estado = 'tomada' AND vence < ? AND intentos >= ?", (ahora, self.max_intentos))
+            filas = conexion.execute(f"SELECT {', '.join(_COLUMNAS)} FROM unidades WHERE estado = 'pendiente' OR (estado = 'tomada' AND vence < ?) "
+                                     "ORDER BY id LIMIT ?", (ahora, cantidad)).fetchall()
+            conexion.executemany("UPDATE unidades SET estado = 'tomada', trabajador = ?, vence = ?, intentos = intentos + 1 WHERE id = ?",
+                                 [(self.trabajador, ahora + self.duracion_lease, fila[0]) for fila in filas])
+            return filas
+        unidades = []
+        for fila in self._ejecutar(reclamar):
+            u = dict(zip(_COLUMNAS, fila), datasets=json.loads(fila[2]))
+            u['docente_value'] = u['docente_value'] or None
+            with self._lock:
+                self._en_curso[clave_unidad(u)] = [u['id'], set(u['datasets'])]
+            unidades.append(u)
+        return unidades
+
+    def confirmar(self, dataset, clave):
+        """Un dataset de una unidad en curso ya está en disco; con el último, la unidad queda 'hecha'."""
+        clave = tuple(clave)
+        with self._lock:
+            en_curso = self._en_curso.get(clave)
+            if en_curso is None: return # p. ej. la marca '*' de los docentes de una materia
+            en_curso[1].discard(dataset)
+            if en_curso[1]: return
+            del self._en_curso[clave]
+        completada = self._ejecutar(lambda conexion: conexion.execute(
+            "UPDATE unidades SET estado = 'hecha', vence = NULL, error = NULL, fecha = ? WHERE id = ? AND trabajador = ? AND estado = 'tomada'",
+            (time.strftime('%Y-%m-%d %H:%M:%S'), en_curso[0], self.trabajador)).rowcount)
+        if not completada:
+            log.warning("    [Cola] Lease perdido de %s: la completó otro trabajador (sus filas de acá se descartan al unir).", list(clave))
+
+    def fallar(self, registro):
+        """Callback de fallidos.py: la unidad falló tras los reintentos y queda 'fallida' en la cola."""
+        u = dict(registro, docente_value=registro.get('docente_value') or None)
+        with self._lock:
+            en_curso = self._en_curso.pop(clave_unidad(u), None)
+        if en_curso is None: return
+        self._ejecutar(lambda conexion: conexion.execute(
+            "UPDATE unidades SET estado = 'fallida', vence = NULL, error = ?, fecha = ? WHERE id = ? AND trabajador = ?",
+            (registro['error'], time.strftime('%Y-%m-%d %H:%M:%S'), en_curso[0], self.trabajador)))
+
+    def pendiente(self, u):
+        """True si la unidad tomada todavía no se completó en este proceso."""
+        with self._lock:
+            return clave_unidad(u) in self._en_curso
+
+    def renovar(self):
+        """Extiende el lease de todas las unidades que este trabajador tiene tomadas."""
+        self._ejecutar(lambda conexion: conexion.execute("UPDATE unidades SET vence = ? WHERE trabajador = ? AND estado = 'tomada'",
+                                                         (time.time() + self.duracion_lease, self.trabajador)))
+
+    def iniciar_latido(self):
+        def latir():
+            while not self._detener.wait(self.duracion_lease / 3):
+                self.renovar()
+        self._latido = threading.Thread(target=latir, name='latido-cola', daemon=True)
+        self._latido.start()
+
+    def detener_latido(self):
+        self._detener.set()
+        if self._latido is not None: self._latido.join()
+
+    def hay_trabajo(self):
+        """True mientras queden unidades pendientes o tomadas (por cualquier trabajador)."""
+        conexion = conectar(self.ruta)
+        try:
+            return conexion.execute("SELECT EXISTS (SELECT 1 FROM unidades WHERE estado IN ('pendiente', 'tomada'))").fetchone()[0] == 1
+        finally:
+            conexion.close()
+
+    def datasets(self):
+        conexion = conectar(self.ruta)
+        try:
+            return {nombre for (datasets,) in conexion.execute("SELECT DISTINCT datasets FROM unidades") for nombre in json.loads(datasets)}
+        finally:
+            conexion.close()
+
+    def resumen(self):
+        conexion = conectar(self.ruta)
+        try:
+            estados = dict(conexion.execute("SELECT estado, COUNT(*) FROM unidades GROUP BY estado"))
+        finally:
+            conexion.close()
+        return ' '.join(f"{estado}={estados.get(estado, 0)}" for estado in ('pendiente', 'tomada', 'hecha', 'fallida'))
+
+class DiarioCola:
+    """Misma interfaz que diario.DiarioProgreso: marca en el diario local del trabajador y confirma en la cola."""
+    def __init__(self, diario, cola, dataset):
+        self.diario = diario
+        self.cola = cola
+        self.dataset = dataset
+
+    def completado(self, clave):
+        return self.diario.completado(clave)
+
+    def marcar(self, clave):
+        self.diario.marcar(clave)
+        self.cola.confirmar(self.dataset, clave)
+
+    def cerrar(self):
+        self.diario.cerrar()
+
+# --- Unión de los resultados parciales ---
+def duenios(ruta):
+    """Trabajador que completó cada unidad hecha: {clave del diario: trabajador}."""
+    conexion = conectar(ruta)
+    try:
+        filas = conexion.execute("SELECT tipo, periodo_texto, materia_value, docente_value, trabajador FROM unidades WHERE estado = 'hecha'").fetchall()
+    finally:
+        conexion.close()
+    return {clave_unidad({'tipo': tipo, 'periodo_texto': periodo, 'materia_value': materia, 'docente_value': docente}): trabajador
+            for tipo, periodo, materia, docente, trabajador in filas}
+
+def unir_parciales(ruta, salidas, parciales=DIRECTORIO_PARCIALES, destino='.'):
+    """Junta los CSV de <parciales>/<trabajador>/ en `destino`, con las filas de cada unidad sólo del trabajador que la completó.
+    `salidas` es {archivo: columnas que identifican la unidad}. Devuelve {archivo: filas escritas}."""
+    duenio = duenios(ruta)
+    trabajadores = sorted(d for d in os.listdir(parciales) if os.path.isdir(os.path.join(parciales, d))) if os.path.isdir(parciales) else []
+    escritas = {}
+    for nombre_archivo, columnas_unidad in salidas.items():
+        encabezado, filas, descartadas = None, [], 0
+        for trabajador in trabajadores:
+            ruta_csv = os.path.join(parciales, trabajador, nombre_archivo)
+            if not os.path.isfile(ruta_csv): continue
+            with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+                lector = csv.reader(f)
+                propio = next(lector, None)
+                if propio is None: continue
+                encabezado = encabezado or propio
+                indices = [propio.index(c) for c in columnas_unidad]
+                orden = [propio.index(c) for c in encabezado]
+                for fila in lector:
+                    if duenio.get(tuple(fila[i] for i in indices)) == trabajador:
+                        filas.append([fila[i] for i in orden])
+                    else:
+                        descartadas += 1
+        if encabezado is None: continue
+        ruta_destino = os.path.join(destino, nombre_archivo)
+        temporal = ruta_destino + '.tmp'
+        with open(temporal, 'w', newline='', encoding=codificacion_salida(nombre_archivo)) as f:
+            csv.writer(f).writerows([encabezado] + filas)
+        os.replace(temporal, ruta_destino)
+        escritas[nombre_archivo] = len(filas) - deduplicar_csv(ruta_destino, codificacion_salida(nombre_archivo))
+        print(f"-> {nombre_archivo}: {escritas[nombre_archivo]} filas de {len(trabajadores)} trabajadores" +
+              (f" ({descartadas} de unidades que completó otro trabajador o que no terminaron, descartadas)." if descartadas else "."))
+    return escritas
+
+if __name__ == "__main__":
+    import parser_rapido
+    SALIDAS = {nombre_archivo: ['periodo', 'materia_codigo'] for nombre_archivo, _, _ in parser_rapido.SALIDAS_MATERIA.values()}
+    SALIDAS[parser_rapido.SALIDA_DOCENTE[0]] = ['periodo', 'materia_codigo', 'docente']
+
+    parser = argparse.ArgumentParser(description="Cola de trabajo del crawl distribuido: estado, reintentos y unión de los resultados parciales.",
+                                     epilog="Publicar: python multithread_unificado.py --cola --publicar --periodos todos --docentes; "
+                                            "trabajar (en cada proceso o máquina): python multithread_unificado.py --cola")
+    parser.add_argument('--cola', default=ARCHIVO_COLA, help=f"Base SQLite de la cola (por defecto '{ARCHIVO_COLA}').")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    subcomandos.add_parser('estado', help="Unidades por estado y por trabajador.")
+    subcomandos.add_parser('reintentar', help="Devuelve las unidades fallidas a la cola.")
+    unir = subcomandos.add_parser('unir', help="Junta los CSV parciales de los trabajadores.")
+    unir.add_argument('--parciales', default=DIRECTORIO_PARCIALES, help=f"Directorio con un subdirectorio por trabajador (por defecto '{DIRECTORIO_PARCIALES}').")
+    unir.add_argument('--destino', default='.', help="Directorio donde escribir los CSV unidos (se reemplazan).")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cola):
+        print(f"ERROR: No existe la cola '{args.cola}'.")
+        exit(1)
+    cola = ColaTrabajo(args.cola)
+    if args.comando == 'estado':
+        print(f"Cola '{args.cola}': {cola.resumen()}")
+        conexion = conectar(args.cola)
+        for trabajador, estado, cantidad in conexion.execute("SELECT trabajador, estado, COUNT(*) FROM unidades WHERE trabajador IS NOT NULL "
+                                                             "GROUP BY trabajador, estado ORDER BY trabajador, estado"):
+            print(f"  {trabajador:<30} {estado:<10} {cantidad:>7}")
+        for tipo, materia, docente, error in conexion.execute("SELECT tipo, materia_texto, docente_value, error FROM unidades WHERE estado = 'fallida' LIMIT 20"):
+            print(f"  fallida: {tipo} '{materia}'{f' / {docente}' if docente else ''}: {error}")
+        conexion.close()
+    elif args.comando == 'reintentar':
+        cantidad = cola._ejecutar(lambda conexion: conexion.execute(
+            "UPDATE unidades SET estado = 'pendiente', trabajador = NULL, vence = NULL, intentos = 0 WHERE estado = 'fallida'").rowcount)
+        print(f"-> {cantidad} unidades fallidas volvieron a la cola.")
+    else:
+        print(f"Uniendo resultados parciales de '{args.parciales}' (cola: {cola.resumen()})...")
+        unir_parciales(args.cola, SALIDAS, args.parciales, args.destino)
+        if cola.hay_trabajo():
+            print("ATENCIÓN: la cola todavía tiene unidades pendientes o tomadas; los CSV unidos están incompletos.")
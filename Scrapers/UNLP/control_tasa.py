@@ -0,0 +1,148 @@
+import asyncio
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Controlador adaptativo de tasa y concurrencia ---
+# Reemplaza los time.sleep() fijos de los workers. Combina:
+#   * un token bucket que limita las peticiones por segundo, y
+#   * un límite de peticiones en vuelo ajustado por AIMD (aumento aditivo mientras el
+#     servidor responde bien, disminución multiplicativa ante 429/5xx, timeouts o una
+#     latencia muy por encima de la mínima observada).
+# Un único controlador se comparte entre todos los hilos (y el motor asíncrono), de modo
+# que todo el proceso respeta un mismo presupuesto frente al servidor.
+
+ESTADOS_CONGESTION = {429, 500, 502, 503, 504}
+
+def _entregar(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+class ControladorTasa:
+    def __init__(self, concurrencia_maxima=10, concurrencia_inicial=None, concurrencia_minima=1,
+                 tasa_inicial=5.0, tasa_minima=0.5, tasa_maxima=100.0, factor_latencia=3.0, latencia_piso=0.5):
+        self.concurrencia_maxima = concurrencia_maxima
+        self.concurrencia_minima = concurrencia_minima
+        self.limite = float(concurrencia_inicial or max(concurrencia_minima, concurrencia_maxima // 2))
+        self.tasa = tasa_inicial
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.factor_latencia = factor_latencia
+        self.latencia_piso = latencia_piso
+        self.en_vuelo = 0
+        self.latencia_minima = None
+        self.latencia_media = None
+        self.exitos = 0
+        self.congestiones = 0
+        self._tokens = 1.0
+        self._ultimo_relleno = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._enfriamiento_hasta = 0.0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._esperando = collections.deque() # (loop, futuro) de las corrutinas en adquirir_async, en orden de llegada
+
+    # --- Token bucket ---
+    def _reservar_token(self):
+        """Reserva un token y devuelve cuántos segundos hay que esperar para usarlo (se llama con el lock tomado)."""
+        ahora = time.monotonic()
+        capacidad = max(1.0, self.tasa)
+        self._tokens = min(capacidad, self._tokens + (ahora - self._ultimo_relleno) * self.tasa)
+        self._ultimo_relleno = ahora
+        self._tokens -= 1.0
+        espera = 0.0 if self._tokens >= 0 else -self._tokens / self.tasa
+        return max(espera, self._pausa_hasta - ahora)
+
+    def _hay_lugar(self):
+        return self.en_vuelo < int(self.limite)
+
+    def _despertar(self):
+        """Entrega los lugares libres a las corrutinas en espera (se llama con el lock tomado)."""
+        while self._esperando and self._hay_lugar():
+            loop, futuro = self._esperando.popleft()
+            self.en_vuelo += 1 # el lugar ya es suyo; si la cancelan antes de tomarlo, lo libera ella
+            loop.call_soon_threadsafe(_entregar, futuro)
+
+    # --- Adquisición / liberación (hilos) ---
+    def adquirir(self):
+        with self._cond:
+            while not self._hay_lugar():
+                self._cond.wait()
+            self.en_vuelo += 1
+            espera = self._reservar_token()
+        if espera > 0:
+            time.sleep(espera)
+
+    def liberar(self):
+        with self._cond:
+            self.en_vuelo -= 1
+            self._cond.notify()
+            self._despertar()
+
+    @contextmanager
+    def permiso(self):
+        self.adquirir()
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    # --- Adquisición (asyncio) ---
+    async def adquirir_async(self):
+        """Como adquirir(), pero la corrutina espera su lugar sin bloquear el loop: liberar() (o
+        registrar(), si el límite sube) se lo entrega y la despierta, en orden de llegada."""
+        futuro = None
+        with self._cond:
+            if self._hay_lugar() and not self._esperando:
+                self.en_vuelo += 1
+            else:
+                loop = asyncio.get_running_loop()
+                futuro = loop.create_future()
+                self._esperando.append((loop, futuro))
+        if futuro is not None:
+            try:
+                await futuro
+            except asyncio.CancelledError:
+                with self._cond:
+                    entregado = (loop, futuro) not in self._esperando
+                    if not entregado:
+                        self._esperando.remove((loop, futuro))
+                if entregado: # ya le habían dado el lugar: devolverlo
+                    self.liberar()
+                raise
+        with self._cond:
+            espera = self._reservar_token()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    # --- Retroalimentación AIMD ---
+    def registrar(self, latencia=None, estado=None, timeout=False, pausa=None):
+        """Informa el resultado de una petición. `pausa` (segundos) frena a todos los hilos, p. ej. por Retry-After."""
+        with self._cond:
+            ahora = time.monotonic()
+            congestion = timeout or estado in ESTADOS_CONGESTION
+            if latencia is not None and not timeout:
+                self.latencia_minima = latencia if self.latencia_minima is None else min(self.latencia_minima, latencia)
+                self.latencia_media = latencia if self.latencia_media is None else 0.8 * self.latencia_media + 0.2 * latencia
+                umbral = max(self.latencia_piso, self.latencia_minima * self.factor_latencia)
+                congestion = congestion or self.latencia_media > umbral
+            if pausa:
+                self._pausa_hasta = max(self._pausa_hasta, ahora + pausa)
+            if congestion:
+                # Una sola reducción por "ventana" para no colapsar ante una ráfaga de errores simultáneos.
+                if ahora >= self._enfriamiento_hasta:
+                    self.congestiones += 1
+                    self.limite = max(self.concurrencia_minima, self.limite * 0.5)
+                    self.tasa = max(self.tasa_minima, self.tasa * 0.5)
+                    self._enfriamiento_hasta = ahora + max(1.0, self.latencia_media or 1.0)
+            else:
+                self.exitos += 1
+                self.limite = min(self.concurrencia_maxima, self.limite + 1.0 / self.limite)
+                self.tasa = min(self.tasa_maxima, self.tasa + 1.0 / max(1.0, self.limite))
+            self._cond.notify_all()
+            self._despertar()
+
+    def resumen(self):
+        latencia = f"{self.latencia_media:.2f}s" if self.latencia_media is not None else "-"
+        return f"concurrencia={int(self.limite)}/{self.concurrencia_maxima} tasa={self.tasa:.1f} req/s latencia_media={latencia} éxitos={self.exitos} congestiones={self.congestiones}"
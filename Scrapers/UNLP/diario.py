@@ -0,0 +1,167 @@
+import csv
+import json
+import os
+import threading
+
+# --- Diario de progreso y CSV reanudables ---
+# Cada CSV tiene al lado un diario '<csv>.progreso.jsonl' con una línea JSON por unidad
+# terminada (p. ej. [periodo, materia] o [periodo, materia, docente]). Una unidad se marca
+# recién después de que sus filas quedaron en disco (el escritor de escritor.py hace flush +
+# fsync del CSV antes de llamar a marcar(), que a su vez sincroniza el diario), así que al reanudar:
+#   * se saltean las unidades ya marcadas,
+#   * se purgan del CSV las filas de unidades que quedaron a medias (escritas pero sin marcar),
+#   * y al final se deduplican las filas por clave natural.
+# Para empezar de cero basta con borrar el diario.
+
+SUFIJO_DIARIO = '.progreso.jsonl'
+
+CLAVES_NATURALES = {
+    'resultados_encuestas_multihilo.csv': ['periodo', 'materia_codigo', 'pregunta', 'opcion_respuesta'],
+    'resultados_por_docente.csv': ['periodo', 'materia_codigo', 'docente', 'pregunta', 'opcion_respuesta'],
+    'censo_docentes_multihilo.csv': ['periodo', 'materia_codigo', 'docente_nombre', 'docente_rango'],
+    # Los comentarios no tienen clave natural (dos alumnos pueden escribir lo mismo): sólo se purgan por unidad.
+    'comentarios_encuestas.csv': None,
+}
+
+def _fsync(archivo):
+    archivo.flush()
+    os.fsync(archivo.fileno())
+
+def _reemplazar_atomicamente(ruta, filas, encoding):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', newline='', encoding=encoding) as f:
+        csv.writer(f).writerows(filas)
+        _fsync(f)
+    os.replace(temporal, ruta)
+
+class DiarioProgreso:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.completadas = set()
+        self._lock = threading.Lock()
+        lineas_validas = []
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        clave = tuple(json.loads(linea))
+                    except ValueError:
+                        continue # última línea truncada por un corte abrupto
+                    self.completadas.add(clave)
+                    lineas_validas.append(linea if linea.endswith('\n') else linea + '\n')
+            # Se reescribe compactado (atómicamente) para no arrastrar líneas rotas.
+            temporal = ruta + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.writelines(lineas_validas)
+                _fsync(f)
+            os.replace(temporal, ruta)
+        self._archivo = open(ruta, 'a', encoding='utf-8')
+
+    def completado(self, clave):
+        return tuple(clave) in self.completadas
+
+    def marcar(self, clave):
+        """Marca una unidad como terminada. Llamar sólo cuando sus filas ya están sincronizadas en disco."""
+        clave = tuple(clave)
+        with self._lock:
+            if clave in self.completadas: return
+            self._archivo.write(json.dumps(list(clave), ensure_ascii=False) + '\n')
+            _fsync(self._archivo)
+            self.completadas.add(clave)
+
+    def desmarcar(self, prefijo):
+        """Quita las unidades cuya clave empieza con `prefijo` (p. ej. los docentes de una materia que se
+        vuelve a bajar entera), reescribiendo el diario atómicamente."""
+        prefijo = tuple(prefijo)
+        with self._lock:
+            quitadas = {clave for clave in self.completadas if clave[:len(prefijo)] == prefijo}
+            if not quitadas: return
+            self.completadas -= quitadas
+            self._archivo.close()
+            temporal = self.ruta + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(list(clave), ensure_ascii=False) + '\n' for clave in self.completadas)
+                _fsync(f)
+            os.replace(temporal, self.ruta)
+            self._archivo = open(self.ruta, 'a', encoding='utf-8')
+
+    def cerrar(self):
+        with self._lock:
+            self._archivo.close()
+
+def purgar_unidades_incompletas(ruta_csv, columnas_unidad, diario, encoding='utf-8-sig'):
+    """Quita del CSV las filas de unidades que no figuran como terminadas en el diario."""
+    # Se lee siempre con 'utf-8-sig': el mismo CSV puede haberlo empezado un script con BOM y seguirlo otro sin BOM.
+    with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+        filas = list(csv.reader(f))
+    if not filas: return 0
+    encabezado, datos = filas[0], filas[1:]
+    indices = [encabezado.index(c) for c in columnas_unidad]
+    conservadas = [fila for fila in datos if diario.completado(fila[i] for i in indices)]
+    descartadas = len(datos) - len(conservadas)
+    if descartadas:
+        _reemplazar_atomicamente(ruta_csv, [encabezado] + conservadas, encoding)
+        print(f"-> Reanudación: purgadas {descartadas} filas de unidades incompletas en '{ruta_csv}'.")
+    return descartadas
+
+def contar_filas(ruta_csv):
+    """Filas de datos (sin encabezado) que ya tiene el CSV; 0 si no existe."""
+    if not os.path.isfile(ruta_csv): return 0
+    with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+def purgar_filas_previas(ruta_csv, columnas, claves, filas_previas, encoding='utf-8-sig'):
+    """Quita, de las primeras `filas_previas` filas del CSV, las que pertenecen a `claves` (según `columnas`).
+    Sirve para reemplazar unidades re-descargadas: sus filas nuevas quedan después de esa posición."""
+    if not claves or not filas_previas or not os.path.isfile(ruta_csv): return 0
+    with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+        filas = list(csv.reader(f))
+    encabezado, datos = filas[0], filas[1:]
+    indices = [encabezado.index(c) for c in columnas]
+    conservadas = [fila for n, fila in enumerate(datos) if n >= filas_previas or tuple(fila[i] for i in indices) not in claves]
+    descartadas = len(datos) - len(conservadas)
+    if descartadas:
+        _reemplazar_atomicamente(ruta_csv, [encabezado] + conservadas, encoding)
+        print(f"-> Incremental: reemplazadas {descartadas} filas desactualizadas en '{ruta_csv}'.")
+    return descartadas
+
+def deduplicar_csv(ruta_csv, encoding='utf-8-sig'):
+    """Deja una sola fila por clave natural (la primera), si el CSV tiene clave natural definida."""
+    columnas_clave = CLAVES_NATURALES.get(os.path.basename(ruta_csv))
+    if not columnas_clave or not os.path.exists(ruta_csv): return 0
+    vistas = set()
+    conservadas = []
+    descartadas = 0
+    with open(ruta_csv, newline='', encoding='utf-8-sig') as f:
+        lector = csv.reader(f)
+        encabezado = next(lector, None)
+        if encabezado is None: return 0
+        indices = [encabezado.index(c) for c in columnas_clave]
+        for fila in lector:
+            clave = tuple(fila[i] for i in indices)
+            if clave in vistas:
+                descartadas += 1
+                continue
+            vistas.add(clave)
+            conservadas.append(fila)
+    if descartadas:
+        _reemplazar_atomicamente(ruta_csv, [encabezado] + conservadas, encoding)
+        print(f"-> Deduplicación: eliminadas {descartadas} filas repetidas en '{ruta_csv}'.")
+    return descartadas
+
+def abrir_csv_reanudable(ruta_csv, fieldnames, columnas_unidad, encoding='utf-8-sig'):
+    """Abre el CSV en modo append junto con su diario, dejándolo consistente con él.
+    Devuelve (archivo, diario); las filas se escriben con un EscritorCSV sobre el archivo."""
+    ruta_diario = ruta_csv + SUFIJO_DIARIO
+    hay_diario = os.path.exists(ruta_diario)
+    diario = DiarioProgreso(ruta_diario)
+    # Sin diario previo no se sabe qué unidades están completas: no se purga nada.
+    if hay_diario and os.path.isfile(ruta_csv) and os.path.getsize(ruta_csv) > 0:
+        purgar_unidades_incompletas(ruta_csv, columnas_unidad, diario, encoding)
+    if diario.completadas:
+        print(f"-> Reanudando '{ruta_csv}': {len(diario.completadas)} unidades ya completas se saltearán.")
+    escribir_encabezado = not (os.path.isfile(ruta_csv) and os.path.getsize(ruta_csv) > 0)
+    csvfile = open(ruta_csv, 'a', newline='', encoding=encoding)
+    if escribir_encabezado:
+        csv.writer(csvfile).writerow(fieldnames)
+    return csvfile, diario
@@ -0,0 +1,131 @@
+import abc
+import csv
+import os
+import queue
+import threading
+import time
+
+import instrumentacion
+
+# --- Escritor de CSV en un hilo dedicado ---
+# Los workers no tocan el archivo: encolan sus filas (tuplas en el orden de las columnas) en
+# una cola acotada y siguen trabajando. Un único hilo escritor vacía la cola en lotes grandes
+# con un csv.writer común (sin el armado fila por fila de DictWriter ni un lock disputado por
+# todos los hilos), hace flush periódicamente y fsync antes de confirmar.
+#
+# Cada envío puede traer un callback `al_confirmar` que el escritor ejecuta recién cuando esas
+# filas ya están en disco (flush + fsync): ahí es donde se marca la unidad en el diario de
+# progreso (ver diario.py). Los callbacks corren todos en el hilo escritor, en orden.
+#
+# La cola acotada mantiene la memoria plana: si el disco no da abasto, los workers esperan
+# (esa espera se mide como 'espera_cola' y cada lote como 'escritura', ver instrumentacion.py).
+#
+# EscritorEnHilo es la parte común (cola, lotes, checkpoints); EscritorCSV escribe en un CSV y
+# almacen.EscritorSQLite en la base SQLite.
+
+_FIN = object()
+
+class EscritorEnHilo(abc.ABC):
+    """Cola acotada + hilo escritor. Las subclases definen cómo se escribe un lote (_escribir_lote),
+    cómo se vacía el buffer (_vaciar) y cómo se confirma en disco (_sincronizar)."""
+    def __init__(self, nombre, fieldnames, tamanio_cola=1000, filas_por_lote=5000, intervalo_flush=2.0):
+        self.nombre = nombre
+        self.fieldnames = list(fieldnames)
+        self.filas_por_lote = filas_por_lote
+        self.intervalo_flush = intervalo_flush
+        self.filas_escritas = 0
+        self._destino = os.path.basename(nombre)
+        self._cola = queue.Queue(maxsize=tamanio_cola)
+        self._error = None
+        self._hilo = threading.Thread(target=self._bucle, name=f"escritor-{os.path.basename(nombre)}", daemon=True)
+        self._hilo.start()
+
+    def escribir(self, filas, al_confirmar=None):
+        """Encola filas (tuplas) para escribir. `al_confirmar` se llama cuando ya están en disco."""
+        if self._error is not None:
+            raise RuntimeError(f"El escritor de '{self.nombre}' falló") from self._error
+        inicio = time.perf_counter()
+        self._cola.put((filas, al_confirmar))
+        instrumentacion.registrar('espera_cola', time.perf_counter() - inicio)
+
+    def escribir_registros(self, registros, al_confirmar=None):
+        """Como escribir(), pero con los registros que devuelven los extractores (registros.Registro)."""
+        columnas = self.fieldnames
+        self.escribir([tuple(registro[c] for c in columnas) for registro in registros], al_confirmar)
+
+    def _bucle(self):
+        ultimo_flush = time.monotonic()
+        terminado = False
+        while not terminado:
+            lote, callbacks = [], []
+            # Espera el primer envío y después junta todo lo que ya esté en la cola, hasta llenar un lote.
+            elemento = self._cola.get()
+            while True:
+                if elemento is _FIN:
+                    terminado = True
+                    break
+                filas, al_confirmar = elemento
+                lote.extend(filas)
+                if al_confirmar is not None: callbacks.append(al_confirmar)
+                if len(lote) >= self.filas_por_lote: break
+                try:
+                    elemento = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if lote:
+                    with instrumentacion.medir('escritura'):
+                        self._escribir_lote(lote)
+                    instrumentacion.contar('filas', len(lote), destino=self._destino)
+                self.filas_escritas += len(lote)
+                ahora = time.monotonic()
+                if callbacks or terminado:
+                    # Checkpoint: las filas tienen que estar en disco antes de marcarlas como hechas.
+                    with instrumentacion.medir('sincronizacion'):
+                        self._sincronizar()
+                    ultimo_flush = ahora
+                    for al_confirmar in callbacks:
+                        al_confirmar()
+                    self._despues_de_confirmar()
+                elif ahora - ultimo_flush >= self.intervalo_flush:
+                    self._vaciar()
+                    ultimo_flush = ahora
+            except Exception as e:
+                # Se guarda el error para los workers y se sigue vaciando la cola para no dejarlos bloqueados.
+                self._error = self._error or e
+
+    @abc.abstractmethod
+    def _escribir_lote(self, lote):
+        """Escribe las filas (tuplas) del lote en el destino."""
+
+    def _vaciar(self):
+        pass
+
+    def _sincronizar(self):
+        pass
+
+    def _despues_de_confirmar(self):
+        pass
+
+    def cerrar(self):
+        """Escribe lo pendiente, sincroniza y termina el hilo escritor."""
+        self._cola.put(_FIN)
+        self._hilo.join()
+        if self._error is not None:
+            raise RuntimeError(f"El escritor de '{self.nombre}' falló") from self._error
+
+class EscritorCSV(EscritorEnHilo):
+    def __init__(self, csvfile, fieldnames, tamanio_cola=1000, filas_por_lote=5000, intervalo_flush=2.0):
+        self.csvfile = csvfile
+        self._writer = csv.writer(csvfile)
+        super().__init__(csvfile.name, fieldnames, tamanio_cola, filas_por_lote, intervalo_flush)
+
+    def _escribir_lote(self, lote):
+        self._writer.writerows(lote)
+
+    def _vaciar(self):
+        self.csvfile.flush()
+
+    def _sincronizar(self):
+        self.csvfile.flush()
+        os.fsync(self.csvfile.fileno())
@@ -0,0 +1,108 @@
+from bs4 import BeautifulSoup
+
+from registros import Comentario, DocenteCenso, VotoDocente, VotoMateria
+
+# --- Extractores sobre la página de una materia ---
+# Cada extractor recibe el árbol ya parseado de la página de (periodo, materia) y un
+# contexto con 'periodo', 'materia_codigo' y 'materia_nombre', y devuelve la lista de
+# registros listos para escribir en su CSV. Así una sola descarga alimenta a todos.
+# Los registros son los objetos compactos de registros.py (registro['columna'] da el texto).
+
+def parsear_pagina(html):
+    return BeautifulSoup(html, 'lxml')
+
+def limpiar_nombre_materia(materia_texto):
+    """Quita el sufijo entre paréntesis del nombre de la materia (p. ej. el código)."""
+    return materia_texto.split('(')[0].strip()
+
+def _extraer_bloque_encuesta(titulo, titulo_corte=None):
+    """Recorre los pares pregunta/tabla que siguen a un título <h3> hasta el siguiente bloque."""
+    resultados = []
+    for elemento in titulo.find_next_siblings():
+        if elemento.name == 'h3' and (titulo_corte is None or titulo_corte in elemento.text):
+            break # Detenerse si se encuentra el siguiente título
+        if elemento.name == 'div' and 'd-flex' in elemento.get('class', []):
+            pregunta_tag = elemento.find('h5')
+            if not pregunta_tag: continue
+            pregunta_texto = pregunta_tag.text.strip()
+            tabla = elemento.find_next_sibling('table', class_='table')
+            if not tabla: continue
+            cabeceras = [th.text.strip() for th in tabla.find('thead').find_all('th')]
+            valores = [td.text.strip() for td in tabla.find('tbody').find_all('td')]
+            if len(cabeceras) == len(valores):
+                for i in range(len(cabeceras)):
+                    resultados.append((pregunta_texto, cabeceras[i], valores[i]))
+    return resultados
+
+def extraer_encuesta_materia(soup, contexto):
+    titulo_materia = soup.find('h3', string='Respuestas sobre la materia')
+    if not titulo_materia: return []
+    return [VotoMateria(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], pregunta, opcion, votos)
+            for pregunta, opcion, votos in _extraer_bloque_encuesta(titulo_materia)]
+
+def extraer_encuesta_docente(soup, contexto):
+    """Extrae el bloque 'Respuestas sobre el docente' de la página de (periodo, materia, docente)."""
+    titulo_docente = soup.find('h3', string='Respuestas sobre el docente')
+    if not titulo_docente: return []
+    return [VotoDocente(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], contexto['docente'], pregunta, opcion, votos)
+            for pregunta, opcion, votos in _extraer_bloque_encuesta(titulo_docente, "Respuestas sobre la materia")]
+
+def extraer_comentarios(soup, contexto):
+    tabla = soup.find('table', id='tblComent')
+    if not tabla: return []
+    materia_nombre = limpiar_nombre_materia(contexto['materia_nombre'])
+    resultados_comentarios = []
+    for fila in tabla.find_all('tr')[1:]:
+        celdas = fila.find_all('td')
+        if len(celdas) == 2:
+            comision = celdas[0].text.strip()
+            comentario = celdas[1].text.strip()
+            if comentario:
+                resultados_comentarios.append(Comentario(contexto['periodo'], contexto['materia_codigo'], materia_nombre, comision, comentario))
+    return resultados_comentarios
+
+def extraer_periodos(soup):
+    """Opciones del selector de periodos (página inicial), descartando los valores con '/'."""
+    selector = soup.find('select', {'name': 'anioSem'})
+    if not selector: return None
+    return {opt.get('value'): opt.text.strip() for opt in selector.find_all('option') if opt.get('value') and '/' not in opt.get('value')}
+
+def extraer_opciones_select(soup, nombre):
+    """Devuelve {value: texto} de las opciones de un <select>, salteando la primera (placeholder)."""
+    selector = soup.find('select', {'name': nombre})
+    if not selector: return None
+    return {opt.get('value'): opt.text.strip() for opt in selector.find_all('option')[1:] if opt.get('value')}
+
+def separar_nombre_y_rango(value):
+    """Separa 'Apellido, Nombre (Rango)' en ('Apellido, Nombre', 'Rango')."""
+    nombre, rango = value.strip(), "No especificado"
+    if value.strip().endswith(')'):
+        partes = value.strip().rsplit('(', 1)
+        if len(partes) == 2:
+            nombre = partes[0].strip()
+            rango = partes[1][:-1].strip()
+    return nombre, rango
+
+def extraer_censo_docentes(soup, contexto):
+    selector_docente = soup.find('select', {'name': 'docente'})
+    if not selector_docente: return []
+    info_docentes_materia = []
+    for option in selector_docente.find_all('option')[1:]:
+        value = option.get('value')
+        if not value: continue
+        nombre, rango = separar_nombre_y_rango(value)
+        info_docentes_materia.append(DocenteCenso(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], nombre, rango))
+    return info_docentes_materia
+
+# --- Registro de salidas: nombre -> (archivo, columnas, extractor) ---
+SALIDAS_MATERIA = {
+    'materia': ('resultados_encuestas_multihilo.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'pregunta', 'opcion_respuesta', 'cantidad_votos'], extraer_encuesta_materia),
+    'comentarios': ('comentarios_encuestas.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'comision', 'comentario'], extraer_comentarios),
+    'censo': ('censo_docentes_multihilo.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'docente_nombre', 'docente_rango'], extraer_censo_docentes),
+}
+SALIDA_DOCENTE = ('resultados_por_docente.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'docente', 'pregunta', 'opcion_respuesta', 'cantidad_votos'], extraer_encuesta_docente)
+
+def codificacion_salida(nombre_archivo):
+    """Codificación con la que se escribe cada CSV: utf-8-sig (con BOM, para Excel), salvo
+    resultados_por_docente.csv, que multithread_profesor.py siempre escribió en utf-8."""
+    return 'utf-8' if nombre_archivo == SALIDA_DOCENTE[0] else 'utf-8-sig'
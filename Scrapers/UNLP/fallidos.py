@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import time
+
+import instrumentacion
+
+# --- Cola de unidades fallidas (dead-letter) ---
+# Las unidades (materia o docente) que siguen fallando después de agotar los reintentos se
+# anotan en 'fallidos.jsonl', una línea JSON por unidad con lo necesario para volver a pedirla:
+#   {"tipo": "materia" | "docente", "datasets": [...], "periodo_value", "periodo_texto",
+#    "materia_value", "materia_texto", "docente_value", "error", "fecha"}
+# `multithread_unificado.py --fallidos` procesa sólo esas unidades; lo que vuelva a fallar
+# queda anotado de nuevo en un 'fallidos.jsonl' nuevo; las que se están reprocesando esperan en
+# 'fallidos.jsonl.pendientes' hasta que la corrida termina. En el crawl distribuido la cola de trabajo
+# (cola_trabajo.py) se suscribe con avisar_fallidos() para marcar la unidad como fallida.
+
+ARCHIVO_FALLIDOS = 'fallidos.jsonl'
+
+_lock = threading.Lock()
+_config = {'ruta': ARCHIVO_FALLIDOS, 'cantidad': 0, 'aviso': None}
+
+def configurar_fallidos(ruta):
+    _config['ruta'] = ruta
+
+def avisar_fallidos(funcion):
+    """`funcion(registro)` se llama con cada unidad anotada, después de escribirla."""
+    _config['aviso'] = funcion
+
+def registrar_fallido(tipo, datasets, periodo_value, periodo_texto, materia_value, materia_texto, error, docente_value=None):
+    """Anota una unidad que falló definitivamente (se escribe y sincroniza en el acto, por si el proceso muere)."""
+    registro = {'tipo': tipo, 'datasets': list(datasets), 'periodo_value': periodo_value, 'periodo_texto': periodo_texto,
+                'materia_value': materia_value, 'materia_texto': materia_texto, 'docente_value': docente_value,
+                'error': f"{type(error).__name__}: {error}", 'fecha': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with _lock:
+        with open(_config['ruta'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        _config['cantidad'] += 1
+    instrumentacion.contar('unidades_fallidas', tipo=tipo)
+    if _config['aviso'] is not None:
+        _config['aviso'](registro)
+
+def cantidad_fallidos():
+    """Unidades anotadas como fallidas en esta corrida."""
+    return _config['cantidad']
+
+def _leer_unidades(ruta, unidades):
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue # línea truncada por un corte abrupto
+            clave = (registro['tipo'], registro['periodo_value'], registro['materia_value'], registro.get('docente_value'))
+            if clave in unidades:
+                unidades[clave]['datasets'] = sorted(set(unidades[clave]['datasets']) | set(registro['datasets']))
+            else:
+                unidades[clave] = registro
+
+def tomar_fallidos(ruta=None):
+    """Lee las unidades fallidas y las pasa a '<ruta>.pendientes' (unidas con las de una corrida --fallidos
+    anterior que se haya cortado), para que esta corrida anote en <ruta> sólo lo que vuelva a fallar.
+    Las pendientes se conservan hasta retirar_fallidos(): si la corrida se corta, no se pierde ninguna.
+    Las unidades repetidas se unen (datasets incluidos)."""
+    ruta = ruta or _config['ruta']
+    pendientes = ruta + '.pendientes'
+    unidades = {}
+    for archivo in (pendientes, ruta):
+        if os.path.exists(archivo):
+            _leer_unidades(archivo, unidades)
+    if os.path.exists(ruta):
+        temporal = pendientes + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(registro, ensure_ascii=False) + '\n' for registro in unidades.values())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, pendientes)
+        os.remove(ruta)
+    return list(unidades.values())
+
+def retirar_fallidos(ruta=None):
+    """Al terminar una corrida --fallidos: las unidades reprocesadas quedan como '<ruta>.anterior'
+    (lo que volvió a fallar ya está anotado de nuevo en <ruta>)."""
+    ruta = ruta or _config['ruta']
+    if os.path.exists(ruta + '.pendientes'):
+        os.replace(ruta + '.pendientes', ruta + '.anterior')
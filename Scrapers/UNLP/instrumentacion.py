@@ -0,0 +1,205 @@
+import atexit
+import bisect
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Instrumentación: tiempos por etapa, contadores, niveles de log y perfilador ---
+# Los scrapers y la consolidación registran acá, con muy poco costo, cuánto tarda cada etapa:
+#   scraping       conexion (DNS + TCP/TLS), dns (sólo motor async), espera_tasa (controlador de tasa),
+#                  peticion (envío hasta tener la respuesta completa), parseo, extraccion,
+#                  espera_cola (worker bloqueado porque la cola del escritor está llena),
+#                  escritura (un lote del escritor) y sincronizacion (flush + fsync)
+#   consolidación  carga, particion (streaming), agrupado, cruce (docentes con el censo), armado,
+#                  serializacion (JSON) y volcado (escritura del archivo)
+# y contadores: paginas, bytes, respuestas por estado, reintentos por motivo, filas por destino y
+# unidades fallidas por tipo. Al terminar se exportan como resumen JSON y como archivo de texto de
+# Prometheus (<base>.json y <base>.prom, p. ej. para el textfile collector de node_exporter).
+# Opcionalmente, un perfilador por muestreo guarda las pilas de todos los hilos en <base>.folded
+# (formato de flamegraph.pl / speedscope).
+#
+# Se activa con --metricas BASE [--perfil] en multithread_unificado.py y JuntarCSV.py, o en
+# cualquier scraper con las variables ENCUESTAS_METRICAS=BASE y ENCUESTAS_PERFIL=1.
+#
+# Los mensajes por unidad (materia o docente procesado, salteado, con error) van por el logger
+# 'encuestas' en lugar de print: con ENCUESTAS_LOG=WARNING (o --log-nivel) se silencian, que a
+# mucha concurrencia la consola sola ya frena a los scrapers. Por defecto (INFO) se ve lo mismo
+# que antes salvo el aviso de inicio de cada unidad, que quedó en DEBUG.
+
+# Límites superiores (segundos) de los buckets del histograma de cada etapa.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --- Niveles de log ---
+log = logging.getLogger('encuestas')
+if not log.handlers:
+    _manejador = logging.StreamHandler(sys.stdout)
+    _manejador.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(_manejador)
+    log.propagate = False
+    log.setLevel(os.environ.get('ENCUESTAS_LOG', 'INFO').upper())
+
+def configurar_log(nivel):
+    log.setLevel(nivel.upper())
+
+# --- Métricas ---
+class Metricas:
+    """Contadores con etiquetas e histogramas de duración por etapa, seguros entre hilos."""
+    def __init__(self):
+        self.inicio = time.time()
+        self.contadores = {}
+        self.etapas = {}
+        self._lock = threading.Lock()
+
+    def contar(self, nombre, cantidad=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + cantidad
+
+    def registrar(self, etapa, segundos):
+        with self._lock:
+            medida = self.etapas.get(etapa)
+            if medida is None:
+                # [cantidad, total, máximo, conteo por bucket (el último es +Inf)]
+                medida = self.etapas[etapa] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+            medida[0] += 1
+            medida[1] += segundos
+            medida[2] = max(medida[2], segundos)
+            medida[3][bisect.bisect_left(BUCKETS, segundos)] += 1
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def _percentil(self, buckets, cantidad, q):
+        """Cota superior del bucket donde cae el percentil q (en ms; None si cae en +Inf)."""
+        acumulado = 0
+        for limite, n in zip(BUCKETS, buckets):
+            acumulado += n
+            if acumulado >= q * cantidad: return limite * 1000
+        return None
+
+    def resumen(self):
+        with self._lock:
+            contadores = dict(self.contadores)
+            etapas = {etapa: (n, total, maximo, list(buckets)) for etapa, (n, total, maximo, buckets) in self.etapas.items()}
+        return {
+            'trabajo': _trabajo(),
+            'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.inicio)),
+            'duracion_s': round(time.time() - self.inicio, 3),
+            'contadores': {nombre + ''.join(f'[{k}={v}]' for k, v in etiquetas): valor for (nombre, etiquetas), valor in sorted(contadores.items())},
+            'etapas': {etapa: {'cantidad': n, 'total_s': round(total, 4), 'media_ms': round(total / n * 1000, 3), 'max_ms': round(maximo * 1000, 3),
+                               'p50_ms': self._percentil(buckets, n, 0.5), 'p99_ms': self._percentil(buckets, n, 0.99)}
+                       for etapa, (n, total, maximo, buckets) in etapas.items()},
+        }
+
+    def prometheus(self):
+        """Las métricas en el formato de texto de Prometheus, con la etiqueta trabajo=<script>."""
+        trabajo = _trabajo()
+        def etiquetas(pares):
+            return '{' + ','.join(f'{k}="{str(v)}"' for k, v in (('trabajo', trabajo),) + tuple(pares)) + '}'
+        with self._lock:
+            contadores = sorted(self.contadores.items())
+            etapas = sorted((etapa, (n, total, list(buckets))) for etapa, (n, total, _, buckets) in self.etapas.items())
+        lineas = ['# TYPE encuestas_duracion_segundos gauge', f'encuestas_duracion_segundos{etiquetas(())} {time.time() - self.inicio:.3f}']
+        for nombre in sorted({nombre for (nombre, _), _ in contadores}):
+            lineas.append(f'# TYPE encuestas_{nombre}_total counter')
+            lineas += [f'encuestas_{nombre}_total{etiquetas(pares)} {valor}' for (otro, pares), valor in contadores if otro == nombre]
+        if etapas:
+            lineas.append('# TYPE encuestas_etapa_segundos histogram')
+        for etapa, (n, total, buckets) in etapas:
+            acumulado = 0
+            for limite, cantidad in zip(BUCKETS + ('+Inf',), buckets):
+                acumulado += cantidad
+                lineas.append(f'encuestas_etapa_segundos_bucket{etiquetas((("etapa", etapa), ("le", limite)))} {acumulado}')
+            lineas.append(f'encuestas_etapa_segundos_sum{etiquetas((("etapa", etapa),))} {total:.6f}')
+            lineas.append(f'encuestas_etapa_segundos_count{etiquetas((("etapa", etapa),))} {n}')
+        return '\n'.join(lineas) + '\n'
+
+    def texto_etapas(self):
+        """Una línea por etapa para mostrar al final de una corrida."""
+        return '\n'.join(f"  {etapa:<14} {e['cantidad']:>7} x  total {e['total_s']:>9.3f} s  media {e['media_ms']:>9.3f} ms  máx {e['max_ms']:>9.1f} ms"
+                         for etapa, e in self.resumen()['etapas'].items())
+
+def _trabajo():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+METRICAS = Metricas()
+contar = METRICAS.contar
+registrar = METRICAS.registrar
+medir = METRICAS.medir
+
+def _escribir_atomico(ruta, texto):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(temporal, ruta)
+
+def exportar(base):
+    """Escribe <base>.json y <base>.prom con el estado actual de las métricas."""
+    _escribir_atomico(base + '.json', json.dumps(METRICAS.resumen(), ensure_ascii=False, indent=2))
+    _escribir_atomico(base + '.prom', METRICAS.prometheus())
+
+# --- Perfilador por muestreo ---
+class PerfiladorMuestreo:
+    """Cada `intervalo` segundos toma la pila de todos los hilos (sys._current_frames) y cuenta las
+    pilas plegadas ('hilo;modulo:funcion;...'). Es tiempo de reloj: también muestra las esperas."""
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.muestras = collections.Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name='perfilador', daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            # Los hilos de un pool se agrupan por el nombre sin su número ('ThreadPoolExecutor-0_3' -> 'ThreadPoolExecutor').
+            nombres = {hilo.ident: re.sub(r'[-_\d]+$', '', hilo.name) for hilo in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == propio: continue
+                pila = []
+                while frame is not None:
+                    pila.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                pila.append(nombres.get(ident, 'hilo'))
+                self.muestras[';'.join(reversed(pila))] += 1
+
+    def detener(self, ruta):
+        self._detener.set()
+        self._hilo.join()
+        _escribir_atomico(ruta, ''.join(f"{pila} {n}\n" for pila, n in self.muestras.most_common()))
+
+# --- Activación (banderas o variables de entorno) ---
+_activo = {'base': None, 'perfilador': None}
+
+def activar(base, perfil=False):
+    """Exporta las métricas a <base>.json / <base>.prom al terminar el proceso (y el perfil a <base>.folded)."""
+    if _activo['base'] is None:
+        atexit.register(_al_terminar)
+    _activo['base'] = base
+    if perfil and _activo['perfilador'] is None:
+        _activo['perfilador'] = PerfiladorMuestreo().iniciar()
+
+def activar_desde_entorno():
+    if os.environ.get('ENCUESTAS_METRICAS') and _activo['base'] is None:
+        activar(os.environ['ENCUESTAS_METRICAS'], perfil=os.environ.get('ENCUESTAS_PERFIL', '') not in ('', '0'))
+
+def _al_terminar():
+    base = _activo['base']
+    if _activo['perfilador'] is not None:
+        _activo['perfilador'].detener(base + '.folded')
+    exportar(base)
+    print(f"Métricas exportadas en '{base}.json' y '{base}.prom'" + (f" (perfil en '{base}.folded')" if _activo['perfilador'] else '') + '.')
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from registros import como_dict
+
+# --- Manifiesto del crawl incremental ---
+# Recuerda, entre corridas, qué se vio del sitio: las materias de cada periodo y, por materia,
+# una huella de su contenido y la lista de docentes.
+#   {"periodos": {"20231": {"texto": "...", "materias": {"E0201": {"texto": "...", "huella": "...",
+#                                                                   "docentes": [...], "fecha": "..."}}}}}
+# La huella es el SHA-256 de los registros extraídos (no del HTML crudo), así que no cambia por
+# detalles de maquetado que no afectan a los datos (ni por la representación en memoria de los registros).
+
+ARCHIVO_MANIFIESTO = 'manifiesto_crawl.json'
+
+def hash_contenido(*partes):
+    return hashlib.sha256(json.dumps(partes, ensure_ascii=False, sort_keys=True, default=como_dict).encode('utf-8')).hexdigest()
+
+class ManifiestoCrawl:
+    def __init__(self, ruta=ARCHIVO_MANIFIESTO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self.periodos = {}
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                self.periodos = json.load(f).get('periodos', {})
+
+    def materias(self, periodo_value):
+        """Materias conocidas del periodo ({cod: texto}), o None si el periodo nunca se recorrió."""
+        periodo = self.periodos.get(periodo_value)
+        if periodo is None: return None
+        return {cod: materia['texto'] for cod, materia in periodo['materias'].items()}
+
+    def huella_materia(self, periodo_value, materia_value):
+        return self.periodos.get(periodo_value, {}).get('materias', {}).get(materia_value, {}).get('huella')
+
+    def registrar_periodo(self, periodo_value, periodo_texto, materias):
+        with self._lock:
+            periodo = self.periodos.setdefault(periodo_value, {'texto': periodo_texto, 'materias': {}})
+            periodo['texto'] = periodo_texto
+            for cod, texto in materias.items():
+                periodo['materias'].setdefault(cod, {})['texto'] = texto
+
+    def registrar_materia(self, periodo_value, periodo_texto, materia_value, materia_texto, huella, docentes):
+        with self._lock:
+            periodo = self.periodos.setdefault(periodo_value, {'texto': periodo_texto, 'materias': {}})
+            periodo['materias'][materia_value] = {'texto': materia_texto, 'huella': huella, 'docentes': list(docentes),
+                                                  'fecha': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+    def guardar(self):
+        """Escribe el manifiesto atómicamente. Llamar al final de la corrida, con los CSV ya consistentes."""
+        with self._lock:
+            temporal = self.ruta + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'periodos': self.periodos}, f, ensure_ascii=False, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
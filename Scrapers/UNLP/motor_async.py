@@ -0,0 +1,186 @@
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from requests.utils import get_encoding_from_headers
+
+import instrumentacion
+import sesiones
+from fallidos import registrar_fallido
+from reintentos import ESTADOS_REINTENTABLES, segundos_retry_after
+import parser_rapido
+from instrumentacion import log
+from navegacion import URL, HEADERS
+
+# --- Motor asíncrono ---
+# Recorre periodo -> materia -> docente con un solo hilo y un event loop. La cantidad de
+# peticiones en vuelo la acota un semáforo (y el límite del conector), no un pool de hilos,
+# así que se pueden mantener cientos de peticiones abiertas con muy poca memoria.
+# Los tiempos de DNS y de apertura de conexiones salen de las trazas de aiohttp (ver _trazas()).
+
+_controlador = None
+_parser = parser_rapido
+
+async def _descargar_red(sesion, payload, timeout):
+    # Misma política de reintentos que el motor de hilos (ver sesiones._enviar_red).
+    politica = sesiones.obtener_politica_reintentos()
+    intento = 0
+    while True:
+        retry_after = None
+        try:
+            return await _descargar_una_vez(sesion, payload, timeout)
+        except asyncio.TimeoutError:
+            motivo = 'timeout'
+            if not politica.reintentar(motivo, intento): raise
+        except aiohttp.ClientConnectionError:
+            motivo = 'conexion'
+            if not politica.reintentar(motivo, intento): raise
+        except aiohttp.ClientResponseError as e:
+            motivo = 'servidor' if e.status in ESTADOS_REINTENTABLES else None
+            if not politica.reintentar(motivo, intento): raise
+            retry_after = segundos_retry_after((e.headers or {}).get('Retry-After'))
+        espera = politica.espera(motivo, intento, retry_after)
+        intento += 1
+        instrumentacion.contar('reintentos', motivo=motivo)
+        log.info("      [Reintento %d] %s en %s; esperando %.1fs...", intento, motivo, payload, espera)
+        await asyncio.sleep(espera)
+
+async def _descargar_una_vez(sesion, payload, timeout):
+    controlador = _controlador
+    if controlador is not None:
+        espera = time.monotonic()
+        await controlador.adquirir_async()
+        instrumentacion.registrar('espera_tasa', time.monotonic() - espera)
+    inicio = time.monotonic()
+    try:
+        async with sesion.post(URL, data=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            instrumentacion.contar('respuestas', estado=response.status)
+            if controlador is not None:
+                pausa = segundos_retry_after(response.headers.get('Retry-After')) if response.status in ESTADOS_REINTENTABLES else None
+                if pausa is not None: pausa = min(pausa, sesiones.obtener_politica_reintentos().tope_retry_after)
+                controlador.registrar(time.monotonic() - inicio, response.status, pausa=pausa)
+            response.raise_for_status()
+            contenido = await response.read()
+            instrumentacion.contar('paginas')
+            instrumentacion.contar('bytes', len(contenido))
+            return response.status, get_encoding_from_headers(response.headers), contenido
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        if controlador is not None:
+            controlador.registrar(timeout=True)
+        raise
+    finally:
+        instrumentacion.registrar('peticion', time.monotonic() - inicio)
+        if controlador is not None:
+            controlador.liberar()
+
+async def _descargar(sesion, semaforo, payload, timeout):
+    # Mismo archivo de páginas que el motor de hilos (ver sesiones.configurar_archivo). Sus lecturas y
+    # escrituras (SQLite, compresión, blobs) van a un hilo para no frenar las demás peticiones del event loop.
+    archivo, modo = sesiones.obtener_archivo(), sesiones.obtener_modo_archivo()
+    if archivo is not None and modo in ('reproducir', 'offline'):
+        archivada = await asyncio.to_thread(archivo.obtener, URL, payload)
+        if archivada is not None:
+            return archivada.content.decode('utf-8')
+        if modo == 'offline':
+            raise aiohttp.ClientConnectionError(f"Página no archivada (modo offline): {payload}")
+    async with semaforo:
+        estado, encoding, contenido = await _descargar_red(sesion, payload, timeout)
+    if archivo is not None:
+        await asyncio.to_thread(archivo.guardar, URL, payload, estado, encoding, contenido)
+    return contenido.decode('utf-8')
+
+async def _procesar_docente(sesion, semaforo, contexto, periodo_value, docente_value, salida_docente):
+    extractor, escritor, diario = salida_docente
+    try:
+        payload = {'anioSem': periodo_value, 'cod': contexto['materia_codigo'], 'docente': docente_value}
+        html = await _descargar(sesion, semaforo, payload, 20)
+        with instrumentacion.medir('parseo'):
+            arbol = _parser.parsear_pagina(html)
+        with instrumentacion.medir('extraccion'):
+            registros = extractor(arbol, dict(contexto, docente=docente_value))
+        escritor.escribir_registros(registros, al_confirmar=lambda: diario.marcar((contexto['periodo'], contexto['materia_codigo'], docente_value)))
+        if registros:
+            log.info("      [Async] ¡Éxito! Guardados %d registros para '%s'", len(registros), docente_value)
+        return True
+    except Exception as e:
+        # Cualquier error (red, parseo, escritor) queda en esta unidad, como en el motor de hilos: no cancela el resto.
+        log.warning("      [Async] ERROR procesando docente '%s': %r", docente_value, e)
+        registrar_fallido('docente', ['docente'], periodo_value, contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], e, docente_value)
+        return False
+
+async def _procesar_materia(sesion, semaforo, periodo_value, periodo_texto, materia_value, materia_texto, salidas, salida_docente):
+    clave = (periodo_texto, materia_value)
+    pendientes = {nombre: salida for nombre, salida in salidas.items() if not salida[2].completado(clave)}
+    if not pendientes and (not salida_docente or salida_docente[2].completado(clave + ('*',))):
+        log.info("    [Async] Ya completada, se saltea: '%s'", materia_texto)
+        return
+    log.debug("    [Async] Procesando materia: '%s'", materia_texto)
+    contexto = {'periodo': periodo_texto, 'materia_codigo': materia_value, 'materia_nombre': materia_texto}
+    try:
+        html = await _descargar(sesion, semaforo, {'anioSem': periodo_value, 'cod': materia_value}, 20)
+        with instrumentacion.medir('parseo'):
+            arbol = _parser.parsear_pagina(html)
+        resumen = []
+        for nombre, (extractor, escritor, diario) in pendientes.items():
+            with instrumentacion.medir('extraccion'):
+                registros = extractor(arbol, contexto)
+            escritor.escribir_registros(registros, al_confirmar=lambda diario=diario: diario.marcar(clave))
+            resumen.append(f"{nombre}={len(registros)}")
+        docentes = [d for d in _parser.extraer_opciones_select(arbol, 'docente') or {} if not salida_docente[2].completado(clave + (d,))] if salida_docente else []
+    except Exception as e:
+        log.warning("    [Async] ERROR procesando '%s': %r", materia_texto, e)
+        registrar_fallido('materia', list(pendientes) + (['docente'] if salida_docente else []), periodo_value, periodo_texto, materia_value, materia_texto, e)
+        return
+    log.info("    [Async] ¡Éxito! '%s': %s", materia_texto, ', '.join(resumen))
+    if salida_docente:
+        _, escritor_docente, diario_docente = salida_docente
+        # _procesar_docente no lanza excepciones: cada docente que falla queda anotado en fallidos.jsonl.
+        resultados = await asyncio.gather(*(_procesar_docente(sesion, semaforo, contexto, periodo_value, docente_value, salida_docente) for docente_value in docentes))
+        if all(resultados):
+            # Va por la cola del escritor para quedar detrás de las filas de esos docentes.
+            escritor_docente.escribir([], al_confirmar=lambda: diario_docente.marcar(clave + ('*',)))
+
+async def _procesar_periodo(sesion, semaforo, periodo_value, periodo_texto, salidas, salida_docente):
+    print(f"  2. Obteniendo materias para el periodo '{periodo_texto}'...")
+    try:
+        html = await _descargar(sesion, semaforo, {'anioSem': periodo_value}, 15)
+        materias = _parser.extraer_opciones_select(_parser.parsear_pagina(html), 'cod')
+    except Exception as e:
+        print(f"  -> ERROR al obtener materias para {periodo_value}: {e!r}")
+        return
+    if not materias: return
+    print(f"\n---> Iniciando scraping asíncrono para {len(materias)} materias de '{periodo_texto}'...")
+    await asyncio.gather(*(_procesar_materia(sesion, semaforo, periodo_value, periodo_texto, mat_val, mat_txt, salidas, salida_docente) for mat_val, mat_txt in materias.items()))
+    print(f"---> Finalizado el scraping para el periodo '{periodo_texto}'.\n")
+
+def _trazas():
+    """Trazas de aiohttp que registran la resolución DNS y la apertura de cada conexión."""
+    trazas = aiohttp.TraceConfig()
+    for etapa, inicio, fin in (('dns', trazas.on_dns_resolvehost_start, trazas.on_dns_resolvehost_end),
+                               ('conexion', trazas.on_connection_create_start, trazas.on_connection_create_end)):
+        async def al_iniciar(sesion, contexto, parametros, etapa=etapa):
+            setattr(contexto, etapa, time.monotonic())
+        async def al_terminar(sesion, contexto, parametros, etapa=etapa):
+            instrumentacion.registrar(etapa, time.monotonic() - getattr(contexto, etapa))
+        inicio.append(al_iniciar)
+        fin.append(al_terminar)
+    return trazas
+
+async def _crawl(periodos_a_procesar, salidas, salida_docente, max_concurrencia):
+    semaforo = asyncio.Semaphore(max_concurrencia)
+    conector = aiohttp.TCPConnector(limit=max_concurrencia, keepalive_timeout=30)
+    async with aiohttp.ClientSession(headers=HEADERS, connector=conector, trace_configs=[_trazas()]) as sesion:
+        await asyncio.gather(*(_procesar_periodo(sesion, semaforo, periodo_value, periodo_texto, salidas, salida_docente) for periodo_value, periodo_texto in periodos_a_procesar.items()))
+
+def crawl_async(periodos_a_procesar, salidas, salida_docente=None, max_concurrencia=100, controlador=None, parser=parser_rapido):
+    """Punto de entrada síncrono del motor asíncrono. `salidas` y `salida_docente` usan el mismo formato que el motor de hilos."""
+    global _controlador, _parser
+    if aiohttp is None:
+        raise RuntimeError("El motor asíncrono requiere 'aiohttp' (pip install aiohttp).")
+    _controlador = controlador
+    _parser = parser
+    asyncio.run(_crawl(periodos_a_procesar, salidas, salida_docente, max_concurrencia))
@@ -1,121 +1,90 @@
-import requests
 from bs4 import BeautifulSoup
-import csv
-import time
-import os
 import concurrent.futures
-import threading
 
-# --- Configuración ---
-URL = "https://www1.ing.unlp.edu.ar/sitio/encuestas/index.php" # URL completa y correcta
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Referer': URL
-}
-# La sesión es crucial para que el servidor recuerde el contexto entre peticiones
-session = requests.Session()
-session.headers.update(HEADERS)
+import instrumentacion
+from instrumentacion import log
+import sesiones
+from diario import abrir_csv_reanudable, deduplicar_csv
+from escritor import EscritorCSV
+from fallidos import registrar_fallido, cantidad_fallidos, ARCHIVO_FALLIDOS
+from navegacion import URL, HEADERS, obtener_periodos, obtener_materias_por_periodo, seleccionar_periodo_a_procesar
+from extractores import codificacion_salida
+from parser_rapido import parsear_pagina, extraer_encuesta_docente
 
 # --- Funciones de Obtención de Datos ---
 
-def obtener_periodos():
-    print("1. Obteniendo la lista de periodos...")
-    try:
-        response = session.get(URL)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml')
-        selector_periodo = soup.find('select', {'name': 'anioSem'})
-        if not selector_periodo: return None
-        periodos = {opt.get('value'): opt.text.strip() for opt in selector_periodo.find_all('option') if opt.get('value') and '/' not in opt.get('value')}
-        print(f"-> Encontrados {len(periodos)} periodos válidos.")
-        return periodos
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR al obtener periodos: {e}")
-        return None
-
-def obtener_materias_por_periodo(periodo_value, periodos_dict):
-    print(f"  2. Obteniendo materias para el periodo '{periodos_dict.get(periodo_value)}'...")
-    try:
-        payload = {'anioSem': periodo_value}
-        response = session.post(URL, data=payload, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml')
-        selector_materia = soup.find('select', {'name': 'cod'})
-        if not selector_materia: return None
-        materias = {opt.get('value'): opt.text.strip() for opt in selector_materia.find_all('option')[1:] if opt.get('value')}
-        print(f"  -> Encontradas {len(materias)} materias.")
-        return materias
-    except requests.exceptions.RequestException as e:
-        print(f"  -> ERROR al obtener materias para {periodo_value}: {e}")
-        return None
-
-def obtener_docentes_por_materia(periodo_value, materia_value, materia_texto):
+def obtener_docentes_por_materia(periodo_value, materia_value, materia_texto, periodo_texto=None):
     """Obtiene la lista de docentes para una materia específica."""
-    print(f"    3. Obteniendo docentes para la materia '{materia_texto}'...")
+    log.debug("    3. Obteniendo docentes para la materia '%s'...", materia_texto)
     try:
         payload = {'anioSem': periodo_value, 'cod': materia_value}
-        response = session.post(URL, data=payload, timeout=15)
+        response = sesiones.post(URL, data=payload, timeout=15)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'lxml')
         selector_docente = soup.find('select', {'name': 'docente'})
         if not selector_docente:
-            print(f"    -> No se encontró selector de docentes para '{materia_texto}'.")
+            log.info("    -> No se encontró selector de docentes para '%s'.", materia_texto)
             return None
         docentes = {opt.get('value'): opt.text.strip() for opt in selector_docente.find_all('option')[1:] if opt.get('value')}
-        print(f"    -> Encontrados {len(docentes)} docentes.")
+        log.info("    -> Encontrados %d docentes.", len(docentes))
         return docentes
-    except requests.exceptions.RequestException as e:
-        print(f"    -> ERROR al obtener docentes para {materia_texto}: {e}")
+    except Exception as e:
+        log.warning("    -> ERROR al obtener docentes para %s: %r", materia_texto, e)
+        registrar_fallido('materia', ['docente'], periodo_value, periodo_texto, materia_value, materia_texto, e)
         return None
 
 # --- Función "Worker" para Multithreading ---
 
 def worker_scrape_docente(params):
     """Unidad de trabajo para un solo docente. Realiza la petición final y extrae sus datos."""
-    periodo_value, materia_value, materia_texto, docente_value, docente_texto, periodos_dict, csv_writer, lock = params
-    print(f"      [Thread] Iniciando scraping para docente: '{docente_value}' en '{materia_texto}'")
+    periodo_value, materia_value, materia_texto, docente_value, docente_texto, periodos_dict, escritor, diario, pendientes = params
+    clave_materia = (periodos_dict.get(periodo_value), materia_value)
+    log.debug("      [Thread] Iniciando scraping para docente: '%s' en '%s'", docente_value, materia_texto)
     try:
         payload = {
             'anioSem': periodo_value,
             'cod': materia_value,
             'docente': docente_value
         }
-        response = requests.post(URL, headers=HEADERS, data=payload, timeout=20)
+        response = sesiones.post(URL, data=payload, timeout=20)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml')
-        resultados_docente = []
-        titulo_docente = soup.find('h3', string='Respuestas sobre el docente')
-        if not titulo_docente:
-            return
-        for elemento in titulo_docente.find_next_siblings():
-            if elemento.name == 'h3' and "Respuestas sobre la materia" in elemento.text:
-                break
-            if elemento.name == 'div' and 'd-flex' in elemento.get('class', []):
-                pregunta_tag = elemento.find('h5')
-                if not pregunta_tag: continue
-                pregunta_texto = pregunta_tag.text.strip()
-                tabla = elemento.find_next_sibling('table', class_='table')
-                if not tabla: continue
-                cabeceras = [th.text.strip() for th in tabla.find('thead').find_all('th')]
-                valores = [td.text.strip() for td in tabla.find('tbody').find_all('td')]
-                if len(cabeceras) == len(valores):
-                    for i in range(len(cabeceras)):
-                        resultados_docente.append({
-                            'periodo': periodos_dict.get(periodo_value),
-                            'materia_codigo': materia_value,
-                            'materia_nombre': materia_texto,
-                            'docente': docente_value,
-                            'pregunta': pregunta_texto,
-                            'opcion_respuesta': cabeceras[i],
-                            'cantidad_votos': valores[i]
-                        })
+        with instrumentacion.medir('parseo'):
+            arbol = parsear_pagina(response.text)
+        contexto = {'periodo': periodos_dict.get(periodo_value), 'materia_codigo': materia_value, 'materia_nombre': materia_texto, 'docente': docente_value}
+        with instrumentacion.medir('extraccion'):
+            resultados_docente = extraer_encuesta_docente(arbol, contexto)
+        def confirmar():
+            # Corre en el hilo escritor, con las filas ya en disco (y siempre en ese único hilo).
+            diario.marcar(clave_materia + (docente_value,))
+            pendientes[clave_materia] -= 1
+            if pendientes[clave_materia] == 0:
+                # Todos los docentes de la materia terminados: al reanudar ni siquiera se vuelve a pedir la lista.
+                diario.marcar(clave_materia + ('*',))
+        escritor.escribir_registros(resultados_docente, al_confirmar=confirmar)
         if resultados_docente:
-            with lock:
-                csv_writer.writerows(resultados_docente)
-            print(f"      [Thread] ¡Éxito! Guardados {len(resultados_docente)} registros para '{docente_value}'")
-    except requests.exceptions.RequestException as e:
-        print(f"      [Thread] ERROR procesando docente '{docente_value}': {e}")
-
+            log.info("      [Thread] ¡Éxito! Guardados %d registros para '%s'", len(resultados_docente), docente_value)
+    except Exception as e:
+        # Cualquier error (red, parseo, escritor) va a fallidos.jsonl: si escapara del worker, el pool lo descartaría sin aviso.
+        log.warning("      [Thread] ERROR procesando docente '%s': %r", docente_value, e)
+        registrar_fallido('docente', ['docente'], periodo_value, periodos_dict.get(periodo_value), materia_value, materia_texto, e, docente_value)
+
+def worker_descubrir_docentes(params):
+    """Productor: obtiene los docentes de una materia y los encola en el pool global de docentes."""
+    periodo_value, materia_value, materia_texto, periodos_dict, escritor, diario, pendientes, pool_docentes = params
+    clave_materia = (periodos_dict.get(periodo_value), materia_value)
+    if diario.completado(clave_materia + ('*',)):
+        log.info("    [Thread] Materia ya completada, se saltea: '%s'", materia_texto)
+        return
+    docentes = obtener_docentes_por_materia(periodo_value, materia_value, materia_texto, clave_materia[0])
+    if not docentes: return
+    docentes = {val: txt for val, txt in docentes.items() if not diario.completado(clave_materia + (val,))}
+    pendientes[clave_materia] = len(docentes)
+    if not docentes:
+        escritor.escribir([], al_confirmar=lambda: diario.marcar(clave_materia + ('*',)))
+        return
+    log.info("---> Encolando %d docentes pendientes de '%s'.", len(docentes), materia_texto)
+    for docente_val, docente_txt in docentes.items():
+        pool_docentes.submit(worker_scrape_docente, (periodo_value, materia_value, materia_texto, docente_val, docente_txt, periodos_dict, escritor, diario, pendientes))
 
 # --- Orquestador Principal ---
 
@@ -126,9 +95,8 @@ if __name__ == "__main__":
         'pregunta', 'opcion_respuesta', 'cantidad_votos'
     ]
     MAX_WORKERS = 15
-
-    csv_lock = threading.Lock()
-    file_exists = os.path.isfile(NOMBRE_ARCHIVO)
+    MAX_DESCUBRIDORES = 4
+    sesiones.configurar_pool(MAX_WORKERS + MAX_DESCUBRIDORES, HEADERS)
 
     # --- Lógica de selección de período ---
     periodos = obtener_periodos()
@@ -136,61 +104,33 @@ if __name__ == "__main__":
         print("No se pudieron obtener los periodos. Saliendo del script.")
         exit()
 
-    lista_periodos = list(periodos.items())
-    print("\n--- Selección de Período a Descargar ---")
-    print("[0] Todos los periodos")
-    for i, (valor, texto) in enumerate(lista_periodos, 1):
-        print(f"[{i}] {texto}")
-
-    opcion_elegida = -1
-    while True:
-        try:
-            opcion_str = input("\n> Ingresa el número del periodo que quieres descargar: ")
-            opcion_elegida = int(opcion_str)
-            if 0 <= opcion_elegida <= len(lista_periodos):
-                break
-            else:
-                print(f"ERROR: Opción fuera de rango. Por favor, elige un número entre 0 y {len(lista_periodos)}.")
-        except ValueError:
-            print("ERROR: Entrada no válida. Por favor, ingresa solo un número.")
-
-    periodos_a_procesar = {}
-    if opcion_elegida == 0:
-        periodos_a_procesar = periodos
-        print("\n--> Se procesarán TODOS los periodos.")
-    else:
-        periodo_seleccionado_valor, periodo_seleccionado_texto = lista_periodos[opcion_elegida - 1]
-        periodos_a_procesar = {periodo_seleccionado_valor: periodo_seleccionado_texto}
-        print(f"\n--> Se procesará únicamente el periodo: '{periodo_seleccionado_texto}'")
+    periodos_a_procesar = seleccionar_periodo_a_procesar(periodos)
+    if not periodos_a_procesar: exit()
 
     print("-" * 40)
 
-    with open(NOMBRE_ARCHIVO, 'a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
-        if not file_exists:
-            writer.writeheader()
-
-        for periodo_value, periodo_texto in periodos_a_procesar.items():
-            print(f"\nProcesando periodo: {periodo_texto}...")
-            materias = obtener_materias_por_periodo(periodo_value, periodos)
-            if not materias:
-                continue
-
-            for materia_value, materia_texto in materias.items():
-                time.sleep(0.5)
-                docentes = obtener_docentes_por_materia(periodo_value, materia_value, materia_texto)
-
-                if docentes:
-                    print(f"\n---> Iniciando scraping en paralelo para {len(docentes)} docentes de '{materia_texto}' con {MAX_WORKERS} hilos...")
-
-                    tasks = [
-                        (periodo_value, materia_value, materia_texto, docente_val, docente_txt, periodos, writer, csv_lock)
-                        for docente_val, docente_txt in docentes.items()
-                    ]
-
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                        executor.map(worker_scrape_docente, tasks)
-
-                    print(f"---> Finalizado el scraping para los docentes de '{materia_texto}'.\n")
-
+    csvfile, diario = abrir_csv_reanudable(NOMBRE_ARCHIVO, FIELDNAMES, ['periodo', 'materia_codigo', 'docente'], encoding=codificacion_salida(NOMBRE_ARCHIVO))
+    escritor = EscritorCSV(csvfile, FIELDNAMES)
+    pendientes = {}
+
+    with csvfile:
+        # Pipeline productor/consumidor: los descubridores recorren materias de todos los periodos
+        # y alimentan un único pool de docentes de larga vida, sin barreras entre materias ni periodos.
+        # El pool de descubridores se cierra primero (ya encoló todo) y recién después el de docentes.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool_docentes:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_DESCUBRIDORES) as pool_descubridores:
+                for periodo_value, periodo_texto in periodos_a_procesar.items():
+                    print(f"\nProcesando periodo: {periodo_texto}...")
+                    materias = obtener_materias_por_periodo(periodo_value, periodo_texto)
+                    if not materias:
+                        continue
+                    for materia_value, materia_texto in materias.items():
+                        pool_descubridores.submit(worker_descubrir_docentes, (periodo_value, materia_value, materia_texto, periodos, escritor, diario, pendientes, pool_docentes))
+            print("\n---> Todas las materias descubiertas. Esperando a que terminen los docentes en cola...")
+        escritor.cerrar()
+
+    diario.cerrar()
+    deduplicar_csv(NOMBRE_ARCHIVO, encoding=codificacion_salida(NOMBRE_ARCHIVO))
+    if cantidad_fallidos():
+        print(f"\nATENCIÓN: {cantidad_fallidos()} unidades fallaron tras agotar los reintentos; quedaron en '{ARCHIVO_FALLIDOS}' (reprocesar con multithread_unificado.py --fallidos).")
     print("\n¡Proceso de scraping completado!")
\ No newline at end of file
@@ -0,0 +1,369 @@
+import argparse
+import concurrent.futures
+import os
+import time
+
+import instrumentacion
+import sesiones
+from diario import abrir_csv_reanudable, deduplicar_csv, contar_filas, purgar_filas_previas
+from escritor import EscritorCSV
+from almacen import abrir_salida_sqlite, ARCHIVO_BASE
+from fallidos import registrar_fallido, tomar_fallidos, retirar_fallidos, cantidad_fallidos, avisar_fallidos, ARCHIVO_FALLIDOS
+from cola_trabajo import ColaTrabajo, DiarioCola, clave_unidad, nombre_trabajador, ARCHIVO_COLA, DIRECTORIO_PARCIALES
+from manifiesto import ManifiestoCrawl, hash_contenido, ARCHIVO_MANIFIESTO
+from instrumentacion import log
+from navegacion import URL, HEADERS, obtener_periodos, obtener_materias_por_periodo, seleccionar_periodo_a_procesar, filtrar_periodos
+import extractores
+from extractores import codificacion_salida
+import parser_rapido
+import registros
+
+# Implementaciones de extracción intercambiables (misma interfaz); 'bs4' es la de referencia.
+PARSERS = {'rapido': parser_rapido, 'bs4': extractores}
+PARSER = parser_rapido
+DATASETS = list(parser_rapido.SALIDAS_MATERIA) + ['docente']
+
+# Columnas que identifican una unidad de trabajo en cada diario de progreso (ver diario.py).
+COLUMNAS_UNIDAD_MATERIA = ['periodo', 'materia_codigo']
+COLUMNAS_UNIDAD_DOCENTE = ['periodo', 'materia_codigo', 'docente']
+# Docentes pendientes por (periodo, materia); al llegar a 0 se marca la materia con docente '*'.
+# Sólo lo decrementa el hilo escritor de resultados_por_docente.csv (en los callbacks de confirmación).
+_pendientes_docentes = {}
+# Modo incremental (--incremental): manifiesto de la corrida anterior y (periodo, materia) cuyo
+# contenido cambió y se volvió a escribir; sus filas viejas se purgan al final.
+_manifiesto = None
+_reemplazadas = set()
+# Con --sqlite: ruta de la base (almacen.py) que reemplaza a los CSV como destino.
+_base_sqlite = None
+# Con --cola: cola de trabajo compartida (cola_trabajo.py); los docentes de cada materia se publican en ella.
+_cola = None
+
+# --- Funciones Worker ---
+def worker_scrape_docente_unificado(params):
+    periodo_value, contexto, docente_value, salida_docente = params
+    extractor, escritor, diario = salida_docente
+    clave_materia = (contexto['periodo'], contexto['materia_codigo'])
+    try:
+        payload = {'anioSem': periodo_value, 'cod': contexto['materia_codigo'], 'docente': docente_value}
+        response = sesiones.post(URL, data=payload, timeout=20)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        with instrumentacion.medir('parseo'):
+            arbol = PARSER.parsear_pagina(response.text)
+        with instrumentacion.medir('extraccion'):
+            registros = extractor(arbol, dict(contexto, docente=docente_value))
+        def confirmar():
+            diario.marcar(clave_materia + (docente_value,))
+            # Los docentes reprocesados desde fallidos.jsonl no llevan la cuenta de su materia.
+            if clave_materia in _pendientes_docentes:
+                _pendientes_docentes[clave_materia] -= 1
+                if _pendientes_docentes[clave_materia] == 0:
+                    diario.marcar(clave_materia + ('*',))
+        escritor.escribir_registros(registros, al_confirmar=confirmar)
+        if registros:
+            log.info("      [Thread] ¡Éxito! Guardados %d registros para '%s'", len(registros), docente_value)
+    except Exception as e:
+        # Cualquier error (red, parseo, extractor, escritor) va a fallidos.jsonl: si escapara del worker, el pool lo descartaría sin aviso.
+        log.warning("      [Thread] ERROR procesando docente '%s': %r", docente_value, e)
+        registrar_fallido('docente', ['docente'], periodo_value, contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], e, docente_value)
+
+def worker_scrape_materia_completa(params):
+    """Descarga una sola vez la página de (periodo, materia) y corre todos los extractores sobre ella.
+    Con `revalidar` la descarga aunque ya esté completa, para compararla contra el manifiesto."""
+    periodo_value, periodo_texto, materia_value, materia_texto, salidas, salida_docente, pool_docentes, revalidar = params
+    clave = (periodo_texto, materia_value)
+    pendientes = salidas
+    try:
+        pendientes = {nombre: salida for nombre, salida in salidas.items() if not salida[2].completado(clave)}
+        completa = not pendientes and (not pool_docentes or salida_docente[2].completado(clave + ('*',)))
+        if completa and not revalidar:
+            log.info("    [Thread] Ya completada, se saltea: '%s'", materia_texto)
+            return
+        log.debug("    [Thread] Procesando materia: '%s'", materia_texto)
+        payload = {'anioSem': periodo_value, 'cod': materia_value}
+        response = sesiones.post(URL, data=payload, timeout=20)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        with instrumentacion.medir('parseo'):
+            arbol = PARSER.parsear_pagina(response.text)
+        contexto = {'periodo': periodo_texto, 'materia_codigo': materia_value, 'materia_nombre': materia_texto}
+        forzar = False
+        if _manifiesto is not None:
+            docentes_pagina = list(PARSER.extraer_opciones_select(arbol, 'docente') or {})
+            huella = hash_contenido({nombre: extractor(arbol, contexto) for nombre, (_, _, extractor) in PARSER.SALIDAS_MATERIA.items()}, docentes_pagina)
+            anterior = _manifiesto.huella_materia(periodo_value, materia_value)
+            if completa and huella == anterior:
+                log.info("    [Thread] Sin cambios, se saltea: '%s'", materia_texto)
+                return
+            # Cambió algo ya publicado: se reescriben todos sus datasets y docentes.
+            forzar = anterior is not None and huella != anterior
+            if forzar:
+                log.info("    [Thread] Contenido cambiado, se reemplaza: '%s'", materia_texto)
+                pendientes = dict(salidas)
+                _reemplazadas.add(clave)
+                if pool_docentes:
+                    # Sus docentes se vuelven a bajar: hasta confirmar cada uno no cuentan como completos, así un
+                    # docente que falle ahora se vuelve a pedir en la próxima corrida aunque la huella ya esté al día.
+                    salida_docente[2].desmarcar(clave)
+            _manifiesto.registrar_materia(periodo_value, periodo_texto, materia_value, materia_texto, huella, docentes_pagina)
+        resumen = []
+        for nombre, (extractor, escritor, diario) in pendientes.items():
+            with instrumentacion.medir('extraccion'):
+                registros = extractor(arbol, contexto)
+            escritor.escribir_registros(registros, al_confirmar=lambda diario=diario: diario.marcar(clave))
+            resumen.append(f"{nombre}={len(registros)}")
+        log.info("    [Thread] ¡Éxito! '%s': %s", materia_texto, ', '.join(resumen))
+        if pool_docentes:
+            # Los docentes se encolan en un pool aparte para no bloquear este hilo esperándolos.
+            _, escritor_docente, diario_docente = salida_docente
+            docentes = [d for d in PARSER.extraer_opciones_select(arbol, 'docente') or {} if forzar or not diario_docente.completado(clave + (d,))]
+            if _cola is not None:
+                # Crawl distribuido: cualquier trabajador puede tomar los docentes de la cola.
+                _cola.publicar_docentes(periodo_value, periodo_texto, materia_value, materia_texto, docentes)
+                return
+            _pendientes_docentes[clave] = len(docentes)
+            if not docentes:
+                escritor_docente.escribir([], al_confirmar=lambda: diario_docente.marcar(clave + ('*',)))
+            for docente_value in docentes:
+                pool_docentes.submit(worker_scrape_docente_unificado, (periodo_value, contexto, docente_value, salida_docente))
+    except Exception as e:
+        log.warning("    [Thread] ERROR procesando '%s': %r", materia_texto, e)
+        registrar_fallido('materia', list(pendientes) + (['docente'] if pool_docentes else []), periodo_value, periodo_texto, materia_value, materia_texto, e)
+
+def crawl_hilos(periodos_a_procesar, salidas, salida_docente, max_workers, periodos_a_revalidar=None):
+    """Sin manifiesto recorre todo lo seleccionado. En modo incremental, los periodos ya conocidos que no estén en
+    `periodos_a_revalidar` toman sus materias del manifiesto (sin consultarlas) y sólo se bajan las incompletas;
+    los demás se consultan en vivo y cada materia se revalida contra su huella."""
+    # Un pool de materias y otro de docentes, ambos de larga vida: no hay barrera entre periodos.
+    pool_docentes = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) if salida_docente else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for periodo_value, periodo_texto in periodos_a_procesar.items():
+            conocidas = _manifiesto.materias(periodo_value) if _manifiesto is not None else None
+            revalidar = _manifiesto is not None and periodo_value in (periodos_a_revalidar or ())
+            if conocidas is not None and not revalidar:
+                materias = conocidas
+                print(f"\n  2. Periodo histórico '{periodo_texto}': {len(materias)} materias tomadas del manifiesto.")
+            else:
+                materias = obtener_materias_por_periodo(periodo_value, periodo_texto)
+                if not materias: continue
+                if _manifiesto is not None:
+                    nuevas = set(materias) - set(conocidas or {})
+                    if conocidas is not None and nuevas: print(f"  -> {len(nuevas)} materias nuevas desde la última corrida.")
+                    _manifiesto.registrar_periodo(periodo_value, periodo_texto, materias)
+            print(f"\n---> Encolando scraping unificado para {len(materias)} materias de '{periodo_texto}'...")
+            for mat_val, mat_txt in materias.items():
+                executor.submit(worker_scrape_materia_completa, (periodo_value, periodo_texto, mat_val, mat_txt, salidas, salida_docente, pool_docentes, revalidar))
+    if pool_docentes:
+        pool_docentes.shutdown(wait=True)
+
+def enviar_unidad(u, executor, pool_docentes, salidas, salida_docente):
+    """Encola una unidad con la forma de fallidos.jsonl (materia o docente, con sus datasets); devuelve el future."""
+    if u['tipo'] == 'docente':
+        contexto = {'periodo': u['periodo_texto'], 'materia_codigo': u['materia_value'], 'materia_nombre': u['materia_texto']}
+        return pool_docentes.submit(worker_scrape_docente_unificado, (u['periodo_value'], contexto, u['docente_value'], salida_docente))
+    salidas_unidad = {nombre: salidas[nombre] for nombre in u['datasets'] if nombre in salidas}
+    con_docentes = 'docente' in u['datasets']
+    return executor.submit(worker_scrape_materia_completa, (u['periodo_value'], u['periodo_texto'], u['materia_value'], u['materia_texto'], salidas_unidad,
+                                                            salida_docente if con_docentes else None, pool_docentes if con_docentes else None, False))
+
+def crawl_fallidos(unidades, salidas, salida_docente, max_workers):
+    """Vuelve a procesar sólo las unidades anotadas en fallidos.jsonl, cada una con sus datasets."""
+    pool_docentes = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) if salida_docente else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for u in unidades:
+            enviar_unidad(u, executor, pool_docentes, salidas, salida_docente)
+    if pool_docentes:
+        pool_docentes.shutdown(wait=True)
+
+def crawl_cola(cola, salidas, salida_docente, max_workers):
+    """Toma unidades de la cola compartida de a lotes (a lo sumo 2 x max_workers en vuelo) hasta que no quede
+    trabajo en ella: ni pendiente ni tomado por otro trabajador, que todavía puede publicar docentes."""
+    pool_docentes = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) if salida_docente else None
+    en_vuelo = {}
+    cola.iniciar_latido()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                for u in cola.tomar(2 * max_workers - len(en_vuelo)):
+                    # Lo que el diario local ya tiene (un trabajador que se reinicia con el mismo nombre) se confirma sin bajarlo.
+                    for nombre in u['datasets']:
+                        diario = salida_docente[2] if nombre == 'docente' else salidas[nombre][2]
+                        if (nombre != 'docente' or u['tipo'] == 'docente') and diario.completado(clave_unidad(u)):
+                            cola.confirmar(nombre, clave_unidad(u))
+                    if cola.pendiente(u):
+                        en_vuelo[enviar_unidad(u, executor, pool_docentes, salidas, salida_docente)] = u
+                if not en_vuelo:
+                    if not cola.hay_trabajo(): break
+                    time.sleep(1) # otros trabajadores todavía pueden publicar docentes (o morir y liberar sus leases)
+                    continue
+                terminados, _ = concurrent.futures.wait(en_vuelo, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in terminados:
+                    u = en_vuelo.pop(future)
+                    if future.exception() is not None:
+                        log.warning("    [Cola] ERROR inesperado en '%s': %r", u['materia_texto'], future.exception())
+                        cola.fallar(dict(u, error=repr(future.exception())))
+    finally:
+        if pool_docentes:
+            pool_docentes.shutdown(wait=True)
+        cola.detener_latido()
+
+def abrir_salida(nombre_archivo, fieldnames, extractor, columnas_unidad, archivos, dataset=None):
+    """Abre un CSV reanudable (o, con --sqlite, la tabla del dataset) con su hilo escritor y devuelve la salida (extractor, escritor, diario)."""
+    if _base_sqlite is not None:
+        # Las unidades que se vuelven a bajar se reemplazan en la base: no hay filas previas que purgar ni deduplicar.
+        escritor, diario = abrir_salida_sqlite(_base_sqlite, dataset, fieldnames, columnas_unidad)
+        archivos.append((None, None, escritor, diario, 0))
+        return extractor, escritor, diario
+    csvfile, diario = abrir_csv_reanudable(nombre_archivo, fieldnames, columnas_unidad, codificacion_salida(nombre_archivo))
+    # Filas anteriores a esta corrida (ya sin las unidades incompletas): las de unidades reemplazadas se purgan al final.
+    filas_previas = contar_filas(nombre_archivo) if _manifiesto is not None else 0
+    escritor = EscritorCSV(csvfile, fieldnames)
+    archivos.append((nombre_archivo, csvfile, escritor, diario, filas_previas))
+    return extractor, escritor, diario
+
+# --- Orquestador Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper unificado: una descarga por (periodo, materia) para todos los CSV.",
+                                     epilog="Ejemplo (cron): python multithread_unificado.py --periodos ultimos:2 --datasets materia comentarios censo docente")
+    parser.add_argument('--periodos', nargs='+', default=None, metavar='PERIODO',
+                        help="Periodos a procesar sin preguntar: 'todos', valores ('20231'), rangos ('20221..20232') o 'ultimos:N'. Sin esta opción se muestra el menú.")
+    parser.add_argument('--datasets', nargs='+', choices=DATASETS, default=list(parser_rapido.SALIDAS_MATERIA),
+                        help="CSV a generar en el mismo recorrido (por defecto materia, comentarios y censo).")
+    parser.add_argument('--motor', choices=['hilos', 'async'], default='hilos', help="Motor de descarga: pool de hilos (por defecto) o asyncio.")
+    parser.add_argument('--docentes', action='store_true', help="Atajo para agregar 'docente' a --datasets (resultados_por_docente.csv).")
+    parser.add_argument('--parser', choices=sorted(PARSERS), default='rapido', help="Implementación de extracción: lxml/XPath (por defecto) o BeautifulSoup.")
+    parser.add_argument('--archivo', default=None, help="Directorio del archivo de páginas HTML (también ENCUESTAS_ARCHIVO).")
+    parser.add_argument('--modo-archivo', choices=['grabar', 'reproducir', 'offline'], default='grabar', help="grabar: descarga y guarda; reproducir: usa lo archivado y descarga el resto; offline: sólo archivo.")
+    parser.add_argument('--fallidos', action='store_true', help=f"Reprocesar sólo las unidades anotadas en {ARCHIVO_FALLIDOS} (motor de hilos, sin elegir periodos).")
+    parser.add_argument('--incremental', action='store_true', help=f"Usar {ARCHIVO_MANIFIESTO}: no volver a consultar periodos históricos ya recorridos y revalidar por huella de contenido los más recientes (motor de hilos).")
+    parser.add_argument('--revalidar', type=int, default=1, metavar='N', help="Con --incremental, cuántos de los periodos más recientes se revalidan (por defecto 1).")
+    parser.add_argument('--sqlite', nargs='?', const=ARCHIVO_BASE, default=None, metavar='BASE', help=f"Guardar en una base SQLite normalizada (por defecto '{ARCHIVO_BASE}') en lugar de los CSV.")
+    parser.add_argument('--cola', nargs='?', const=ARCHIVO_COLA, default=None, metavar='BASE',
+                        help=f"Crawl distribuido: trabajar sobre la cola compartida (por defecto '{ARCHIVO_COLA}', ver cola_trabajo.py) en lugar de elegir periodos.")
+    parser.add_argument('--publicar', action='store_true', help="Con --cola, publicar en ella las materias de los periodos y datasets elegidos y terminar.")
+    parser.add_argument('--trabajador', default=None, help="Con --cola, nombre de este trabajador (por defecto host-pid); sus CSV van a <parciales>/<nombre>/.")
+    parser.add_argument('--parciales', default=DIRECTORIO_PARCIALES, help=f"Con --cola, directorio de los resultados parciales (por defecto '{DIRECTORIO_PARCIALES}').")
+    parser.add_argument('--lease', type=float, default=120, metavar='SEG', help="Con --cola, duración de los leases en segundos (por defecto 120); se renuevan mientras el proceso vive.")
+    parser.add_argument('--log-nivel', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default=None, help="Detalle de los mensajes por materia/docente (por defecto INFO, o ENCUESTAS_LOG); WARNING sólo muestra errores.")
+    parser.add_argument('--metricas', default=None, metavar='BASE', help="Al terminar, exportar tiempos por etapa y contadores a BASE.json y BASE.prom (Prometheus); también ENCUESTAS_METRICAS.")
+    parser.add_argument('--perfil', action='store_true', help="Con --metricas, perfilador por muestreo de todos los hilos en BASE.folded (flamegraph).")
+    parser.add_argument('--concurrencia', type=int, default=None, help="Peticiones simultáneas (por defecto 10 con hilos, 100 con asyncio).")
+    args = parser.parse_args()
+
+    PARSER = PARSERS[args.parser]
+    datasets = set(args.datasets) | ({'docente'} if args.docentes else set())
+    MAX_WORKERS = args.concurrencia or (100 if args.motor == 'async' else 10)
+    if args.log_nivel: instrumentacion.configurar_log(args.log_nivel)
+    if args.publicar and not args.cola: parser.error("--publicar requiere --cola.")
+    trabajar_cola = args.cola and not args.publicar
+    if trabajar_cola and (args.motor == 'async' or args.fallidos or args.incremental or args.sqlite):
+        parser.error("--cola sólo se puede usar con el motor de hilos, sin --fallidos, --incremental ni --sqlite.")
+    if args.incremental and (args.motor == 'async' or args.fallidos):
+        parser.error("--incremental sólo se puede usar con el motor de hilos y sin --fallidos.")
+    if trabajar_cola:
+        # Cada trabajador escribe en su propio directorio: CSV, diarios, fallidos.jsonl y métricas.
+        args.cola = os.path.abspath(args.cola)
+        if args.archivo: args.archivo = os.path.abspath(args.archivo)
+        if args.metricas: args.metricas = os.path.abspath(args.metricas)
+        _cola = ColaTrabajo(args.cola, args.trabajador or nombre_trabajador(), args.lease)
+        directorio = os.path.join(args.parciales, _cola.trabajador)
+        os.makedirs(directorio, exist_ok=True)
+        os.chdir(directorio)
+        avisar_fallidos(_cola.fallar)
+        print(f"Trabajador '{_cola.trabajador}' sobre la cola '{args.cola}' ({_cola.resumen()}); resultados parciales en '{directorio}'.")
+    if args.metricas: instrumentacion.activar(args.metricas, args.perfil)
+    elif args.perfil: parser.error("--perfil requiere --metricas BASE.")
+    sesiones.configurar_pool(MAX_WORKERS, HEADERS)
+    if args.archivo:
+        sesiones.configurar_archivo(args.archivo, args.modo_archivo)
+
+    _base_sqlite = args.sqlite
+    if args.incremental:
+        _manifiesto = ManifiestoCrawl()
+        print(f"Modo incremental: manifiesto '{ARCHIVO_MANIFIESTO}' con {len(_manifiesto.periodos)} periodos conocidos.")
+
+    if trabajar_cola:
+        datasets = _cola.datasets()
+        if not datasets:
+            print(f"La cola '{args.cola}' está vacía: publicar primero con --cola --publicar.")
+            exit(1)
+    elif args.fallidos:
+        unidades_fallidas = tomar_fallidos()
+        if not unidades_fallidas:
+            print(f"No hay unidades pendientes en '{ARCHIVO_FALLIDOS}'.")
+            exit()
+        print(f"Reprocesando {len(unidades_fallidas)} unidades fallidas de '{ARCHIVO_FALLIDOS}'...")
+        datasets = {nombre for u in unidades_fallidas for nombre in u['datasets']}
+    else:
+        periodos_disponibles = obtener_periodos()
+        if not periodos_disponibles: exit(1)
+
+        if args.periodos:
+            periodos_a_procesar = filtrar_periodos(periodos_disponibles, args.periodos)
+        else:
+            periodos_a_procesar = seleccionar_periodo_a_procesar(periodos_disponibles)
+        if not periodos_a_procesar: exit(1)
+
+    if args.publicar:
+        cola = ColaTrabajo(args.cola)
+        nuevas = total = 0
+        for periodo_value, periodo_texto in periodos_a_procesar.items():
+            materias = obtener_materias_por_periodo(periodo_value, periodo_texto)
+            if not materias: continue
+            nuevas += cola.publicar([{'tipo': 'materia', 'datasets': sorted(datasets), 'periodo_value': periodo_value, 'periodo_texto': periodo_texto,
+                                      'materia_value': mat_val, 'materia_texto': mat_txt} for mat_val, mat_txt in materias.items()])
+            total += len(materias)
+        print(f"\n-> Publicadas {nuevas} materias nuevas en '{args.cola}' ({total - nuevas} ya estaban). Cola: {cola.resumen()}")
+        print("Los docentes de cada materia se publican a medida que los trabajadores la bajan (multithread_unificado.py --cola).")
+        exit()
+    print(f"Datasets: {', '.join(nombre for nombre in DATASETS if nombre in datasets)} (concurrencia compartida: {MAX_WORKERS})")
+
+    archivos = []
+    try:
+        salidas = {nombre: abrir_salida(nombre_archivo, fieldnames, extractor, COLUMNAS_UNIDAD_MATERIA, archivos, nombre)
+                   for nombre, (nombre_archivo, fieldnames, extractor) in PARSER.SALIDAS_MATERIA.items() if nombre in datasets}
+        salida_docente = None
+        if 'docente' in datasets:
+            nombre_archivo, fieldnames, extractor = PARSER.SALIDA_DOCENTE
+            salida_docente = abrir_salida(nombre_archivo, fieldnames, extractor, COLUMNAS_UNIDAD_DOCENTE, archivos, 'docente')
+
+        if trabajar_cola:
+            # Las marcas del diario local también confirman la unidad en la cola.
+            salidas = {nombre: (extractor, escritor, DiarioCola(diario, _cola, nombre)) for nombre, (extractor, escritor, diario) in salidas.items()}
+            if salida_docente:
+                salida_docente = salida_docente[:2] + (DiarioCola(salida_docente[2], _cola, 'docente'),)
+            crawl_cola(_cola, salidas, salida_docente, MAX_WORKERS)
+        elif args.fallidos:
+            crawl_fallidos(unidades_fallidas, salidas, salida_docente, MAX_WORKERS)
+        elif args.motor == 'async':
+            from motor_async import crawl_async
+            crawl_async(periodos_a_procesar, salidas, salida_docente, MAX_WORKERS, sesiones.obtener_controlador(), PARSER)
+        else:
+            periodos_a_revalidar = sorted(periodos_disponibles)[-args.revalidar:] if args.revalidar > 0 else []
+            crawl_hilos(periodos_a_procesar, salidas, salida_docente, MAX_WORKERS, periodos_a_revalidar)
+    finally:
+        for _, csvfile, escritor, diario, _ in archivos:
+            escritor.cerrar()
+            diario.cerrar()
+            if csvfile is not None: csvfile.close()
+        # Con los escritores cerrados ya no queda ningún registro de la corrida: se liberan los catálogos.
+        registros.reiniciar_catalogos()
+    for nombre_archivo, csvfile, _, _, filas_previas in archivos:
+        if csvfile is None: continue
+        purgar_filas_previas(nombre_archivo, COLUMNAS_UNIDAD_MATERIA, _reemplazadas, filas_previas, codificacion_salida(nombre_archivo))
+        deduplicar_csv(nombre_archivo, codificacion_salida(nombre_archivo))
+    if args.fallidos:
+        # Recién ahora, con los escritores cerrados: lo reprocesado está en disco o anotado de nuevo en fallidos.jsonl.
+        retirar_fallidos()
+    if _manifiesto is not None:
+        # Recién ahora, con los CSV ya consistentes: si la corrida se corta antes, la próxima vuelve a detectar los cambios.
+        _manifiesto.guardar()
+    print(f"\nControlador de tasa: {sesiones.obtener_controlador().resumen()}")
+    print(f"Tiempos por etapa:\n{instrumentacion.METRICAS.texto_etapas()}")
+    if trabajar_cola:
+        print(f"Cola: {_cola.resumen()}. Al terminar todos los trabajadores: python cola_trabajo.py --cola {args.cola} unir --parciales {os.path.dirname(os.getcwd())}")
+    if cantidad_fallidos():
+        print(f"\nATENCIÓN: {cantidad_fallidos()} unidades fallaron tras agotar los reintentos; quedaron en '{ARCHIVO_FALLIDOS}' (volver a correr con --fallidos).")
+    print("\n¡Proceso de scraping unificado completado!")
+    # Código de salida distinto de 0 para que un cron note que quedaron unidades sin bajar.
+    if cantidad_fallidos(): exit(1)
@@ -0,0 +1,106 @@
+import os
+import requests
+from bs4 import BeautifulSoup
+
+import sesiones
+
+# --- Configuración ---
+# ENCUESTAS_URL permite apuntar los scrapers a otro servidor (p. ej. sitio_simulado.py para benchmarks).
+URL = os.environ.get('ENCUESTAS_URL', "https://www1.ing.unlp.edu.ar/sitio/encuestas/index.php")
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': URL
+}
+
+# --- Funciones de Navegación compartidas ---
+def obtener_periodos():
+    print("1. Obteniendo la lista de periodos...")
+    try:
+        response = sesiones.get(URL)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        soup = BeautifulSoup(response.text, 'lxml')
+        selector = soup.find('select', {'name': 'anioSem'})
+        if not selector: return None
+        return {opt.get('value'): opt.text.strip() for opt in selector.find_all('option') if opt.get('value') and '/' not in opt.get('value')}
+    except requests.exceptions.RequestException as e:
+        print(f"ERROR al obtener periodos: {e}")
+        return None
+
+def obtener_materias_por_periodo(periodo_value, periodo_texto):
+    print(f"  2. Obteniendo materias para el periodo '{periodo_texto}'...")
+    try:
+        payload = {'anioSem': periodo_value}
+        response = sesiones.post(URL, data=payload, timeout=15)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        soup = BeautifulSoup(response.text, 'lxml')
+        selector = soup.find('select', {'name': 'cod'})
+        if not selector: return None
+        materias = {opt.get('value'): opt.text.strip() for opt in selector.find_all('option')[1:] if opt.get('value')}
+        print(f"  -> Encontradas {len(materias)} materias.")
+        return materias
+    except requests.exceptions.RequestException as e:
+        print(f"  -> ERROR al obtener materias para {periodo_value}: {e}")
+        return None
+
+# --- Función Menú de Selección ---
+def seleccionar_periodo_a_procesar(periodos_disponibles):
+    if not periodos_disponibles:
+        print("No se encontraron periodos disponibles para seleccionar.")
+        return None
+    print("\n--- SELECCIONE EL PERIODO A DESCARGAR ---")
+    periodos_lista = list(periodos_disponibles.items())
+    for i, (_, texto) in enumerate(periodos_lista):
+        print(f"{i+1}. {texto}")
+    print("-----------------------------------------")
+    print("0. Descargar TODOS los periodos")
+    while True:
+        try:
+            choice = int(input("Ingrese el número de su elección: "))
+            if 0 <= choice <= len(periodos_lista):
+                if choice == 0:
+                    print("\nSe procesarán TODOS los periodos.")
+                    return periodos_disponibles
+                else:
+                    periodo_seleccionado = periodos_lista[choice-1]
+                    print(f"\nSe procesará únicamente el periodo: '{periodo_seleccionado[1]}'")
+                    return {periodo_seleccionado[0]: periodo_seleccionado[1]}
+            else:
+                print("Error: Número fuera de rango. Intente de nuevo.")
+        except ValueError:
+            print("Error: Por favor, ingrese un número válido.")
+
+# --- Selección no interactiva (línea de comandos) ---
+def filtrar_periodos(periodos_disponibles, especificaciones):
+    """Selecciona periodos sin preguntar. Cada especificación puede ser 'todos', un valor ('20231'),
+    un rango inclusivo ('20221..20232') o los N más recientes ('ultimos:N')."""
+    if not periodos_disponibles:
+        print("No se encontraron periodos disponibles para seleccionar.")
+        return None
+    ordenados = sorted(periodos_disponibles)
+    elegidos = set()
+    for especificacion in especificaciones:
+        if especificacion == 'todos':
+            elegidos.update(ordenados)
+        elif especificacion.startswith('ultimos:'):
+            cantidad = especificacion.split(':', 1)[1]
+            if not cantidad.isdigit() or int(cantidad) == 0:
+                print(f"ERROR: Cantidad inválida en '{especificacion}' (se espera p. ej. 'ultimos:2').")
+                return None
+            elegidos.update(ordenados[-int(cantidad):])
+        elif '..' in especificacion:
+            desde, hasta = especificacion.split('..', 1)
+            rango = [valor for valor in ordenados if (not desde or valor >= desde) and (not hasta or valor <= hasta)]
+            if not rango:
+                print(f"ERROR: Ningún periodo disponible en el rango '{especificacion}'.")
+                return None
+            elegidos.update(rango)
+        elif especificacion in periodos_disponibles:
+            elegidos.add(especificacion)
+        else:
+            print(f"ERROR: Periodo desconocido '{especificacion}'. Disponibles: {', '.join(ordenados)}")
+            return None
+    seleccion = {valor: texto for valor, texto in periodos_disponibles.items() if valor in elegidos}
+    print(f"\nSe procesarán {len(seleccion)} periodos: {', '.join(seleccion.values())}")
+    return seleccion
@@ -0,0 +1,115 @@
+import lxml.html
+from lxml import etree
+
+from extractores import limpiar_nombre_materia, separar_nombre_y_rango
+from registros import Comentario, DocenteCenso, VotoDocente, VotoMateria
+
+# --- Parser rápido (lxml + XPath) ---
+# Misma interfaz y mismos registros que extractores.py, pero sin construir el árbol de
+# BeautifulSoup ni recorrerlo con find()/find_next_siblings(): se parsea con lxml y se
+# ubican los bloques con XPath compiladas una sola vez. extractores.py queda como
+# implementación de referencia (ver bench_parser.py y fixtures/).
+
+def _xpath_titulo(texto):
+    # Equivale a soup.find('h3', string=texto): el <h3> debe tener un único hijo con ese texto exacto.
+    return etree.XPath(f"//h3[count(node())=1][string(.)='{texto}']")
+
+_TITULO_MATERIA = _xpath_titulo('Respuestas sobre la materia')
+_TITULO_DOCENTE = _xpath_titulo('Respuestas sobre el docente')
+_TABLA_SIGUIENTE = etree.XPath("following-sibling::table[contains(concat(' ', normalize-space(@class), ' '), ' table ')][1]")
+_PRIMER_H5 = etree.XPath("(.//h5)[1]")
+_CABECERAS = etree.XPath("(.//thead)[1]//th")
+_VALORES = etree.XPath("(.//tbody)[1]//td")
+_TABLA_COMENTARIOS = etree.XPath("(//table[@id='tblComent'])[1]")
+_FILAS = etree.XPath(".//tr")
+_CELDAS = etree.XPath(".//td")
+_SELECT = etree.XPath("(//select[@name=$nombre])[1]")
+_OPCIONES = etree.XPath(".//option")
+
+def parsear_pagina(html):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml no acepta str con declaración de encoding: se reintenta con bytes.
+        return lxml.html.document_fromstring(html.encode('utf-8'))
+
+def _texto(elemento):
+    return elemento.text_content().strip()
+
+def _clases(elemento):
+    return (elemento.get('class') or '').split()
+
+def _extraer_bloque_encuesta(titulo, titulo_corte=None):
+    resultados = []
+    for elemento in titulo.itersiblings():
+        if not isinstance(elemento.tag, str): continue # comentarios e instrucciones de procesamiento
+        if elemento.tag == 'h3' and (titulo_corte is None or titulo_corte in elemento.text_content()):
+            break
+        if elemento.tag == 'div' and 'd-flex' in _clases(elemento):
+            pregunta_tag = _PRIMER_H5(elemento)
+            if not pregunta_tag: continue
+            pregunta_texto = _texto(pregunta_tag[0])
+            tabla = _TABLA_SIGUIENTE(elemento)
+            if not tabla: continue
+            cabeceras = [_texto(th) for th in _CABECERAS(tabla[0])]
+            valores = [_texto(td) for td in _VALORES(tabla[0])]
+            if len(cabeceras) == len(valores):
+                for i in range(len(cabeceras)):
+                    resultados.append((pregunta_texto, cabeceras[i], valores[i]))
+    return resultados
+
+def extraer_encuesta_materia(arbol, contexto):
+    titulo_materia = _TITULO_MATERIA(arbol)
+    if not titulo_materia: return []
+    return [VotoMateria(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], pregunta, opcion, votos)
+            for pregunta, opcion, votos in _extraer_bloque_encuesta(titulo_materia[0])]
+
+def extraer_encuesta_docente(arbol, contexto):
+    titulo_docente = _TITULO_DOCENTE(arbol)
+    if not titulo_docente: return []
+    return [VotoDocente(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], contexto['docente'], pregunta, opcion, votos)
+            for pregunta, opcion, votos in _extraer_bloque_encuesta(titulo_docente[0], "Respuestas sobre la materia")]
+
+def extraer_comentarios(arbol, contexto):
+    tabla = _TABLA_COMENTARIOS(arbol)
+    if not tabla: return []
+    materia_nombre = limpiar_nombre_materia(contexto['materia_nombre'])
+    resultados_comentarios = []
+    for fila in _FILAS(tabla[0])[1:]:
+        celdas = _CELDAS(fila)
+        if len(celdas) == 2:
+            comision = _texto(celdas[0])
+            comentario = _texto(celdas[1])
+            if comentario:
+                resultados_comentarios.append(Comentario(contexto['periodo'], contexto['materia_codigo'], materia_nombre, comision, comentario))
+    return resultados_comentarios
+
+def extraer_periodos(arbol):
+    """Opciones del selector de periodos (página inicial), descartando los valores con '/'."""
+    selector = _SELECT(arbol, nombre='anioSem')
+    if not selector: return None
+    return {opt.get('value'): _texto(opt) for opt in _OPCIONES(selector[0]) if opt.get('value') and '/' not in opt.get('value')}
+
+def extraer_opciones_select(arbol, nombre):
+    selector = _SELECT(arbol, nombre=nombre)
+    if not selector: return None
+    return {opt.get('value'): _texto(opt) for opt in _OPCIONES(selector[0])[1:] if opt.get('value')}
+
+def extraer_censo_docentes(arbol, contexto):
+    selector_docente = _SELECT(arbol, nombre='docente')
+    if not selector_docente: return []
+    info_docentes_materia = []
+    for option in _OPCIONES(selector_docente[0])[1:]:
+        value = option.get('value')
+        if not value: continue
+        nombre, rango = separar_nombre_y_rango(value)
+        info_docentes_materia.append(DocenteCenso(contexto['periodo'], contexto['materia_codigo'], contexto['materia_nombre'], nombre, rango))
+    return info_docentes_materia
+
+# --- Registro de salidas (mismo formato que extractores.py) ---
+SALIDAS_MATERIA = {
+    'materia': ('resultados_encuestas_multihilo.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'pregunta', 'opcion_respuesta', 'cantidad_votos'], extraer_encuesta_materia),
+    'comentarios': ('comentarios_encuestas.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'comision', 'comentario'], extraer_comentarios),
+    'censo': ('censo_docentes_multihilo.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'docente_nombre', 'docente_rango'], extraer_censo_docentes),
+}
+SALIDA_DOCENTE = ('resultados_por_docente.csv', ['periodo', 'materia_codigo', 'materia_nombre', 'docente', 'pregunta', 'opcion_respuesta', 'cantidad_votos'], extraer_encuesta_docente)
@@ -0,0 +1,177 @@
+import threading
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # los scrapers no necesitan pandas; sólo leer_csv/compactar (consolidación)
+    np = pd = None
+
+# --- Registros compactos ---
+# En una corrida completa las mismas pocas cadenas (periodo, materia, docente, pregunta, opción)
+# se repiten en cientos de miles de filas. Los extractores devuelven registros con __slots__ que
+# guardan esas dimensiones como ids enteros de catálogos compartidos por los hilos de una corrida,
+# y los votos como int. Los catálogos sólo crecen mientras dura la corrida: quien la lanza llama a
+# reiniciar_catalogos() cuando ya no queda ningún registro vivo (escritores cerrados).
+#
+# Internar es seguro entre hilos: las altas se hacen bajo el lock de cada catálogo y el texto se
+# agrega antes de publicar su id, así que las lecturas sin lock (id ya conocido, textos[id]) nunca
+# ven un id que todavía no resuelve. reiniciar() no lo es: sólo entre corridas, sin hilos extrayendo. El texto se arma recién en el borde de salida: registro['columna'] (lo que usan
+# los escritores al armar cada fila del CSV) o como_dict() (JSON y huellas del manifiesto).
+#
+# Del lado de la consolidación, leer_csv() / compactar() hacen lo mismo con pandas: dimensiones
+# categóricas (códigos enteros + un único catálogo por columna) y cantidad_votos como Int32, en
+# lugar de leer todo como texto.
+
+class Catalogo:
+    """Texto <-> id entero. Un id no cambia hasta reiniciar() el catálogo; id() se puede usar desde varios hilos."""
+    def __init__(self):
+        self._ids = {}
+        self.textos = []
+        self._lock = threading.Lock()
+
+    def id(self, texto):
+        try:
+            return self._ids[texto]
+        except KeyError:
+            with self._lock:
+                if texto not in self._ids:
+                    self.textos.append(texto)  # primero el texto: el id sólo se publica cuando ya resuelve
+                    self._ids[texto] = len(self.textos) - 1
+                return self._ids[texto]
+
+    def __len__(self):
+        return len(self.textos)
+
+    def reiniciar(self):
+        """Vacía el catálogo. Los registros creados antes quedarían apuntando a ids que ya no existen."""
+        with self._lock:
+            self._ids = {}
+            self.textos = []
+
+PERIODOS, MATERIAS, DOCENTES, PREGUNTAS, OPCIONES, VALORES = CATALOGOS = tuple(Catalogo() for _ in range(6))
+
+def reiniciar_catalogos():
+    """Libera lo internado en la corrida que terminó."""
+    for catalogo in CATALOGOS:
+        catalogo.reiniciar()
+
+def votos_a_entero(texto):
+    """'12' -> 12. Lo que no es un entero escrito tal cual ('', 'N/A', '3.0', '007') queda como
+    texto, para que el CSV salga idéntico al de la página."""
+    if texto.isascii() and texto.isdigit() and (texto == '0' or texto[0] != '0'):
+        return int(texto)
+    return texto
+
+class Registro:
+    """Base: periodo y materia internados. registro['col'] resuelve el texto de cada columna."""
+    __slots__ = ('_periodo', '_materia')
+    COLUMNAS = ()
+
+    def __init__(self, periodo, materia_codigo, materia_nombre):
+        self._periodo = PERIODOS.id(periodo)
+        self._materia = MATERIAS.id((materia_codigo, materia_nombre))
+
+    periodo = property(lambda self: PERIODOS.textos[self._periodo])
+    materia_codigo = property(lambda self: MATERIAS.textos[self._materia][0])
+    materia_nombre = property(lambda self: MATERIAS.textos[self._materia][1])
+
+    def __getitem__(self, columna):
+        return getattr(self, columna)
+
+    def como_dict(self):
+        """El registro como {columna: texto}, igual al dict que devolvían antes los extractores."""
+        return {c: str(getattr(self, c)) for c in self.COLUMNAS}
+
+    def _clave(self):
+        return tuple(getattr(self, s) for clase in type(self).__mro__ for s in getattr(clase, '__slots__', ()))
+
+    def __eq__(self, otro):
+        return type(self) is type(otro) and self._clave() == otro._clave()
+
+    def __hash__(self):
+        return hash(self._clave())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.como_dict()!r})"
+
+class VotoMateria(Registro):
+    __slots__ = ('_pregunta', '_opcion', 'cantidad_votos')
+    COLUMNAS = ('periodo', 'materia_codigo', 'materia_nombre', 'pregunta', 'opcion_respuesta', 'cantidad_votos')
+
+    def __init__(self, periodo, materia_codigo, materia_nombre, pregunta, opcion_respuesta, cantidad_votos):
+        Registro.__init__(self, periodo, materia_codigo, materia_nombre)
+        self._pregunta = PREGUNTAS.id(pregunta)
+        self._opcion = OPCIONES.id(opcion_respuesta)
+        self.cantidad_votos = votos_a_entero(cantidad_votos)
+
+    pregunta = property(lambda self: PREGUNTAS.textos[self._pregunta])
+    opcion_respuesta = property(lambda self: OPCIONES.textos[self._opcion])
+
+class VotoDocente(VotoMateria):
+    __slots__ = ('_docente',)
+    COLUMNAS = ('periodo', 'materia_codigo', 'materia_nombre', 'docente', 'pregunta', 'opcion_respuesta', 'cantidad_votos')
+
+    def __init__(self, periodo, materia_codigo, materia_nombre, docente, pregunta, opcion_respuesta, cantidad_votos):
+        VotoMateria.__init__(self, periodo, materia_codigo, materia_nombre, pregunta, opcion_respuesta, cantidad_votos)
+        self._docente = DOCENTES.id(docente)
+
+    docente = property(lambda self: DOCENTES.textos[self._docente])
+
+class Comentario(Registro):
+    __slots__ = ('_comision', 'comentario')
+    COLUMNAS = ('periodo', 'materia_codigo', 'materia_nombre', 'comision', 'comentario')
+
+    def __init__(self, periodo, materia_codigo, materia_nombre, comision, comentario):
+        Registro.__init__(self, periodo, materia_codigo, materia_nombre)
+        self._comision = VALORES.id(comision)
+        self.comentario = comentario
+
+    comision = property(lambda self: VALORES.textos[self._comision])
+
+class DocenteCenso(Registro):
+    __slots__ = ('_docente', '_rango')
+    COLUMNAS = ('periodo', 'materia_codigo', 'materia_nombre', 'docente_nombre', 'docente_rango')
+
+    def __init__(self, periodo, materia_codigo, materia_nombre, docente_nombre, docente_rango):
+        Registro.__init__(self, periodo, materia_codigo, materia_nombre)
+        self._docente = DOCENTES.id(docente_nombre)
+        self._rango = VALORES.id(docente_rango)
+
+    docente_nombre = property(lambda self: DOCENTES.textos[self._docente])
+    docente_rango = property(lambda self: VALORES.textos[self._rango])
+
+def como_dict(objeto):
+    """Para json.dumps(..., default=como_dict): serializa los registros como sus dicts de texto."""
+    if isinstance(objeto, Registro):
+        return objeto.como_dict()
+    raise TypeError(f"{type(objeto).__name__} no es serializable a JSON")
+
+# --- Tablas compactas (consolidación) ---
+COLUMNAS_DIMENSION = ('periodo', 'materia_codigo', 'materia_nombre', 'docente', 'docente_nombre', 'docente_rango', 'pregunta', 'opcion_respuesta', 'comision')
+
+def compactar(df):
+    """Dimensiones como categóricas, cantidad_votos como Int32 (lo no numérico queda <NA>, lo
+    decimal se trunca) y el resto como texto; los vacíos de texto y dimensiones quedan como ''."""
+    columnas = {}
+    for c in df.columns:
+        serie = df[c]
+        if c == 'cantidad_votos':
+            numeros = (serie if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie) else pd.to_numeric(serie, errors='coerce')).astype(float)
+            columnas[c] = np.trunc(numeros.where(np.isfinite(numeros))).astype('Int32')
+        elif c in COLUMNAS_DIMENSION:
+            serie = serie.astype('category')
+            if serie.isna().any():
+                if '' not in serie.cat.categories:  # '' primero, para no romper el orden lexicográfico del catálogo
+                    serie = serie.cat.set_categories([''] + list(serie.cat.categories))
+                serie = serie.fillna('')
+            columnas[c] = serie
+        else:
+            columnas[c] = serie.fillna('')
+    return pd.DataFrame(columnas, index=df.index)
+
+def leer_csv(ruta):
+    """Como pd.read_csv(ruta, dtype=str).fillna('') pero con las columnas compactadas."""
+    encabezado = pd.read_csv(ruta, nrows=0).columns
+    # cantidad_votos sin dtype: el parser de C ya la lee como número (si algo no lo es, la columna queda como texto).
+    tipos = {c: 'category' if c in COLUMNAS_DIMENSION else str for c in encabezado if c != 'cantidad_votos'}
+    return compactar(pd.read_csv(ruta, dtype=tipos))
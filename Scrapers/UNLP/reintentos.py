@@ -0,0 +1,50 @@
+import email.utils
+import random
+import time
+
+# --- Política de reintentos ---
+# Backoff exponencial con tope y "full jitter" (espera aleatoria entre 0 y base * 2^intento,
+# acotada por `tope`), para que los hilos que fallan juntos no reintenten todos a la vez.
+# Cada tipo de falla tiene su propio presupuesto de intentos:
+#   * 'timeout':  el servidor no contestó a tiempo; cada intento ya costó el timeout entero,
+#                 así que se reintenta menos veces y con una espera base más larga.
+#   * 'conexion': conexión rechazada o cortada; suele ser transitorio y se reintenta rápido.
+#   * 'servidor': 429 o 5xx; se respeta el Retry-After si viene en la respuesta.
+# Los demás códigos (p. ej. 404) no se reintentan.
+
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+def segundos_retry_after(valor):
+    """Interpreta un encabezado Retry-After (segundos o fecha HTTP). Devuelve None si no hay o no se entiende."""
+    if not valor: return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = email.utils.parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, fecha.timestamp() - time.time())
+
+class PoliticaReintentos:
+    def __init__(self, intentos_servidor=5, intentos_conexion=5, intentos_timeout=3,
+                 base=0.5, base_timeout=2.0, tope=30.0, tope_retry_after=120.0):
+        self.intentos = {'servidor': intentos_servidor, 'conexion': intentos_conexion, 'timeout': intentos_timeout}
+        self.base = base
+        self.base_timeout = base_timeout
+        self.tope = tope
+        self.tope_retry_after = tope_retry_after
+
+    def reintentar(self, motivo, intento):
+        """¿Corresponde otro intento después de que falló el intento número `intento` (desde 0)?"""
+        return motivo is not None and intento + 1 < self.intentos.get(motivo, 0)
+
+    def espera(self, motivo, intento, retry_after=None):
+        base = self.base_timeout if motivo == 'timeout' else self.base
+        espera = random.uniform(0, min(self.tope, base * 2 ** intento))
+        if retry_after is not None:
+            # El servidor pidió esperar: nunca menos que eso (pero sin quedar colgados para siempre).
+            espera = max(espera, min(retry_after, self.tope_retry_after))
+        return espera
+
+SIN_REINTENTOS = PoliticaReintentos(intentos_servidor=1, intentos_conexion=1, intentos_timeout=1)
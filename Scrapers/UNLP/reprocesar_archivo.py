@@ -0,0 +1,100 @@
+import argparse
+import concurrent.futures
+import csv
+import os
+import time
+
+import parser_rapido
+from extractores import codificacion_salida
+from archivo_html import ArchivoHTML, leer_blob
+
+# --- Reproceso offline del archivo de páginas ---
+# Regenera los CSV a partir de las páginas guardadas por archivo_html.py, sin tocar la red.
+# El parseo es puramente CPU, así que se reparte en lotes entre procesos (ProcessPoolExecutor)
+# para esquivar el GIL. Produce los mismos CSV que los scrapers: materia, comentarios y censo
+# desde las páginas de (periodo, materia), y docente desde las de (periodo, materia, docente).
+
+SALIDAS = dict(parser_rapido.SALIDAS_MATERIA, docente=parser_rapido.SALIDA_DOCENTE)
+
+def procesar_lote(params):
+    """Worker de proceso: parsea un lote de páginas y devuelve las filas de cada dataset como tuplas."""
+    directorio, lote, datasets = params
+    filas = {nombre: [] for nombre in datasets}
+    for tipo, blob, contexto in lote:
+        arbol = parser_rapido.parsear_pagina(leer_blob(directorio, blob).decode('utf-8', errors='replace'))
+        nombres = ['docente'] if tipo == 'docente' else [nombre for nombre in parser_rapido.SALIDAS_MATERIA]
+        for nombre in nombres:
+            if nombre not in filas: continue
+            _, fieldnames, extractor = SALIDAS[nombre]
+            filas[nombre].extend(tuple(registro[c] for c in fieldnames) for registro in extractor(arbol, contexto))
+    return filas
+
+def _html(archivo, blob):
+    return archivo.leer_blob(blob).decode('utf-8', errors='replace')
+
+def listar_unidades(archivo, periodos_a_procesar, datasets):
+    """Arma la lista ordenada de páginas a reprocesar con su contexto (periodo y nombre de materia)."""
+    unidades = []
+    quiere_materia = any(nombre in datasets for nombre in parser_rapido.SALIDAS_MATERIA)
+    for periodo_value, periodo_texto in periodos_a_procesar.items():
+        pagina_periodo = archivo.consultar("SELECT blob FROM paginas WHERE anio_sem = ? AND cod IS NULL ORDER BY fecha DESC LIMIT 1", (periodo_value,))
+        materias = parser_rapido.extraer_opciones_select(parser_rapido.parsear_pagina(_html(archivo, pagina_periodo[0][0])), 'cod') if pagina_periodo else {}
+        for cod, docente, blob in archivo.consultar("SELECT cod, docente, blob FROM paginas WHERE anio_sem = ? AND cod IS NOT NULL ORDER BY cod, docente", (periodo_value,)):
+            contexto = {'periodo': periodo_texto, 'materia_codigo': cod, 'materia_nombre': (materias or {}).get(cod, cod)}
+            if docente is None and quiere_materia:
+                unidades.append(('materia', blob, contexto))
+            elif docente is not None and 'docente' in datasets:
+                unidades.append(('docente', blob, dict(contexto, docente=docente)))
+    return unidades
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenera los CSV desde el archivo de páginas HTML, en paralelo y sin red.")
+    parser.add_argument('--archivo', required=True, help="Directorio del archivo de páginas (el mismo de --archivo / ENCUESTAS_ARCHIVO).")
+    parser.add_argument('--periodos', nargs='*', default=None, help="Valores anioSem a reprocesar (por defecto, todos los archivados).")
+    parser.add_argument('--datasets', nargs='+', choices=sorted(SALIDAS), default=sorted(SALIDAS), help="CSV a generar.")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help="Procesos de parseo.")
+    parser.add_argument('--lote', type=int, default=64, help="Páginas por lote enviado a cada proceso.")
+    parser.add_argument('--salida', default='.', help="Directorio donde escribir los CSV (se sobrescriben).")
+    args = parser.parse_args()
+
+    inicio = time.time()
+    archivo = ArchivoHTML(args.archivo)
+    print(f"1. Archivo '{args.archivo}': {archivo.resumen()}")
+    pagina_inicial = archivo.consultar("SELECT blob FROM paginas WHERE anio_sem IS NULL ORDER BY fecha DESC LIMIT 1")
+    if not pagina_inicial:
+        print("ERROR: El archivo no contiene la página inicial con la lista de periodos.")
+        exit()
+    periodos = parser_rapido.extraer_periodos(parser_rapido.parsear_pagina(_html(archivo, pagina_inicial[0][0]))) or {}
+    periodos_a_procesar = {valor: texto for valor, texto in periodos.items() if args.periodos is None or valor in args.periodos}
+    if not periodos_a_procesar:
+        print("ERROR: Ninguno de los periodos pedidos está en el archivo.")
+        exit()
+
+    unidades = listar_unidades(archivo, periodos_a_procesar, args.datasets)
+    archivo.cerrar()
+    lotes = [(args.archivo, unidades[i:i + args.lote], args.datasets) for i in range(0, len(unidades), args.lote)]
+    print(f"2. Reprocesando {len(unidades)} páginas de {len(periodos_a_procesar)} periodos en {len(lotes)} lotes con {args.procesos} procesos...")
+
+    os.makedirs(args.salida, exist_ok=True)
+    archivos = {}
+    escritores = {}
+    try:
+        for nombre in args.datasets:
+            nombre_archivo, fieldnames, _ = SALIDAS[nombre]
+            archivos[nombre] = open(os.path.join(args.salida, nombre_archivo), 'w', newline='', encoding=codificacion_salida(nombre_archivo))
+            escritores[nombre] = csv.writer(archivos[nombre])
+            escritores[nombre].writerow(fieldnames)
+        totales = {nombre: 0 for nombre in args.datasets}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.procesos) as executor:
+            # map() conserva el orden de los lotes, así que la salida es determinística.
+            for filas in executor.map(procesar_lote, lotes):
+                for nombre, filas_dataset in filas.items():
+                    escritores[nombre].writerows(filas_dataset)
+                    totales[nombre] += len(filas_dataset)
+    finally:
+        for csvfile in archivos.values():
+            csvfile.close()
+
+    for nombre, total in totales.items():
+        print(f"-> {SALIDAS[nombre][0]}: {total} filas")
+    print(f"\n¡Reproceso completado en {time.time() - inicio:.2f} segundos!")
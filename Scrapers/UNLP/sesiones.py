@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import instrumentacion
+from instrumentacion import log
+
+from control_tasa import ControladorTasa
+from archivo_html import ArchivoHTML, MODOS
+from reintentos import PoliticaReintentos, ESTADOS_REINTENTABLES, segundos_retry_after
+
+# --- Pool de conexiones compartido ---
+# Todos los hilos comparten un único HTTPAdapter (y por lo tanto un único pool de
+# conexiones keep-alive de urllib3, que es thread-safe), pero cada hilo usa su propia
+# requests.Session para no compartir cookies ni estado mutable entre hilos.
+# Las conexiones del pool miden cuánto tarda cada apertura (DNS + TCP/TLS), ver instrumentacion.py.
+
+_config_lock = threading.Lock()
+_local = threading.local()
+_config = {'max_workers': 10, 'headers': {}, 'adapter': None, 'generacion': 0, 'controlador': None, 'archivo': None, 'modo_archivo': None, 'reintentos': PoliticaReintentos()}
+
+class _ConexionHTTP(HTTPConnection):
+    def connect(self):
+        with instrumentacion.medir('conexion'):
+            super().connect()
+
+class _ConexionHTTPS(HTTPSConnection):
+    def connect(self):
+        with instrumentacion.medir('conexion'):
+            super().connect()
+
+class _PoolHTTP(HTTPConnectionPool):
+    ConnectionCls = _ConexionHTTP
+
+class _PoolHTTPS(HTTPSConnectionPool):
+    ConnectionCls = _ConexionHTTPS
+
+def _nuevo_adapter(max_workers):
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, pool_block=True)
+    adapter.poolmanager.pool_classes_by_scheme = {'http': _PoolHTTP, 'https': _PoolHTTPS}
+    return adapter
+
+def configurar_pool(max_workers, headers=None, controlador=None):
+    """Dimensiona el pool de conexiones para `max_workers` hilos concurrentes e instala el controlador de tasa compartido."""
+    with _config_lock:
+        if _config['adapter'] is not None:
+            _config['adapter'].close()
+        _config['max_workers'] = max_workers
+        _config['headers'] = dict(headers or {})
+        _config['adapter'] = _nuevo_adapter(max_workers)
+        _config['generacion'] += 1
+        _config['controlador'] = controlador or ControladorTasa(concurrencia_maxima=max_workers)
+    # El archivo de páginas y las métricas también se pueden activar sin tocar los scripts, por variables de entorno.
+    instrumentacion.activar_desde_entorno()
+    if _config['archivo'] is None and os.environ.get('ENCUESTAS_ARCHIVO'):
+        configurar_archivo(os.environ['ENCUESTAS_ARCHIVO'], os.environ.get('ENCUESTAS_ARCHIVO_MODO', 'grabar'))
+
+def configurar_archivo(directorio, modo='grabar'):
+    """Activa el archivo de páginas HTML. Modos: 'grabar' (descarga y guarda), 'reproducir'
+    (sirve desde el archivo lo que ya esté y descarga el resto) y 'offline' (sólo archivo)."""
+    if modo not in MODOS:
+        raise ValueError(f"Modo de archivo inválido: {modo!r}. Opciones: {', '.join(MODOS)}")
+    _config['archivo'] = ArchivoHTML(directorio)
+    _config['modo_archivo'] = modo
+    print(f"Archivo de páginas en '{directorio}' (modo {modo}): {_config['archivo'].resumen()}")
+
+def configurar_reintentos(politica):
+    """Reemplaza la política de reintentos (ver reintentos.py); `reintentos.SIN_REINTENTOS` los desactiva."""
+    _config['reintentos'] = politica
+
+def obtener_politica_reintentos():
+    return _config['reintentos']
+
+def obtener_archivo():
+    return _config['archivo']
+
+def obtener_modo_archivo():
+    return _config['modo_archivo']
+
+def obtener_controlador():
+    return _config['controlador']
+
+def _adapter_actual():
+    with _config_lock:
+        if _config['adapter'] is None:
+            _config['adapter'] = _nuevo_adapter(_config['max_workers'])
+            _config['generacion'] += 1
+        return _config['adapter'], _config['generacion'], _config['headers']
+
+def obtener_sesion():
+    """Devuelve la sesión del hilo actual, creándola sobre el pool compartido si hace falta."""
+    adapter, generacion, headers = _adapter_actual()
+    sesion = getattr(_local, 'sesion', None)
+    if sesion is None or _local.generacion != generacion:
+        sesion = requests.Session()
+        sesion.headers.update(headers)
+        sesion.mount('https://', adapter)
+        sesion.mount('http://', adapter)
+        _local.sesion = sesion
+        _local.generacion = generacion
+    return sesion
+
+# --- Envío de peticiones (archivo de páginas + controlador de tasa) ---
+def _enviar(metodo, url, **kwargs):
+    archivo, modo = _config['archivo'], _config['modo_archivo']
+    payload = kwargs.get('data')
+    if archivo is not None and modo in ('reproducir', 'offline'):
+        archivada = archivo.obtener(url, payload)
+        if archivada is not None:
+            return archivada
+        if modo == 'offline':
+            raise requests.exceptions.ConnectionError(f"Página no archivada (modo offline): {url} {payload}")
+    response = _enviar_red(metodo, url, **kwargs)
+    if archivo is not None and response.status_code == 200:
+        archivo.guardar(url, payload, response.status_code, response.encoding, response.content)
+    return response
+
+def _enviar_red(metodo, url, **kwargs):
+    """Envía la petición reintentando timeouts, errores de conexión y 429/5xx según la política configurada.
+    Si se agotan los intentos se propaga la última excepción o se devuelve la última respuesta de error."""
+    politica = _config['reintentos']
+    intento = 0
+    while True:
+        retry_after = None
+        try:
+            response = _enviar_una_vez(metodo, url, **kwargs)
+        except requests.exceptions.Timeout:
+            motivo = 'timeout'
+            if not politica.reintentar(motivo, intento): raise
+        except requests.exceptions.ConnectionError:
+            motivo = 'conexion'
+            if not politica.reintentar(motivo, intento): raise
+        else:
+            instrumentacion.contar('respuestas', estado=response.status_code)
+            if response.status_code not in ESTADOS_REINTENTABLES: return response
+            motivo = 'servidor'
+            if not politica.reintentar(motivo, intento): return response
+            retry_after = segundos_retry_after(response.headers.get('Retry-After'))
+        espera = politica.espera(motivo, intento, retry_after)
+        intento += 1
+        instrumentacion.contar('reintentos', motivo=motivo)
+        log.info("      [Reintento %d] %s en %s %s; esperando %.1fs...", intento, motivo, url, kwargs.get('data') or '', espera)
+        time.sleep(espera)
+
+def _enviar_una_vez(metodo, url, **kwargs):
+    sesion = obtener_sesion()
+    controlador = _config['controlador']
+    if controlador is None:
+        with instrumentacion.medir('peticion'):
+            response = sesion.request(metodo, url, **kwargs)
+        _contar_pagina(response)
+        return response
+    espera = time.monotonic()
+    with controlador.permiso():
+        inicio = time.monotonic()
+        instrumentacion.registrar('espera_tasa', inicio - espera)
+        try:
+            response = sesion.request(metodo, url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            controlador.registrar(timeout=True)
+            raise
+        finally:
+            instrumentacion.registrar('peticion', time.monotonic() - inicio)
+        _contar_pagina(response)
+        # Un Retry-After frena a todos los hilos, no sólo al que lo recibió.
+        pausa = segundos_retry_after(response.headers.get('Retry-After')) if response.status_code in ESTADOS_REINTENTABLES else None
+        if pausa is not None: pausa = min(pausa, _config['reintentos'].tope_retry_after)
+        controlador.registrar(time.monotonic() - inicio, response.status_code, pausa=pausa)
+    return response
+
+def _contar_pagina(response):
+    instrumentacion.contar('paginas')
+    instrumentacion.contar('bytes', len(response.content))
+
+def get(url, **kwargs):
+    return _enviar('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    return _enviar('POST', url, **kwargs)
@@ -0,0 +1,234 @@
+import argparse
+import html
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+# --- Sitio de encuestas simulado ---
+# Servidor HTTP local que responde los mismos formularios que index.php (anioSem / cod / docente)
+# con páginas generadas con la estructura de fixtures/: selects de periodos, materias y docentes,
+# bloques "Respuestas sobre la materia" / "Respuestas sobre el docente" y tabla de comentarios.
+# El contenido depende sólo de la semilla y del formulario, así que dos corridas contra el mismo
+# sitio descargan exactamente lo mismo. Además se puede configurar:
+#   latencia  demora media por respuesta en ms (lognormal: con la cola larga de un servidor real)
+#   errores   proporción de respuestas 503 (los scrapers las reintentan)
+#   relleno   KB de marcado inerte por página (estilos) para simular páginas más pesadas
+# Cada petición queda registrada (inicio, duración, estado, bytes) para bench_scrapers.py.
+#
+# Uso: python sitio_simulado.py [--puerto 8765] [--latencia 50] [--errores 0.01] [--relleno 20] ...
+#      ENCUESTAS_URL=http://127.0.0.1:8765/index.php python multithread_unificado.py
+
+MATERIAS_BASE = ['MATEMATICA', 'FISICA', 'QUIMICA', 'ESTABILIDAD', 'SISTEMAS DE REPRESENTACION', 'ELECTROTECNIA',
+                 'PROGRAMACION', 'TERMODINAMICA', 'MECANICA RACIONAL', 'COMPUTACION', 'ELECTRONICA', 'HIDRAULICA']
+APELLIDOS = ['GARCÍA', 'PÉREZ', 'LÓPEZ', 'GÓMEZ', 'FERNÁNDEZ', 'MARTÍNEZ', 'RODRÍGUEZ', 'SÁNCHEZ', 'ROMERO', 'DÍAZ',
+             'ÁLVAREZ', 'TORRES', 'RUIZ', 'MORALES', 'ACOSTA', 'MEDINA', 'CASTRO', 'SOSA', 'BENÍTEZ', 'NÚÑEZ']
+NOMBRES = ['María Laura', 'Juan', 'Ana', 'Pedro', 'Lucía', 'Martín', 'Sofía', 'Diego', 'Carla', 'Ignacio', 'Valeria', 'Tomás']
+RANGOS = ['Profesor Titular', 'Profesor Adjunto', 'JTP', 'Ayudante Diplomado', 'Ayudante Alumno']
+OPCIONES_MATERIA = ['Muy de acuerdo', 'De acuerdo', 'En desacuerdo', 'Muy en desacuerdo', 'No sabe / No contesta']
+OPCIONES_DOCENTE = ['Siempre', 'Casi siempre', 'A veces', 'Nunca']
+OPCIONES_SI_NO = ['Sí', 'No']
+FRASES = ['Muy buena cursada', 'los docentes siempre dispuestos a responder', 'los parciales fueron "largos", pero justos',
+          'se podría mejorar el material', 'faltan horarios de consulta', 'excelente predisposición', 'la carga horaria es excesiva',
+          'las clases prácticas ayudan mucho', 'el campus estuvo desactualizado', 'recomiendo la materia']
+
+def _html(texto):
+    return html.escape(texto, quote=True)
+
+class SitioSimulado:
+    def __init__(self, periodos=4, materias=60, docentes=6, preguntas=8, latencia=0.0, errores=0.0,
+                 relleno=0, sin_resultados=0.05, semilla=0):
+        self.periodos_totales = periodos
+        self.materias_por_periodo = materias
+        self.docentes_maximos = docentes
+        self.preguntas = preguntas
+        self.latencia = latencia / 1000
+        self.errores = errores
+        self.sin_resultados = sin_resultados
+        self.semilla = semilla
+        self._relleno = ''.join(f'.r{i} {{ margin: {i % 7}px; padding: {i % 5}px; }}\n' for i in range(relleno * 1024 // 32))
+        self._lock = threading.Lock()
+        self.registro = []
+
+    # --- Contenido determinista ---
+    def _azar(self, *partes):
+        return random.Random(zlib.crc32('|'.join(map(str, (self.semilla,) + partes)).encode('utf-8')))
+
+    def periodos(self):
+        """{valor: texto}, del más reciente al más antiguo, como en el sitio real."""
+        periodos = {}
+        for i in range(self.periodos_totales):
+            anio, cuatrimestre = 2024 - i // 2, 2 - i % 2
+            periodos[f'{anio}{cuatrimestre}'] = f"{anio} - {'Primer' if cuatrimestre == 1 else 'Segundo'} Semestre"
+        return periodos
+
+    def materias(self, anio_sem):
+        if anio_sem not in self.periodos(): return {}
+        # Cada periodo ofrece la mayoría de un mismo catálogo (así las materias se repiten entre periodos).
+        catalogo = []
+        for i in range(self.materias_por_periodo * 5 // 4):
+            base = MATERIAS_BASE[i % len(MATERIAS_BASE)]
+            catalogo.append((f"{base[0]}{i:04d}", f"{base} {['I', 'II', 'III', 'A', 'B'][i // len(MATERIAS_BASE) % 5]}"))
+        elegidas = sorted(self._azar('materias', anio_sem).sample(catalogo, min(len(catalogo), self.materias_por_periodo)))
+        return {codigo: f"{nombre} ({codigo})" for codigo, nombre in elegidas}
+
+    def docentes(self, anio_sem, cod):
+        azar = self._azar('docentes', anio_sem, cod)
+        personas = azar.sample([(a, n) for a in APELLIDOS for n in NOMBRES], azar.randint(1, self.docentes_maximos))
+        # Algunos docentes figuran sin rango, como en el sitio real.
+        return [f"{apellido}, {nombre}" + (f" ({azar.choice(RANGOS)})" if azar.random() > 0.1 else '') for apellido, nombre in personas]
+
+    def _bloque(self, titulo, azar, preguntas, opciones, detalle=None):
+        respuestas = azar.randint(5, 120)
+        partes = [f'  <h3>{titulo}</h3>\n', f'  <p class="text-muted">{_html(detalle or f"Cantidad de encuestas respondidas: {respuestas}")}</p>\n']
+        for i, pregunta in enumerate(preguntas, 1):
+            opciones_pregunta = OPCIONES_SI_NO if i == len(preguntas) else opciones
+            pesos = [azar.random() ** 2 for _ in opciones_pregunta]
+            votos = [0] * len(opciones_pregunta)
+            for elegido in azar.choices(range(len(opciones_pregunta)), weights=pesos, k=respuestas):
+                votos[elegido] += 1
+            partes.append(f'  <div class="d-flex justify-content-between align-items-center mt-3">\n    <h5>{i}. {_html(pregunta)}</h5>\n  </div>\n'
+                          '  <table class="table table-sm table-bordered">\n'
+                          '    <thead><tr>' + ''.join(f'<th>{_html(o)}</th>' for o in opciones_pregunta) + '</tr></thead>\n'
+                          '    <tbody><tr>' + ''.join(f'<td>{v}</td>' for v in votos) + '</tr></tbody>\n  </table>\n')
+        return ''.join(partes)
+
+    def _comentarios(self, azar):
+        filas = []
+        for c in range(azar.randint(0, 12)):
+            # Algunos comentarios vacíos y otros con saltos de línea, como en fixtures/materia.html.
+            texto = azar.choice([', ', '; ']).join(azar.sample(FRASES, azar.randint(1, 3))).capitalize() + '.'
+            texto = _html(texto).replace('; ', ';<br>') if azar.random() > 0.2 else '   '
+            filas.append(f'    <tr><td>Com. {c % 4 + 1}</td><td>{texto}</td></tr>\n')
+        return '  <h3>Comentarios</h3>\n  <table id="tblComent" class="table table-striped">\n    <tr><th>Comisión</th><th>Comentario</th></tr>\n' + ''.join(filas) + '  </table>\n'
+
+    def _select(self, nombre, rotulo, opciones, elegida=None):
+        filas = [f'      <option value="">{rotulo}</option>\n']
+        filas += [f'      <option value="{_html(valor)}"{" selected" if valor == elegida else ""}>{_html(texto)}</option>\n' for valor, texto in opciones]
+        return f'    <select name="{nombre}" class="form-control" onchange="this.form.submit()">\n' + ''.join(filas) + '    </select>\n'
+
+    def pagina(self, formulario):
+        """HTML de index.php para un formulario {'anioSem', 'cod', 'docente'} (cualquiera puede faltar)."""
+        anio_sem, cod, docente = formulario.get('anioSem', ''), formulario.get('cod', ''), formulario.get('docente', '')
+        periodos = self.periodos()
+        # La opción "2023/2024" (con barra) también está en el sitio real y los scrapers la descartan.
+        selects = self._select('anioSem', 'Seleccione un período', [('2023/2024', '2023/2024')] + list(periodos.items()), anio_sem)
+        materias = self.materias(anio_sem)
+        selects += self._select('cod', 'Seleccione una materia', list(materias.items()), cod)
+        cuerpo = ''
+        if cod in materias:
+            azar = self._azar('resultados', anio_sem, cod)
+            if azar.random() < self.sin_resultados:
+                cuerpo = '  <div class="alert alert-warning">No hay encuestas con suficientes respuestas para mostrar resultados.</div>\n'
+            else:
+                docentes = self.docentes(anio_sem, cod)
+                selects += self._select('docente', 'Seleccione un docente', [(d, d) for d in docentes])
+                if docente in docentes:
+                    preguntas = [f'¿El docente {p}?' for p in ['explica con claridad', 'responde consultas en clase', 'cumple con el horario',
+                                                               'propone actividades útiles', 'evalúa lo que se enseñó', 'es accesible fuera de clase']]
+                    cuerpo += self._bloque('Respuestas sobre el docente', self._azar('docente', anio_sem, cod, docente), preguntas, OPCIONES_DOCENTE, f'Docente: {docente}')
+                preguntas = [f'Pregunta {i + 1} sobre la materia: ¿los contenidos del tema {i + 1} fueron adecuados?' for i in range(self.preguntas)]
+                cuerpo += self._bloque('Respuestas sobre la materia', azar, preguntas, OPCIONES_MATERIA)
+                cuerpo += self._comentarios(azar)
+        return ('<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="utf-8">\n<title>Encuestas de opinión - Facultad de Ingeniería - UNLP</title>\n'
+                f'<style>\n{self._relleno}</style>\n</head>\n<body>\n<div class="container mt-4">\n'
+                f'  <form method="post" action="index.php" class="form-inline">\n{selects}  </form>\n  <hr>\n{cuerpo}</div>\n'
+                '<footer class="footer mt-5"><p>Facultad de Ingeniería - UNLP</p></footer>\n</body>\n</html>\n')
+
+    # --- Latencia, errores y registro ---
+    def demora(self):
+        if self.latencia <= 0: return 0.0
+        # Lognormal con media `latencia`: mediana algo menor y p99 ~3 veces la media.
+        sigma = 0.6
+        return random.lognormvariate(math.log(self.latencia) - sigma ** 2 / 2, sigma)
+
+    def registrar(self, inicio, duracion, estado, tamanio):
+        with self._lock:
+            self.registro.append((inicio, duracion, estado, tamanio))
+
+    def reiniciar_registro(self):
+        with self._lock:
+            registro, self.registro = self.registro, []
+        return registro
+
+def resumen(registro):
+    """Peticiones, errores, bytes, peticiones/s y latencias p50/p99 (en ms) de un registro."""
+    if not registro: return {'peticiones': 0, 'errores': 0, 'mb': 0.0, 'req_s': 0.0, 'p50_ms': None, 'p99_ms': None}
+    duraciones = sorted(duracion for _, duracion, _, _ in registro)
+    lapso = max(inicio + duracion for inicio, duracion, _, _ in registro) - min(inicio for inicio, _, _, _ in registro)
+    percentil = lambda q: round(duraciones[min(len(duraciones) - 1, int(q * len(duraciones)))] * 1000, 1)
+    return {'peticiones': len(registro), 'errores': sum(1 for _, _, estado, _ in registro if estado != 200),
+            'mb': round(sum(tamanio for _, _, _, tamanio in registro) / 1e6, 2),
+            'req_s': round(len(registro) / lapso, 1) if lapso > 0 else 0.0, 'p50_ms': percentil(0.50), 'p99_ms': percentil(0.99)}
+
+# --- Servidor HTTP ---
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        self._responder({})
+
+    def do_POST(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        formulario = {clave: valores[0] for clave, valores in parse_qs(self.rfile.read(largo).decode('utf-8'), keep_blank_values=True).items()}
+        self._responder(formulario)
+
+    def _responder(self, formulario):
+        sitio = self.server.sitio
+        inicio = time.perf_counter()
+        if urlsplit(self.path).path not in ('/', '/index.php'):
+            estado, cuerpo = 404, b'<html><body>No encontrado</body></html>'
+        else:
+            time.sleep(sitio.demora())
+            if random.random() < sitio.errores:
+                estado, cuerpo = 503, b'<html><body>Servicio no disponible</body></html>'
+            else:
+                estado, cuerpo = 200, sitio.pagina(formulario).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+        sitio.registrar(inicio, time.perf_counter() - inicio, estado, len(cuerpo))
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # el motor asyncio abre hasta 100 conexiones de golpe
+
+def iniciar(sitio, puerto=0, host='127.0.0.1'):
+    """Levanta el servidor en un hilo de fondo; `servidor.url` es la URL para ENCUESTAS_URL."""
+    servidor = _Servidor((host, puerto), _Manejador)
+    servidor.sitio = sitio
+    servidor.url = f"http://{host}:{servidor.server_address[1]}/index.php"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sitio de encuestas simulado para probar y medir los scrapers sin red.")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--periodos', type=int, default=4, help="Cantidad de periodos (por defecto 4).")
+    parser.add_argument('--materias', type=int, default=60, help="Materias por periodo (por defecto 60).")
+    parser.add_argument('--docentes', type=int, default=6, help="Máximo de docentes por materia (por defecto 6).")
+    parser.add_argument('--preguntas', type=int, default=8, help="Preguntas sobre la materia (por defecto 8).")
+    parser.add_argument('--latencia', type=float, default=50, help="Demora media por respuesta, en ms (por defecto 50).")
+    parser.add_argument('--errores', type=float, default=0.0, help="Proporción de respuestas 503 (por defecto 0).")
+    parser.add_argument('--relleno', type=int, default=0, help="KB de marcado inerte agregado a cada página (por defecto 0).")
+    parser.add_argument('--sin-resultados', type=float, default=0.05, help="Proporción de materias sin resultados (por defecto 0.05).")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    sitio = SitioSimulado(args.periodos, args.materias, args.docentes, args.preguntas, args.latencia, args.errores,
+                          args.relleno, args.sin_resultados, args.semilla)
+    servidor = iniciar(sitio, args.puerto)
+    print(f"Sitio simulado en {servidor.url} (Ctrl+C para terminar)")
+    print(f"  export ENCUESTAS_URL={servidor.url}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        print(f"\nResumen: {resumen(sitio.reiniciar_registro())}")
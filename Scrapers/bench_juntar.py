@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import JuntarCSV
+import consolidacion
+
+# --- Comparación y benchmark de la consolidación ---
+# Genera CSV sintéticos con la forma de los que producen los scrapers (más algunos casos
+# raros: votos no numéricos, filas repetidas, docentes sin nombre o fuera del censo, una
+# materia con dos nombres), verifica que consolidacion.py produzca exactamente el mismo JSON
+# que la implementación original de JuntarCSV.py (sobre los CSV leídos como texto, como lo hacía
+# el original) y mide ambas a distintas escalas. También
+# compara la memoria de los datos cargados compactos (cargar_csvs) contra leerlos como texto.
+#
+# Uso: python bench_juntar.py [escala ...]   (por defecto 1 10 100)
+
+OPCIONES = ['Muy bueno', 'Bueno', 'Regular', 'Malo', 'No sabe']
+RANGOS = ['Titular', 'Adjunto', 'JTP', 'Ayudante', 'No especificado']
+
+def generar_csvs(directorio, escala, semilla=0):
+    """Escala 1 = 2 periodos x 25 materias; la escala multiplica las materias por periodo."""
+    rnd = random.Random(semilla)
+    filas = {nombre: [] for nombre in JuntarCSV.ARCHIVOS_CSV}
+    for p in range(2):
+        periodo = f"202{p} - Primer semestre"
+        for m in range(25 * escala):
+            codigo, nombre_materia = f"M{m:05d}", f"MATERIA {m} (M{m:05d})"
+            docentes = [(f"Docente {m}-{d}, Nombre", rnd.choice(RANGOS)) for d in range(rnd.randint(1, 8))]
+            if m % 97 == 0: docentes.append(('', 'No especificado'))
+            if m % 53 == 0: docentes.append(docentes[0])
+            for nombre, rango in docentes:
+                filas['censo_docentes'].append([periodo, codigo, nombre_materia, nombre, rango])
+            if m % 211 == 0:
+                filas['censo_docentes'].append([periodo, codigo, nombre_materia + ' (bis)', docentes[0][0], docentes[0][1]])
+            for q in rnd.sample(range(12), 8):
+                for opcion in OPCIONES:
+                    votos = str(rnd.randint(0, 60)) if rnd.random() > 0.01 else rnd.choice(['', 'N/A', '3.0'])
+                    filas['encuesta_materia'].append([periodo, codigo, nombre_materia, f"Pregunta {q} sobre la materia", opcion, votos])
+            for nombre, _ in docentes[:6] + ([(f"Fuera del censo {m}", '')] if m % 31 == 0 else []):
+                for q in range(6):
+                    for opcion in OPCIONES:
+                        filas['encuesta_docente'].append([periodo, codigo, nombre_materia, nombre, f"Pregunta {q} sobre el docente", opcion, str(rnd.randint(0, 30))])
+            if rnd.random() < 0.8:
+                for c in range(rnd.randint(1, 10)):
+                    filas['comentarios'].append([periodo, codigo, nombre_materia, str(c % 3 + 1), f"Comentario {c}, con \"comillas\" de {codigo}"])
+    encabezados = {
+        'encuesta_materia': ['periodo', 'materia_codigo', 'materia_nombre', 'pregunta', 'opcion_respuesta', 'cantidad_votos'],
+        'encuesta_docente': ['periodo', 'materia_codigo', 'materia_nombre', 'docente', 'pregunta', 'opcion_respuesta', 'cantidad_votos'],
+        'censo_docentes': ['periodo', 'materia_codigo', 'materia_nombre', 'docente_nombre', 'docente_rango'],
+        'comentarios': ['periodo', 'materia_codigo', 'materia_nombre', 'comision', 'comentario'],
+    }
+    archivos = {}
+    for nombre, ruta in JuntarCSV.ARCHIVOS_CSV.items():
+        archivos[nombre] = os.path.join(directorio, ruta)
+        with open(archivos[nombre], 'w', newline='', encoding='utf-8-sig') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(encabezados[nombre])
+            escritor.writerows(filas[nombre])
+    return archivos, sum(len(f) for f in filas.values())
+
+def memoria_mb(dfs):
+    return sum(df.memory_usage(deep=True).sum() for df in dfs.values()) / 1e6
+
+def medir(funcion, dfs):
+    inicio = time.perf_counter()
+    texto = json.dumps(funcion(dfs), ensure_ascii=False, indent=2)
+    return time.perf_counter() - inicio, texto
+
+if __name__ == "__main__":
+    escalas = [int(e) for e in sys.argv[1:]] or [1, 10, 100]
+    ok = True
+    for escala in escalas:
+        with tempfile.TemporaryDirectory() as directorio:
+            archivos, filas = generar_csvs(directorio, escala)
+            dfs = JuntarCSV.cargar_csvs(archivos)
+            dfs_texto = {nombre: pd.read_csv(ruta, dtype=str).fillna('') for nombre, ruta in archivos.items()}
+        print(f"\nEscala {escala}x: {filas} filas de CSV")
+        t_rapido, json_rapido = medir(consolidacion.agregar_datos, dfs)
+        # La referencia corre como corría JuntarCSV.py original: sobre todo leído como texto.
+        t_original, json_original = medir(JuntarCSV.agregar_datos_referencia, dfs_texto)
+        _, json_texto = medir(consolidacion.agregar_datos, dfs_texto)
+        iguales = json_rapido == json_original == json_texto
+        ok = ok and iguales
+        print(f"-> JSON idéntico: {'sí' if iguales else 'NO'} ({len(json_rapido.encode('utf-8')) / 1e6:.1f} MB)")
+        print(f"-> Original (groupby.apply): {t_original:.2f} s")
+        print(f"-> Vectorizada:              {t_rapido:.2f} s")
+        print(f"-> Aceleración:              {t_original / t_rapido:.1f}x")
+        print(f"-> Memoria de los datos:     {memoria_mb(dfs):.1f} MB compactos, {memoria_mb(dfs_texto):.1f} MB como texto")
+    if not ok:
+        print("ERROR: las implementaciones no producen el mismo JSON.")
+        sys.exit(1)
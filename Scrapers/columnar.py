@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# --- Exportación columnar (Parquet) ---
+# Los cuatro datasets en Parquet, particionados por periodo al estilo Hive:
+#   <directorio>/<dataset>/periodo=<periodo>/parte-0.parquet
+#   <directorio>/indice.json     periodos en orden de aparición y particiones de cada dataset
+# Los textos que se repiten en cada fila (periodo, materia, pregunta, opción, docente...) van
+# codificados como diccionario, así que al leerlos son columnas categóricas (un entero por fila)
+# y no un objeto str por fila; cantidad_votos va como entero. Se pueden leer sólo algunas columnas
+# y algunos periodos, y `pd.read_parquet('<directorio>/<dataset>')` también funciona.
+# Requiere 'pyarrow' (opcional: sin él el resto del proyecto funciona igual).
+
+ARCHIVO_INDICE = 'indice.json'
+COLUMNAS_DICCIONARIO = {'periodo', 'materia_codigo', 'materia_nombre', 'pregunta', 'opcion_respuesta',
+                        'docente', 'docente_nombre', 'docente_rango', 'comision'}
+
+def _requerir_pyarrow():
+    if pq is None:
+        raise RuntimeError("Para leer o escribir Parquet hace falta 'pyarrow' (pip install pyarrow).")
+
+def _columna_arrow(nombre, serie):
+    if nombre == 'cantidad_votos':
+        # Misma lectura que la consolidación (to_numeric), pero guardando los vacíos como nulos.
+        numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+        nulos = np.isnan(numeros)
+        return pa.array(np.trunc(np.where(nulos, 0, numeros)).astype(np.int64), mask=nulos, type=pa.int32())
+    valores = pa.array(serie.to_numpy(dtype=object), type=pa.string())
+    return valores.dictionary_encode() if nombre in COLUMNAS_DICCIONARIO else valores
+
+def exportar_parquet(dfs, directorio):
+    """Escribe los DataFrames de JuntarCSV.cargar_csvs() como Parquet particionado por periodo."""
+    _requerir_pyarrow()
+    temporal = directorio.rstrip('/\\') + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    indice = {'periodos': {}, 'datasets': {}}
+    # Orden de los periodos: el del censo (que es el que sigue la consolidación), después el resto.
+    for nombre in ['censo_docentes'] + sorted(set(dfs) - {'censo_docentes'}):
+        df = dfs.get(nombre)
+        if df is None: continue
+        particiones = {}
+        for periodo, filas in df.groupby('periodo', sort=False):
+            indice['periodos'].setdefault(periodo, len(indice['periodos']))
+            relativa = f"{nombre}/periodo={quote(periodo, safe='')}/parte-0.parquet"
+            os.makedirs(os.path.dirname(os.path.join(temporal, relativa)), exist_ok=True)
+            # La columna 'periodo' va en el nombre de la carpeta (partición Hive), no dentro del archivo.
+            tabla = pa.table({c: _columna_arrow(c, filas[c]) for c in filas.columns if c != 'periodo'})
+            pq.write_table(tabla, os.path.join(temporal, relativa), compression='zstd')
+            particiones[periodo] = relativa
+        indice['datasets'][nombre] = {'columnas': list(df.columns), 'filas': len(df), 'particiones': particiones}
+    indice['periodos'] = list(indice['periodos'])
+    with open(os.path.join(temporal, ARCHIVO_INDICE), 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+    return indice
+
+def leer_indice(directorio):
+    with open(os.path.join(directorio, ARCHIVO_INDICE), encoding='utf-8') as f:
+        return json.load(f)
+
+def cargar_parquet(directorio, periodos=None, columnas=None, indice=None):
+    """Los mismos DataFrames que JuntarCSV.cargar_csvs(), con los textos repetidos como categóricos.
+    `periodos` y `columnas` ({dataset: [columnas]}) limitan lo que se lee."""
+    _requerir_pyarrow()
+    indice = indice or leer_indice(directorio)
+    periodos = indice['periodos'] if periodos is None else [p for p in indice['periodos'] if p in set(periodos)]
+    dfs = {}
+    for nombre, dataset in indice['datasets'].items():
+        pedidas = (columnas or {}).get(nombre, dataset['columnas'])
+        tablas = []
+        for periodo in periodos:
+            if periodo not in dataset['particiones']: continue
+            tabla = pq.read_table(os.path.join(directorio, *dataset['particiones'][periodo].split('/')), columns=[c for c in pedidas if c != 'periodo'])
+            if 'periodo' in pedidas:
+                constante = pa.DictionaryArray.from_arrays(pa.array(np.zeros(tabla.num_rows, dtype=np.int32)), pa.array([periodo]))
+                tabla = tabla.add_column(0, 'periodo', constante)
+            tablas.append(tabla)
+        if tablas:
+            # concat + to_pandas unifica los diccionarios de las particiones en una sola columna categórica.
+            dfs[nombre] = pa.concat_tables(tablas).to_pandas()[pedidas]
+        else:
+            dfs[nombre] = pd.DataFrame({c: pd.Series(dtype=object) for c in pedidas})
+    return dfs
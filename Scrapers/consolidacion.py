@@ -0,0 +1,386 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import entorno
+entorno.usar_modulos_unlp()
+# Tiempos por fase (carga, agrupado, cruce, armado, serializacion, volcado): UNLP/instrumentacion.py.
+import instrumentacion
+import registros
+
+# --- Consolidación vectorizada ---
+# Arma la misma estructura anidada que la implementación original de JuntarCSV.py
+# (periodo -> materia -> encuesta_materia / comentarios / docentes), byte a byte, pero sin
+# groupby().apply(), sin el merge censo x encuesta_docente (que multiplicaba filas) y sin
+# iterrows(): las claves se factorizan a enteros, cada tabla se ordena una sola vez
+# (np.lexsort, estable) y la estructura se construye en una única pasada lineal.
+
+_VACIO = pd.DataFrame()
+
+def _codigos(*columnas):
+    """Combina varias columnas de texto en un código entero por fila (claves categóricas)."""
+    codigo = np.zeros(len(columnas[0]), dtype=np.int64)
+    for columna in columnas:
+        codigos_columna, categorias = pd.factorize(columna)
+        codigo = codigo * (len(categorias) + 1) + codigos_columna
+    return codigo
+
+def _rango_lexico(columna):
+    """Código entero por valor en orden alfabético. En las columnas categóricas (p. ej. leídas de Parquet)
+    el orden de las categorías no tiene por qué ser alfabético, así que se reordena sólo el diccionario."""
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        categorias = np.asarray(columna.cat.categories, dtype=object)
+        rango = np.empty(len(categorias), dtype=np.int64)
+        rango[np.argsort(categorias, kind='stable')] = np.arange(len(categorias))
+        return rango[columna.cat.codes.to_numpy()]
+    return pd.factorize(columna, sort=True)[0]
+
+def _votos(columna):
+    # Misma coerción que el original (to_numeric + fillna(0) + astype(int)), sobre toda la columna de una vez.
+    return pd.to_numeric(columna, errors='coerce').fillna(0).astype(int).to_numpy()
+
+def _encuestas_por_clave(df, columnas_clave):
+    """{clave: [{"pregunta", "respuestas"}]} con las preguntas en orden alfabético y las opciones en orden de aparición."""
+    if df.empty: return {}
+    grupo = _codigos(*(df[c] for c in columnas_clave))
+    pregunta_rango = _rango_lexico(df['pregunta'])
+    orden = np.lexsort((pregunta_rango, grupo))
+    claves = list(zip(*(df[c].to_numpy()[orden].tolist() for c in columnas_clave)))
+    grupos = grupo[orden].tolist()
+    preguntas = df['pregunta'].to_numpy()[orden].tolist()
+    opciones = df['opcion_respuesta'].to_numpy()[orden].tolist()
+    votos = _votos(df['cantidad_votos'])[orden].tolist()
+    resultado = {}
+    grupo_anterior = pregunta_anterior = None
+    for clave, g, pregunta, opcion, voto in zip(claves, grupos, preguntas, opciones, votos):
+        if g != grupo_anterior:
+            encuestas = resultado[clave] = []
+            grupo_anterior, pregunta_anterior = g, None
+        if pregunta != pregunta_anterior:
+            respuestas = {}
+            encuestas.append({"pregunta": pregunta, "respuestas": respuestas})
+            pregunta_anterior = pregunta
+        respuestas[opcion] = voto
+    return resultado
+
+def _comentarios_por_materia(df):
+    if df.empty: return {}
+    resultado = {}
+    for periodo, codigo, comision, comentario in zip(df['periodo'].tolist(), df['materia_codigo'].tolist(), df['comision'].tolist(), df['comentario'].tolist()):
+        resultado.setdefault((periodo, codigo), []).append({'comision': comision, 'comentario': comentario})
+    return resultado
+
+def _docentes_por_materia(censo, encuesta_docente):
+    """Docentes de cada materia según el censo (primera aparición, con su rango), cada uno con su encuesta."""
+    encuestas = _encuestas_por_clave(encuesta_docente.rename(columns={'docente': 'docente_nombre'}), ['periodo', 'materia_codigo', 'docente_nombre'])
+    resultado = {}
+    vistos = set()
+    for periodo, codigo, nombre, rango in zip(censo['periodo'].tolist(), censo['materia_codigo'].tolist(), censo['docente_nombre'].tolist(), censo['docente_rango'].tolist()):
+        docentes = resultado.setdefault((periodo, codigo), [])
+        if (periodo, codigo, nombre) in vistos or not nombre: continue
+        vistos.add((periodo, codigo, nombre))
+        docentes.append({"nombre": nombre, "rango": rango, "encuesta_docente": encuestas.get((periodo, codigo, nombre), [])})
+    return resultado
+
+def agregar_datos(dfs, con_datos=None):
+    """Recibe los DataFrames de JuntarCSV.cargar_csvs() y devuelve el diccionario a volcar como JSON.
+    `con_datos` son los datasets cuya sección se incluye (por defecto, los que no están vacíos);
+    si alguno no está en `dfs` su sección queda vacía."""
+    if con_datos is None:
+        con_datos = {nombre for nombre, df in dfs.items() if not df.empty}
+    censo = dfs['censo_docentes']
+    secciones = []
+    with instrumentacion.medir('agrupado'):
+        if 'encuesta_materia' in con_datos:
+            secciones.append(('encuesta_materia', _encuestas_por_clave(dfs.get('encuesta_materia', _VACIO), ['periodo', 'materia_codigo'])))
+        if 'comentarios' in con_datos:
+            secciones.append(('comentarios', _comentarios_por_materia(dfs.get('comentarios', _VACIO))))
+    if 'encuesta_docente' in con_datos:
+        with instrumentacion.medir('cruce'):
+            secciones.append(('docentes', _docentes_por_materia(censo, dfs.get('encuesta_docente', _VACIO))))
+
+    datos_consolidados = {}
+    vistas = set()
+    with instrumentacion.medir('armado'):
+        for periodo, codigo, nombre in zip(censo['periodo'].tolist(), censo['materia_codigo'].tolist(), censo['materia_nombre'].tolist()):
+            # Como drop_duplicates() en el original: si una materia figura con dos nombres, gana el último nombre distinto.
+            if (periodo, codigo, nombre) in vistas: continue
+            vistas.add((periodo, codigo, nombre))
+            materia = {'periodo': periodo, 'materia_codigo': codigo, 'materia_nombre': nombre}
+            for seccion, por_materia in secciones:
+                materia[seccion] = por_materia.get((periodo, codigo), [])
+            datos_consolidados.setdefault(periodo, {})[codigo] = materia
+    return datos_consolidados
+
+# --- Salida JSON (completa o por streaming) ---
+def abrir_json(ruta, comprimir=False):
+    if comprimir:
+        return gzip.open(ruta, 'wt', encoding='utf-8', compresslevel=6)
+    return open(ruta, 'w', encoding='utf-8')
+
+def _fragmento_periodo(periodo, datos_periodo, compacto):
+    """'"periodo": {...}' tal como aparece dentro del JSON completo (indent=2 o compacto)."""
+    if compacto:
+        return json.dumps({periodo: datos_periodo}, ensure_ascii=False, separators=(',', ':'))[1:-1]
+    texto = json.dumps({periodo: datos_periodo}, ensure_ascii=False, indent=2)
+    return texto[2:-2] # sin '{\n' ni '\n}': ya viene indentado un nivel
+
+class EscritorJSON:
+    """Escribe el objeto periodo -> materias de a un periodo por vez, con el mismo resultado que json.dump()."""
+    def __init__(self, archivo, compacto=False):
+        self.archivo = archivo
+        self.compacto = compacto
+        self.periodos = 0
+
+    def escribir_periodo(self, periodo, datos_periodo):
+        separador = ',' if self.compacto else ',\n'
+        apertura = '{' if self.compacto else '{\n'
+        with instrumentacion.medir('serializacion'):
+            fragmento = _fragmento_periodo(periodo, datos_periodo, self.compacto)
+        with instrumentacion.medir('volcado'):
+            self.archivo.write((separador if self.periodos else apertura) + fragmento)
+        self.periodos += 1
+
+    def cerrar(self):
+        if not self.periodos:
+            self.archivo.write('{}')
+        else:
+            self.archivo.write('}' if self.compacto else '\n}')
+
+def escribir_json(periodos, ruta, compacto=False, comprimir=False):
+    """Vuelca los pares (periodo, datos_periodo) como un único objeto JSON."""
+    with abrir_json(ruta, comprimir) as f:
+        escritor = EscritorJSON(f, compacto)
+        for periodo, datos_periodo in periodos:
+            escritor.escribir_periodo(periodo, datos_periodo)
+        escritor.cerrar()
+
+# --- Consolidación por streaming (un periodo en memoria a la vez) ---
+def dividir_por_periodo(archivos, directorio, filas_por_bloque=200_000):
+    """Lee cada CSV en bloques y reparte sus filas en un CSV por (dataset, periodo) dentro de `directorio`.
+    Devuelve los periodos en el orden en que aparecen en el censo y {periodo: {dataset: ruta}}."""
+    orden_periodos = {}
+    particiones = {}
+    indices = {}
+    for nombre, ruta in archivos.items():
+        if not os.path.exists(ruta): continue
+        for bloque in pd.read_csv(ruta, dtype=str, chunksize=filas_por_bloque):
+            bloque = bloque.fillna('')
+            for periodo, filas in bloque.groupby('periodo', sort=False):
+                if nombre == 'censo_docentes':
+                    orden_periodos.setdefault(periodo, len(orden_periodos))
+                if periodo not in particiones:
+                    particiones[periodo] = {}
+                    indices[periodo] = len(indices)
+                rutas = particiones[periodo]
+                if nombre not in rutas:
+                    rutas[nombre] = os.path.join(directorio, f"{nombre}_{indices[periodo]}.csv")
+                    filas.to_csv(rutas[nombre], index=False)
+                else:
+                    filas.to_csv(rutas[nombre], mode='a', header=False, index=False)
+    return list(orden_periodos), particiones
+
+def periodos_streaming(archivos):
+    """Genera (periodo, datos_periodo) en el orden del censo, cargando en memoria un periodo por vez."""
+    with tempfile.TemporaryDirectory(prefix='consolidacion_') as directorio:
+        with instrumentacion.medir('particion'):
+            periodos, particiones = dividir_por_periodo(archivos, directorio)
+        # Un dataset sin filas en un periodo igual aporta su sección (vacía), como en la consolidación completa.
+        con_datos = {nombre for rutas in particiones.values() for nombre in rutas}
+        for periodo in periodos:
+            with instrumentacion.medir('carga'):
+                dfs = {nombre: registros.leer_csv(ruta) for nombre, ruta in particiones[periodo].items()}
+            yield periodo, agregar_datos(dfs, con_datos)[periodo]
+            print(f"  -> Periodo '{periodo}' consolidado.")
+
+# --- Salida particionada (un archivo por periodo o por materia, más un índice) ---
+# En vez de un único JSON, escribe fragmentos que se pueden descargar y cachear por separado:
+#   <directorio>/indice.json
+#   <directorio>/<periodo>.json               (particionado='periodo': {materia: {...}})
+#   <directorio>/<periodo>/<materia>.json     (particionado='materia': {...} de una materia)
+# El índice lista, en orden, cada periodo con sus materias (código -> nombre) y cada fragmento con
+# su archivo, tamaño en bytes y SHA-256. Al regenerar sólo se reescriben los fragmentos cuyo hash
+# cambió (y se borran los que ya no existen), así los ETag/caché de los que no cambiaron siguen valiendo.
+
+ARCHIVO_INDICE = 'indice.json'
+
+def _nombre_archivo(texto, usados):
+    """Nombre de archivo seguro y legible ('2023 - Primer semestre' -> '2023-primer-semestre'), sin repetir."""
+    base = re.sub(r'[^a-z0-9]+', '-', unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().lower()).strip('-') or 'sin-nombre'
+    nombre = base
+    if nombre in usados:
+        nombre = f"{base}-{hashlib.sha256(str(texto).encode('utf-8')).hexdigest()[:8]}"
+    usados.add(nombre)
+    return nombre
+
+def _escribir_atomico(ruta, contenido):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+
+class EscritorFragmentos:
+    """Misma interfaz que EscritorJSON (escribir_periodo/cerrar), pero a un directorio de fragmentos."""
+    def __init__(self, directorio, particionado='periodo', compacto=False, comprimir=False):
+        if particionado not in ('periodo', 'materia'):
+            raise ValueError(f"Particionado desconocido: '{particionado}' (usar 'periodo' o 'materia')")
+        self.directorio = directorio
+        self.particionado = particionado
+        self.compacto = compacto
+        self.comprimir = comprimir
+        self.extension = '.json.gz' if comprimir else '.json'
+        self.ruta_indice = os.path.join(directorio, ARCHIVO_INDICE)
+        self.anteriores = {}
+        if os.path.exists(self.ruta_indice):
+            with open(self.ruta_indice, encoding='utf-8') as f:
+                self.anteriores = {fragmento['archivo']: fragmento for fragmento in _fragmentos_indice(json.load(f))}
+        self.periodos = {}
+        self._nombres_periodo = set()
+        self.escritos = self.sin_cambios = self.eliminados = 0
+
+    def _serializar(self, datos):
+        if self.compacto:
+            texto = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+        else:
+            texto = json.dumps(datos, ensure_ascii=False, indent=2)
+        contenido = texto.encode('utf-8')
+        # mtime=0: el mismo contenido da siempre los mismos bytes comprimidos (y el mismo hash).
+        return gzip.compress(contenido, compresslevel=6, mtime=0) if self.comprimir else contenido
+
+    def _fragmento(self, archivo, datos):
+        with instrumentacion.medir('serializacion'):
+            contenido = self._serializar(datos)
+        huella = hashlib.sha256(contenido).hexdigest()
+        anterior = self.anteriores.get(archivo)
+        ruta = os.path.join(self.directorio, *archivo.split('/'))
+        if anterior and anterior['sha256'] == huella and os.path.exists(ruta) and os.path.getsize(ruta) == len(contenido):
+            self.sin_cambios += 1
+        else:
+            with instrumentacion.medir('volcado'):
+                _escribir_atomico(ruta, contenido)
+            self.escritos += 1
+        return {'archivo': archivo, 'bytes': len(contenido), 'sha256': huella}
+
+    def escribir_periodo(self, periodo, datos_periodo):
+        nombre_periodo = _nombre_archivo(periodo, self._nombres_periodo)
+        entrada = {'materias': {codigo: materia['materia_nombre'] for codigo, materia in datos_periodo.items()}}
+        if self.particionado == 'periodo':
+            entrada.update(self._fragmento(nombre_periodo + self.extension, datos_periodo))
+        else:
+            usados = set()
+            entrada['fragmentos'] = {codigo: self._fragmento(f"{nombre_periodo}/{_nombre_archivo(codigo, usados)}{self.extension}", materia)
+                                     for codigo, materia in datos_periodo.items()}
+        self.periodos[periodo] = entrada
+
+    def cerrar(self):
+        """Borra los fragmentos que ya no corresponden y escribe el índice (al final, para que nunca
+        apunte a un fragmento a medio escribir)."""
+        indice = {'particionado': self.particionado, 'compacto': self.compacto, 'gzip': self.comprimir, 'periodos': self.periodos}
+        vigentes = {fragmento['archivo'] for fragmento in _fragmentos_indice(indice)}
+        for archivo in self.anteriores:
+            ruta = os.path.join(self.directorio, *archivo.split('/'))
+            if archivo not in vigentes and os.path.exists(ruta):
+                os.remove(ruta)
+                self.eliminados += 1
+                try:
+                    os.rmdir(os.path.dirname(ruta)) # la carpeta del periodo, si quedó vacía
+                except OSError:
+                    pass
+        _escribir_atomico(self.ruta_indice, json.dumps(indice, ensure_ascii=False, indent=None if self.compacto else 2).encode('utf-8'))
+
+def _fragmentos_indice(indice):
+    for entrada in indice.get('periodos', {}).values():
+        if 'archivo' in entrada:
+            yield entrada
+        yield from entrada.get('fragmentos', {}).values()
+
+def escribir_fragmentos(periodos, directorio, particionado='periodo', compacto=False, comprimir=False):
+    """Vuelca los pares (periodo, datos_periodo) como fragmentos + índice. Devuelve el escritor (con sus contadores)."""
+    escritor = EscritorFragmentos(directorio, particionado, compacto, comprimir)
+    for periodo, datos_periodo in periodos:
+        escritor.escribir_periodo(periodo, datos_periodo)
+    escritor.cerrar()
+    return escritor
+
+def _leer_json(ruta):
+    with (gzip.open(ruta, 'rt', encoding='utf-8') if ruta.endswith('.gz') else open(ruta, encoding='utf-8')) as f:
+        return json.load(f)
+
+def leer_salida(ruta, particionado=None):
+    """Lee una salida ya escrita (JSON único o directorio de fragmentos) como {periodo: {codigo: materia}}."""
+    if not particionado:
+        return _leer_json(ruta)
+    indice = _leer_json(os.path.join(ruta, ARCHIVO_INDICE))
+    datos = {}
+    for periodo, entrada in indice['periodos'].items():
+        if 'archivo' in entrada:
+            datos[periodo] = _leer_json(os.path.join(ruta, *entrada['archivo'].split('/')))
+        else:
+            datos[periodo] = {codigo: _leer_json(os.path.join(ruta, *fragmento['archivo'].split('/'))) for codigo, fragmento in entrada['fragmentos'].items()}
+    return datos
+
+# --- Consolidación incremental ---
+# Cada (periodo, materia_codigo) tiene una huella: por dataset, un hash de 64 bits de sus filas de
+# esa materia que depende también del orden (el JSON respeta el orden de aparición). Si la huella
+# no cambió desde la consolidación anterior, el bloque de esa materia en el JSON tampoco, así que
+# se toma de la salida anterior y sólo se vuelven a agregar las materias nuevas o modificadas.
+
+def huellas_por_materia(dfs):
+    """{periodo: {materia_codigo: huella}} a partir de los DataFrames de cargar_csvs()."""
+    partes = {}
+    for nombre in sorted(dfs):
+        df = dfs[nombre]
+        if df.empty: continue
+        grupo = _codigos(df['periodo'], df['materia_codigo'])
+        orden = np.argsort(grupo, kind='stable')
+        grupo = grupo[orden]
+        inicios = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+        posicion = np.arange(len(grupo)) - np.repeat(inicios, np.diff(np.r_[inicios, len(grupo)]))
+        filas = pd.util.hash_pandas_object(df, index=False).to_numpy()[orden]
+        # hash(fila XOR posición) y suma por grupo (con desborde, en uint64): intercambiar dos filas cambia la huella.
+        sumas = np.add.reduceat(pd.util.hash_array(filas ^ posicion.astype(np.uint64)), inicios)
+        periodos = df['periodo'].to_numpy()[orden][inicios].tolist()
+        codigos = df['materia_codigo'].to_numpy()[orden][inicios].tolist()
+        for periodo, codigo, suma in zip(periodos, codigos, sumas.tolist()):
+            partes.setdefault((periodo, codigo), []).append(f"{nombre}:{suma:016x}")
+    huellas = {}
+    for (periodo, codigo), hashes in partes.items():
+        huellas.setdefault(periodo, {})[codigo] = hashlib.sha256('|'.join(hashes).encode('utf-8')).hexdigest()[:32]
+    return huellas
+
+def filtrar_materias(dfs, claves):
+    """Deja en cada DataFrame sólo las filas de las (periodo, materia_codigo) indicadas."""
+    claves = pd.MultiIndex.from_tuples(list(claves), names=['periodo', 'materia_codigo']) if claves else pd.MultiIndex.from_arrays([[], []])
+    return {nombre: df[pd.MultiIndex.from_arrays([df['periodo'], df['materia_codigo']]).isin(claves)] for nombre, df in dfs.items()}
+
+def periodos_incrementales(dfs, huellas, huellas_anteriores, datos_anteriores):
+    """Genera (periodo, datos_periodo) igual que agregar_datos(dfs), pero agregando sólo las materias cuya
+    huella cambió respecto de `huellas_anteriores`; las demás se copian de `datos_anteriores`.
+    Devuelve además la cantidad de materias re-agregadas."""
+    censo = dfs['censo_docentes']
+    # El orden de periodos y materias es el de agregar_datos(): primera aparición en el censo.
+    orden = {}
+    for periodo, codigo in zip(censo['periodo'].tolist(), censo['materia_codigo'].tolist()):
+        orden.setdefault(periodo, {}).setdefault(codigo, None)
+    cambiadas = {(periodo, codigo) for periodo, codigos in orden.items() for codigo in codigos
+                 if huellas[periodo][codigo] != huellas_anteriores.get(periodo, {}).get(codigo)
+                 or codigo not in datos_anteriores.get(periodo, {})}
+    if len(cambiadas) == sum(len(codigos) for codigos in orden.values()):
+        nuevos = agregar_datos(dfs) # todo cambió (o no hay salida anterior): no hace falta filtrar
+    else:
+        con_datos = {nombre for nombre, df in dfs.items() if not df.empty} # las secciones no dependen del filtro
+        nuevos = agregar_datos(filtrar_materias(dfs, cambiadas), con_datos) if cambiadas else {}
+
+    def generar():
+        for periodo, codigos in orden.items():
+            yield periodo, {codigo: nuevos[periodo][codigo] if (periodo, codigo) in cambiadas else datos_anteriores[periodo][codigo]
+                            for codigo in codigos}
+    return generar(), len(cambiadas)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# --- Módulos compartidos de UNLP/ ---
+# Los scripts de Scrapers/ usan módulos de UNLP/ (registros, instrumentacion, parser_rapido, ...)
+# importándolos por nombre, igual que los scrapers entre sí. Éste es el único lugar que agrega
+# UNLP/ al path: cada script llama a usar_modulos_unlp() antes de importarlos.
+
+DIRECTORIO_UNLP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'UNLP')
+
+def usar_modulos_unlp():
+    if DIRECTORIO_UNLP not in sys.path:
+        sys.path.append(DIRECTORIO_UNLP)
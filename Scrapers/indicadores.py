@@ -0,0 +1,188 @@
+import argparse
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import JuntarCSV
+import entorno
+
+# --- Indicadores precalculados ---
+# Etapa posterior a JuntarCSV: en lugar de votos crudos por opción, una tabla compacta con una fila
+# por (periodo, materia, pregunta) y por (periodo, materia, docente, pregunta) con
+#   escala, respuestas, validas, media, indice, desvio, p25, mediana, p75, prop_1..prop_4, delta_media
+# * Las opciones se llevan a una escala ordinal (ESCALAS): 1 = peor ... k = mejor. Las que no están
+#   en ninguna escala ("No sabe / No contesta") cuentan en `respuestas` pero no en `validas`.
+# * media/desvio/percentiles son sobre la escala (1..k); indice = (media - 1) / (k - 1), entre 0 y 1,
+#   comparable entre escalas; prop_i es la proporción de respuestas válidas en el nivel i.
+# * delta_media: diferencia con la media de la misma materia (y docente) y pregunta en el periodo
+#   anterior en que tuvo respuestas.
+# Todo se calcula con operaciones vectorizadas de NumPy sobre códigos enteros (sin groupby().apply()).
+
+ARCHIVO_INDICADORES = 'indicadores.csv'
+
+ESCALAS = {
+    'acuerdo': ['Muy en desacuerdo', 'En desacuerdo', 'De acuerdo', 'Muy de acuerdo'],
+    'frecuencia': ['Nunca', 'A veces', 'Casi siempre', 'Siempre'],
+    'calificacion': ['Malo', 'Regular', 'Bueno', 'Muy bueno'],
+    'si_no': ['No', 'Sí'],
+}
+NIVELES = max(len(opciones) for opciones in ESCALAS.values())
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return re.sub(r'\s+', ' ', texto).strip().lower()
+
+_OPCIONES = {_normalizar(opcion): (i, nivel) for i, opciones in enumerate(ESCALAS.values()) for nivel, opcion in enumerate(opciones)}
+_NOMBRES_ESCALA = np.array(list(ESCALAS) + [''], dtype=object)
+_NIVELES_ESCALA = np.array([len(opciones) for opciones in ESCALAS.values()] + [0])
+
+def orden_periodos(periodos):
+    """Periodos en orden cronológico ('2023 - Primer semestre' < '2023 - Segundo semestre' < '2024 - ...')."""
+    def clave(periodo):
+        anio = re.search(r'\d{4}', periodo)
+        texto = _normalizar(periodo)
+        cuatrimestre = 1 if 'primer' in texto else 2 if 'segundo' in texto else 0
+        return (int(anio.group()) if anio else 0, cuatrimestre, periodo)
+    return sorted(periodos, key=clave)
+
+def calcular_indicadores(df, columnas_clave):
+    """Indicadores por grupo de `columnas_clave` (que terminan en 'pregunta') a partir de filas
+    (…, opcion_respuesta, cantidad_votos)."""
+    columnas = list(columnas_clave) + ['escala', 'respuestas', 'validas', 'media', 'indice', 'desvio', 'p25', 'mediana', 'p75'] + \
+               [f'prop_{i + 1}' for i in range(NIVELES)] + ['delta_media']
+    if df.empty: return pd.DataFrame(columns=columnas)
+
+    grupo = df.groupby(list(columnas_clave), sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    grupos = grupo.max() + 1
+    votos = pd.to_numeric(df['cantidad_votos'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    # Escala y nivel de cada fila: se resuelve una vez por opción distinta y se indexa por código.
+    codigos, opciones = pd.factorize(df['opcion_respuesta'])
+    por_opcion = np.array([_OPCIONES.get(_normalizar(opcion), (len(ESCALAS), -1)) for opcion in opciones], dtype=np.int64).reshape(-1, 2)
+    escala_fila, nivel_fila = por_opcion[codigos, 0], por_opcion[codigos, 1]
+    valida = nivel_fila >= 0
+
+    respuestas = np.bincount(grupo, weights=votos, minlength=grupos)
+    conteos = np.bincount(grupo[valida] * NIVELES + nivel_fila[valida], weights=votos[valida], minlength=grupos * NIVELES).reshape(grupos, NIVELES)
+    validas = conteos.sum(axis=1)
+    # Escala del grupo: la de sus opciones válidas (si mezclara escalas, la primera de ESCALAS).
+    escala = np.full(grupos, len(ESCALAS))
+    np.minimum.at(escala, grupo[valida], escala_fila[valida])
+    k = _NIVELES_ESCALA[escala]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        proporciones = conteos / validas[:, None]
+        valores = np.arange(1, NIVELES + 1)
+        media = proporciones @ valores
+        desvio = np.sqrt(np.maximum(proporciones @ valores ** 2 - media ** 2, 0))
+        indice = (media - 1) / (k - 1)
+    acumulada = np.cumsum(proporciones, axis=1)
+    def percentil(q):
+        # Primer nivel cuya proporción acumulada alcanza q (percentil de una distribución discreta).
+        nivel = np.argmax(acumulada >= q - 1e-12, axis=1) + 1.0
+        nivel[validas == 0] = np.nan
+        return nivel
+
+    # Clave de cada grupo (los valores de su primera fila).
+    _, primera = np.unique(grupo, return_index=True)
+    resultado = pd.DataFrame({c: df[c].to_numpy()[primera] for c in columnas_clave})
+    resultado['escala'] = _NOMBRES_ESCALA[escala]
+    resultado['respuestas'] = respuestas.astype(np.int64)
+    resultado['validas'] = validas.astype(np.int64)
+    resultado['media'] = media
+    resultado['indice'] = indice
+    resultado['desvio'] = desvio
+    resultado['p25'], resultado['mediana'], resultado['p75'] = percentil(0.25), percentil(0.5), percentil(0.75)
+    for i in range(NIVELES):
+        resultado[f'prop_{i + 1}'] = np.where(i < k, proporciones[:, i], np.nan)
+
+    # Delta contra el periodo anterior de la misma entidad (mismas claves salvo el periodo).
+    entidad = resultado.groupby([c for c in columnas_clave if c != 'periodo'], sort=False, observed=True).ngroup().to_numpy()
+    rango_periodo = {periodo: i for i, periodo in enumerate(orden_periodos(set(resultado['periodo'].tolist())))}
+    periodo = resultado['periodo'].map(rango_periodo).to_numpy()
+    orden = np.lexsort((periodo, entidad))
+    media_ordenada = media[orden]
+    misma_entidad = np.r_[False, entidad[orden][1:] == entidad[orden][:-1]]
+    delta = np.full(len(orden), np.nan)
+    delta[1:] = media_ordenada[1:] - media_ordenada[:-1]
+    delta[~misma_entidad] = np.nan
+    delta_por_grupo = np.empty(len(orden))
+    delta_por_grupo[orden] = delta
+    resultado['delta_media'] = delta_por_grupo
+    return resultado[columnas]
+
+def indicadores(dfs):
+    """Tabla única: primero las preguntas de la materia (docente vacío), después las de cada docente."""
+    partes = []
+    if 'encuesta_materia' in dfs:
+        por_materia = calcular_indicadores(dfs['encuesta_materia'], ['periodo', 'materia_codigo', 'pregunta'])
+        por_materia.insert(2, 'docente', '')
+        partes.append(por_materia)
+    if 'encuesta_docente' in dfs:
+        partes.append(calcular_indicadores(dfs['encuesta_docente'], ['periodo', 'materia_codigo', 'docente', 'pregunta']))
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes: return pd.DataFrame()
+    # Textos como str (no categóricos) para poder unir las dos partes y escribir cualquier formato.
+    return pd.concat([parte.astype({c: str for c in ['periodo', 'materia_codigo', 'docente', 'pregunta']}) for parte in partes], ignore_index=True)
+
+def verificar_fixtures():
+    """Corre los indicadores sobre las páginas de UNLP/fixtures/ y las opciones de UNLP/sitio_simulado.py.
+    Devuelve los problemas encontrados: preguntas sin escala o sin media, opciones fuera de ESCALAS."""
+    entorno.usar_modulos_unlp()
+    import bench_parser, parser_rapido, sitio_simulado  # UNLP/
+    problemas = []
+    for nombre, html in bench_parser.cargar_fixtures().items():
+        arbol = parser_rapido.parsear_pagina(html)
+        for dataset, extractor, claves in (('materia', parser_rapido.extraer_encuesta_materia, ['periodo', 'materia_codigo', 'pregunta']),
+                                           ('docente', parser_rapido.extraer_encuesta_docente, ['periodo', 'materia_codigo', 'docente', 'pregunta'])):
+            registros = extractor(arbol, bench_parser.CONTEXTO)
+            if not registros: continue
+            tabla = calcular_indicadores(pd.DataFrame([r.como_dict() for r in registros]), claves)
+            for fila in tabla[(tabla['escala'] == '') | tabla['media'].isna()].itertuples():
+                problemas.append(f"{nombre} ({dataset}): '{fila.pregunta}' sin escala o sin media")
+    opciones = sitio_simulado.OPCIONES_MATERIA + sitio_simulado.OPCIONES_DOCENTE + sitio_simulado.OPCIONES_SI_NO
+    problemas += [f"sitio_simulado: opción '{o}' fuera de ESCALAS" for o in opciones if _normalizar(o) not in _OPCIONES and not _normalizar(o).startswith('no sabe')]
+    return problemas
+
+def guardar(tabla, ruta):
+    if ruta.endswith('.parquet'):
+        columnar._requerir_pyarrow()
+        tabla.astype({c: 'category' for c in ['periodo', 'materia_codigo', 'docente', 'pregunta', 'escala']}).to_parquet(ruta, index=False, compression='zstd')
+    else:
+        tabla.to_csv(ruta, index=False, float_format='%.4f', encoding='utf-8-sig')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula indicadores por pregunta (media, percentiles, distribución, delta entre periodos) para materias y docentes.")
+    parser.add_argument('--salida', default=ARCHIVO_INDICADORES, help=f"Archivo de salida: .csv (por defecto '{ARCHIVO_INDICADORES}') o .parquet (requiere pyarrow).")
+    parser.add_argument('--sqlite', default=None, metavar='BASE', help="Leer de una base SQLite de los scrapers en lugar de los CSV.")
+    parser.add_argument('--parquet', default=None, metavar='DIR', help="Leer de una exportación Parquet (JuntarCSV.py --exportar-parquet).")
+    parser.add_argument('--verificar', action='store_true', help="Sólo verificar que las páginas de UNLP/fixtures/ den una media para cada pregunta.")
+    args = parser.parse_args()
+
+    if args.verificar:
+        problemas = verificar_fixtures()
+        print('\n'.join(problemas) if problemas else "-> Todas las preguntas de los fixtures tienen escala y media.")
+        exit(1 if problemas else 0)
+
+    inicio = time.time()
+    columnas = ['periodo', 'materia_codigo', 'pregunta', 'opcion_respuesta', 'cantidad_votos']
+    if args.parquet:
+        dfs = columnar.cargar_parquet(args.parquet, columnas={'encuesta_materia': columnas, 'encuesta_docente': columnas[:2] + ['docente'] + columnas[2:]})
+    elif args.sqlite:
+        dfs = JuntarCSV.cargar_sqlite(args.sqlite)
+    else:
+        dfs = JuntarCSV.cargar_csvs({nombre: JuntarCSV.ARCHIVOS_CSV[nombre] for nombre in ('encuesta_materia', 'encuesta_docente')})
+    if not any(nombre in dfs and not dfs[nombre].empty for nombre in ('encuesta_materia', 'encuesta_docente')):
+        print("ERROR: No hay resultados de encuestas (de materias ni de docentes) para procesar. Abortando.")
+        exit(1)
+
+    tabla = indicadores(dfs)
+    guardar(tabla, args.salida)
+    sin_escala = (tabla['escala'] == '').sum()
+    print(f"Indicadores: {len(tabla)} filas en '{args.salida}' ({os.path.getsize(args.salida) / 1e6:.1f} MB) en {time.time() - inicio:.2f} segundos.")
+    if sin_escala:
+        print(f"ATENCIÓN: {sin_escala} preguntas con opciones fuera de ESCALAS (sólo se informan sus totales).")
@@ -0,0 +1,306 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+import pandas as pd
+
+import columnar
+import consolidacion
+import JuntarCSV
+
+# --- Índice invertido de los comentarios ---
+# Etapa posterior a los scrapers (o a JuntarCSV): en lugar de recorrer todos los comentarios para
+# cada búsqueda, un índice invertido en una base SQLite ('indice_comentarios.sqlite'):
+#   periodos(texto, huella)  grupos(periodo, materia_codigo, materia_nombre, comision)
+#   comentarios(grupo, texto)  postings(termino, periodo, documentos, datos)
+# Cada término tiene una lista de postings por periodo: los comentarios donde aparece, con sus
+# posiciones (para las frases), codificados como varints con diferencias (unos pocos bytes por
+# aparición). Cada comentario pertenece a un grupo (periodo, materia_codigo, comision).
+# Los textos se tokenizan sin mayúsculas ni acentos ('Didáctica' y 'didactica' son el mismo término).
+#
+# La actualización es incremental por periodo: los periodos cuyos comentarios no cambiaron (misma
+# huella) no se tocan, los nuevos o modificados se reemplazan, y los que ya no están en la fuente se
+# conservan (p. ej. al indexar un CSV con sólo el último periodo bajado). El espacio de los periodos
+# reemplazados se reusa; 'compactar' (VACUUM, reescribe todo el archivo) lo devuelve al disco.
+#
+# Consultas: términos sueltos (deben aparecer todos), prefijos ('explic*') y frases ("muy buena").
+
+ARCHIVO_INDICE = 'indice_comentarios.sqlite'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS periodos (id INTEGER PRIMARY KEY, texto TEXT NOT NULL UNIQUE, huella TEXT, comentarios INTEGER, fecha TEXT);
+CREATE TABLE IF NOT EXISTS grupos (id INTEGER PRIMARY KEY, periodo_id INTEGER NOT NULL, materia_codigo TEXT NOT NULL, materia_nombre TEXT NOT NULL,
+                                   comision TEXT NOT NULL, UNIQUE (periodo_id, materia_codigo, comision));
+CREATE TABLE IF NOT EXISTS comentarios (id INTEGER PRIMARY KEY, grupo_id INTEGER NOT NULL, texto TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (termino TEXT NOT NULL, periodo_id INTEGER NOT NULL, documentos INTEGER NOT NULL, datos BLOB NOT NULL,
+                                     PRIMARY KEY (termino, periodo_id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_comentarios_grupo ON comentarios (grupo_id);
+CREATE INDEX IF NOT EXISTS idx_postings_periodo ON postings (periodo_id);
+"""
+
+COLUMNAS = ['periodo', 'materia_codigo', 'materia_nombre', 'comision', 'comentario']
+
+# --- Tokenización ---
+def plegar(texto):
+    """Minúsculas y sin acentos ni diacríticos ('Ñandú' -> 'nandu')."""
+    return unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().lower()
+
+def tokenizar(texto):
+    return re.findall(r'[a-z0-9]+', plegar(texto))
+
+# --- Postings: varints con diferencias ---
+def _varint(datos, n):
+    while n >= 0x80:
+        datos.append(n & 0x7F | 0x80)
+        n >>= 7
+    datos.append(n)
+
+def codificar(documentos):
+    """[(id, [posiciones])] con ids y posiciones crecientes -> bytes: por documento, la diferencia con el
+    id anterior, la cantidad de posiciones y las diferencias entre posiciones."""
+    datos = bytearray()
+    anterior = 0
+    for documento, posiciones in documentos:
+        _varint(datos, documento - anterior)
+        anterior = documento
+        _varint(datos, len(posiciones))
+        previa = 0
+        for posicion in posiciones:
+            _varint(datos, posicion - previa)
+            previa = posicion
+    return bytes(datos)
+
+def decodificar(datos):
+    """Inversa de codificar(): {id: [posiciones]}."""
+    documentos = {}
+    i, documento = 0, 0
+    def leer():
+        nonlocal i
+        valor, desplazamiento = 0, 0
+        while True:
+            byte = datos[i]
+            i += 1
+            valor |= (byte & 0x7F) << desplazamiento
+            if byte < 0x80: return valor
+            desplazamiento += 7
+    while i < len(datos):
+        documento += leer()
+        posiciones, posicion = [], 0
+        for _ in range(leer()):
+            posicion += leer()
+            posiciones.append(posicion)
+        documentos[documento] = posiciones
+    return documentos
+
+# --- Indexación ---
+def conectar(ruta):
+    conexion = sqlite3.connect(ruta, isolation_level=None)
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+def _huella(filas):
+    return hashlib.sha256(json.dumps(filas, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _indexar_periodo(conexion, periodo, filas):
+    conexion.execute("INSERT OR IGNORE INTO periodos (texto) VALUES (?)", (periodo,))
+    periodo_id = conexion.execute("SELECT id FROM periodos WHERE texto = ?", (periodo,)).fetchone()[0]
+    # Lo que el periodo tuviera de antes se reemplaza entero.
+    conexion.execute("DELETE FROM postings WHERE periodo_id = ?", (periodo_id,))
+    conexion.execute("DELETE FROM comentarios WHERE grupo_id IN (SELECT id FROM grupos WHERE periodo_id = ?)", (periodo_id,))
+    conexion.execute("DELETE FROM grupos WHERE periodo_id = ?", (periodo_id,))
+    siguiente = conexion.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM comentarios").fetchone()[0]
+    grupos, comentarios, postings = {}, [], {}
+    for codigo, nombre, comision, texto in filas:
+        if (codigo, comision) not in grupos:
+            grupos[(codigo, comision)] = conexion.execute("INSERT INTO grupos (periodo_id, materia_codigo, materia_nombre, comision) VALUES (?, ?, ?, ?)",
+                                                          (periodo_id, codigo, nombre, comision)).lastrowid
+        documento = siguiente + len(comentarios)
+        comentarios.append((documento, grupos[(codigo, comision)], texto))
+        posiciones = {}
+        for posicion, termino in enumerate(tokenizar(texto)):
+            posiciones.setdefault(termino, []).append(posicion)
+        for termino, lista in posiciones.items():
+            postings.setdefault(termino, []).append((documento, lista))
+    conexion.executemany("INSERT INTO comentarios (id, grupo_id, texto) VALUES (?, ?, ?)", comentarios)
+    conexion.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)",
+                         [(termino, periodo_id, len(documentos), codificar(documentos)) for termino, documentos in postings.items()])
+    conexion.execute("UPDATE periodos SET huella = ?, comentarios = ?, fecha = ? WHERE id = ?",
+                     (_huella(filas), len(filas), time.strftime('%Y-%m-%d %H:%M:%S'), periodo_id))
+
+def indexar(ruta, por_periodo):
+    """Actualiza el índice con {periodo: [(materia_codigo, materia_nombre, comision, comentario)]}.
+    Devuelve (periodos reindexados, periodos sin cambios)."""
+    conexion = conectar(ruta)
+    try:
+        huellas = dict(conexion.execute("SELECT texto, huella FROM periodos"))
+        reindexados, sin_cambios = [], []
+        for periodo, filas in por_periodo.items():
+            if huellas.get(periodo) == _huella(filas):
+                sin_cambios.append(periodo)
+                continue
+            # Un periodo por transacción: si se corta, el índice queda con los periodos anteriores completos.
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                _indexar_periodo(conexion, periodo, filas)
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            reindexados.append(periodo)
+            print(f"  -> Periodo '{periodo}': {len(filas)} comentarios indexados.")
+        return reindexados, sin_cambios
+    finally:
+        conexion.close()
+
+def compactar(ruta):
+    """VACUUM del índice. Las páginas de los periodos reemplazados se reusan en las próximas
+    indexaciones, así que sólo hace falta para achicar el archivo; reescribe la base entera.
+    Devuelve (bytes antes, bytes después)."""
+    antes = os.path.getsize(ruta)
+    conexion = sqlite3.connect(ruta, isolation_level=None)
+    try:
+        conexion.execute("VACUUM")
+    finally:
+        conexion.close()
+    return antes, os.path.getsize(ruta)
+
+# --- Fuentes ---
+def _agrupar(df):
+    por_periodo = {}
+    for periodo, *fila in zip(*(df[c].tolist() for c in COLUMNAS)):
+        por_periodo.setdefault(periodo, []).append(tuple(fila))
+    return por_periodo
+
+def cargar_comentarios(sqlite=None, parquet=None, salida_json=None, particionado=None):
+    """{periodo: [(materia_codigo, materia_nombre, comision, comentario)]} de los CSV o de la fuente indicada."""
+    if salida_json:
+        datos = consolidacion.leer_salida(salida_json, particionado)
+        return {periodo: [(codigo, materia['materia_nombre'], c['comision'], c['comentario']) for codigo, materia in materias.items() for c in materia.get('comentarios', [])]
+                for periodo, materias in datos.items()}
+    if parquet:
+        return _agrupar(columnar.cargar_parquet(parquet, columnas={'comentarios': COLUMNAS})['comentarios'])
+    if sqlite:
+        conexion = sqlite3.connect(f"file:{sqlite}?mode=ro", uri=True)
+        try:
+            return _agrupar(pd.read_sql_query(f"SELECT {', '.join(COLUMNAS)} FROM {JuntarCSV.VISTAS_SQLITE['comentarios']}", conexion, dtype=str).fillna(''))
+        finally:
+            conexion.close()
+    dfs = JuntarCSV.cargar_csvs({'comentarios': JuntarCSV.ARCHIVOS_CSV['comentarios']})
+    return _agrupar(dfs['comentarios']) if 'comentarios' in dfs else {}
+
+# --- Consultas ---
+def _partes(consulta):
+    """Cada parte es ('prefijo', termino) o ('frase', [terminos]) (un término suelto es una frase de uno)."""
+    partes = []
+    for frase, palabra in re.findall(r'"([^"]*)"|(\S+)', consulta):
+        if palabra.endswith('*') and len(tokenizar(palabra)) == 1:
+            partes.append(('prefijo', tokenizar(palabra)[0]))
+        elif tokenizar(frase or palabra):
+            partes.append(('frase', tokenizar(frase or palabra)))
+    return partes
+
+def _postings(conexion, termino, filtro, parametros, prefijo=False):
+    """{id: [posiciones]} de un término (o, con `prefijo`, de todos los que empiezan así) en los periodos del filtro."""
+    if prefijo:
+        filas = conexion.execute(f"SELECT datos FROM postings WHERE termino >= ? AND termino < ?{filtro}", (termino, termino + '\uffff') + parametros)
+    else:
+        filas = conexion.execute(f"SELECT datos FROM postings WHERE termino = ?{filtro}", (termino,) + parametros)
+    documentos = {}
+    for (datos,) in filas:
+        for documento, posiciones in decodificar(datos).items():
+            documentos.setdefault(documento, []).extend(posiciones)
+    return documentos
+
+def _frase(conexion, terminos, filtro, parametros):
+    listas = [_postings(conexion, termino, filtro, parametros) for termino in terminos]
+    candidatos = set(listas[0]).intersection(*listas[1:])
+    if len(terminos) == 1: return candidatos
+    encontrados = set()
+    for documento in candidatos:
+        # Posiciones de inicio donde el término i aparece en la posición inicio + i, para todos los términos.
+        inicios = set(listas[0][documento])
+        for i, lista in enumerate(listas[1:], 1):
+            inicios &= {posicion - i for posicion in lista[documento]}
+            if not inicios: break
+        if inicios: encontrados.add(documento)
+    return encontrados
+
+def buscar(ruta, consulta, periodos=None, materia=None, limite=None):
+    """Comentarios que cumplen todas las partes de la consulta: [(periodo, materia_codigo, materia_nombre, comision, comentario)]."""
+    partes = _partes(consulta)
+    if not partes: return []
+    conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        filtro, parametros = "", ()
+        if periodos:
+            filtro = f" AND periodo_id IN (SELECT id FROM periodos WHERE texto IN ({', '.join('?' * len(periodos))}))"
+            parametros = tuple(periodos)
+        documentos = None
+        for tipo, valor in partes:
+            encontrados = set(_postings(conexion, valor, filtro, parametros, prefijo=True)) if tipo == 'prefijo' else _frase(conexion, valor, filtro, parametros)
+            documentos = encontrados if documentos is None else documentos & encontrados
+            if not documentos: return []
+        resultados = []
+        ids = sorted(documentos)
+        for inicio in range(0, len(ids), 500):
+            bloque = ids[inicio:inicio + 500]
+            consulta_sql = ("SELECT p.texto, g.materia_codigo, g.materia_nombre, g.comision, c.texto FROM comentarios c "
+                            "JOIN grupos g ON g.id = c.grupo_id JOIN periodos p ON p.id = g.periodo_id "
+                            f"WHERE c.id IN ({', '.join('?' * len(bloque))})" + (" AND g.materia_codigo = ?" if materia else "") + " ORDER BY c.id")
+            resultados += conexion.execute(consulta_sql, tuple(bloque) + ((materia,) if materia else ())).fetchall()
+            if limite and len(resultados) >= limite: return resultados[:limite]
+        return resultados
+    finally:
+        conexion.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice invertido de los comentarios: indexar (incremental por periodo) y buscar.")
+    parser.add_argument('--indice', default=ARCHIVO_INDICE, help=f"Base SQLite del índice (por defecto '{ARCHIVO_INDICE}').")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    indexar_parser = subcomandos.add_parser('indexar', help=f"Indexa '{JuntarCSV.ARCHIVOS_CSV['comentarios']}' (o la fuente indicada); sólo reindexa los periodos que cambiaron.")
+    indexar_parser.add_argument('--sqlite', default=None, metavar='BASE', help="Leer de una base SQLite de los scrapers.")
+    indexar_parser.add_argument('--parquet', default=None, metavar='DIR', help="Leer de una exportación Parquet (JuntarCSV.py --exportar-parquet).")
+    indexar_parser.add_argument('--json', default=None, metavar='RUTA', help="Leer de la salida de JuntarCSV.py (JSON o, con --particionado, directorio de fragmentos).")
+    indexar_parser.add_argument('--particionado', choices=['periodo', 'materia'], default=None)
+    buscar_parser = subcomandos.add_parser('buscar', help='Busca comentarios: términos (todos), prefijos (explic*) y frases ("muy buena").')
+    buscar_parser.add_argument('consulta')
+    buscar_parser.add_argument('--periodo', action='append', default=None, help="Limitar a un periodo (se puede repetir).")
+    buscar_parser.add_argument('--materia', default=None, metavar='CODIGO', help="Limitar a un código de materia.")
+    buscar_parser.add_argument('--limite', type=int, default=20, help="Comentarios a mostrar (por defecto 20; 0 = todos).")
+    subcomandos.add_parser('compactar', help="Recupera el espacio de los periodos reindexados (VACUUM; reescribe todo el índice).")
+    args = parser.parse_args()
+
+    inicio = time.time()
+    if args.comando == 'indexar':
+        por_periodo = cargar_comentarios(args.sqlite, args.parquet, args.json, args.particionado)
+        if not por_periodo:
+            print("ERROR: No hay comentarios para indexar. Abortando.")
+            exit(1)
+        reindexados, sin_cambios = indexar(args.indice, por_periodo)
+        conexion = sqlite3.connect(args.indice)
+        terminos, bytes_postings = conexion.execute("SELECT COUNT(DISTINCT termino), COALESCE(SUM(LENGTH(datos)), 0) FROM postings").fetchone()
+        total = conexion.execute("SELECT COUNT(*) FROM comentarios").fetchone()[0]
+        conexion.close()
+        print(f"Índice '{args.indice}': {len(reindexados)} periodos indexados, {len(sin_cambios)} sin cambios; {total} comentarios, "
+              f"{terminos} términos, postings {bytes_postings / 1e6:.2f} MB ({os.path.getsize(args.indice) / 1e6:.1f} MB en total) en {time.time() - inicio:.2f} segundos.")
+    elif not os.path.exists(args.indice):
+        print(f"ERROR: No existe el índice '{args.indice}' (crearlo con 'indexar').")
+        exit(1)
+    elif args.comando == 'compactar':
+        antes, despues = compactar(args.indice)
+        print(f"Índice '{args.indice}' compactado: {antes / 1e6:.1f} MB -> {despues / 1e6:.1f} MB en {time.time() - inicio:.2f} segundos.")
+    else:
+        resultados = buscar(args.indice, args.consulta, args.periodo, args.materia)
+        grupos = {}
+        for periodo, codigo, nombre, comision, _ in resultados:
+            grupos[(periodo, codigo, nombre, comision)] = grupos.get((periodo, codigo, nombre, comision), 0) + 1
+        print(f"{len(resultados)} comentarios en {len(grupos)} comisiones ({(time.time() - inicio) * 1000:.1f} ms).")
+        for (periodo, codigo, nombre, comision), cantidad in list(grupos.items())[:args.limite or None]:
+            print(f"  {periodo} | {codigo} {nombre} | {comision}: {cantidad}")
+        for periodo, codigo, _, comision, comentario in resultados[:args.limite or None]:
+            print(f"\n[{periodo} | {codigo} | {comision}] {comentario}")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los scripts importan sus módulos por nombre (se corren desde Scrapers/ y Scrapers/UNLP/).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Scrapers'))
+import entorno
+entorno.usar_modulos_unlp()
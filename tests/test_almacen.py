@@ -0,0 +1,43 @@
+import csv
+import sqlite3
+
+import almacen
+import bench_juntar
+import diario
+import extractores
+import parser_rapido
+
+# --- Las vistas del almacén SQLite reproducen los CSV ---
+# Sobre los CSV sintéticos de bench_juntar.py (votos 'N/A', '' y '3.0', filas repetidas, una materia
+# con dos nombres en el censo), con los comentarios nombrando la materia sin el código, como los deja
+# extractores.extraer_comentarios().
+
+SALIDAS = dict(parser_rapido.SALIDAS_MATERIA, docente=parser_rapido.SALIDA_DOCENTE)
+
+def _filas(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+def test_vistas_iguales_a_los_csv(tmp_path):
+    bench_juntar.generar_csvs(str(tmp_path), 1)
+    ruta_comentarios = tmp_path / SALIDAS['comentarios'][0]
+    filas = _filas(ruta_comentarios)
+    with open(ruta_comentarios, 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows([filas[0]] + [fila[:2] + [extractores.limpiar_nombre_materia(fila[2])] + fila[3:] for fila in filas[1:]])
+
+    base = str(tmp_path / 'encuestas.sqlite')
+    almacen.crear_esquema(base)
+    for dataset, (nombre_archivo, fieldnames, _) in SALIDAS.items():
+        ruta_csv = str(tmp_path / nombre_archivo)
+        diario.deduplicar_csv(ruta_csv) # la base, como el CSV al final de una corrida, queda con la primera fila de cada clave
+        columnas_unidad = ['periodo', 'materia_codigo', 'docente'] if dataset == 'docente' else ['periodo', 'materia_codigo']
+        almacen.importar_csv(base, dataset, ruta_csv, fieldnames, columnas_unidad)
+
+    conexion = sqlite3.connect(base)
+    for dataset, (nombre_archivo, fieldnames, _) in SALIDAS.items():
+        vista = [[str(valor) for valor in fila] for fila in conexion.execute(f"SELECT * FROM {almacen.VISTAS[dataset]}")]
+        assert [fieldnames] + vista == _filas(tmp_path / nombre_archivo)
+    # Para consultar quedan el nombre del censo y los votos como enteros.
+    assert conexion.execute("SELECT COUNT(*) FROM materias WHERE nombre NOT LIKE '%(' || codigo || ')%'").fetchone()[0] == 0
+    assert conexion.execute("SELECT COUNT(*) FROM votos WHERE cantidad_texto = '3.0' AND cantidad <> 3").fetchone()[0] == 0
+    conexion.close()
@@ -0,0 +1,71 @@
+import csv
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import JuntarCSV
+import bench_juntar
+import consolidacion
+
+# --- Consolidación vectorizada, streaming e incremental vs la implementación original ---
+# Sobre los CSV sintéticos de bench_juntar.py (con sus casos raros: votos no numéricos, filas
+# repetidas, docentes sin nombre o fuera del censo, una materia con dos nombres).
+
+def _texto(datos):
+    return json.dumps(datos, ensure_ascii=False, indent=2)
+
+@pytest.fixture
+def csvs(tmp_path, monkeypatch):
+    """Los CSV sintéticos en un directorio temporal, que queda como directorio actual (JuntarCSV usa rutas relativas)."""
+    monkeypatch.chdir(tmp_path)
+    archivos, _ = bench_juntar.generar_csvs(str(tmp_path), 1)
+    return archivos
+
+def _salida(ruta, particionado):
+    """La salida escrita, como texto: el JSON tal cual o, particionada, los fragmentos en orden."""
+    if not particionado:
+        with open(ruta, encoding='utf-8') as f:
+            return f.read()
+    return _texto(consolidacion.leer_salida(ruta, particionado))
+
+def _modificar(archivo, cambiar):
+    with open(archivo, newline='', encoding='utf-8-sig') as f:
+        filas = list(csv.reader(f))
+    filas = [filas[0]] + cambiar(filas[1:])
+    with open(archivo, 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows(filas)
+
+def test_agregar_datos_igual_a_referencia(csvs):
+    # La referencia, como la corría JuntarCSV.py original: todo leído como texto.
+    texto = {nombre: pd.read_csv(ruta, dtype=str).fillna('') for nombre, ruta in csvs.items()}
+    referencia = _texto(JuntarCSV.agregar_datos_referencia(texto))
+    assert _texto(consolidacion.agregar_datos(JuntarCSV.cargar_csvs(csvs))) == referencia
+    assert _texto(consolidacion.agregar_datos(texto)) == referencia
+
+@pytest.mark.parametrize('particionado', [None, 'periodo', 'materia'])
+def test_streaming_igual_a_completa(csvs, particionado):
+    JuntarCSV.consolidar_datos_eficiente('completa', particionado=particionado)
+    JuntarCSV.consolidar_datos_streaming('streaming', particionado=particionado)
+    assert _salida('streaming', particionado) == _salida('completa', particionado)
+
+@pytest.mark.parametrize('particionado', [None, 'materia'])
+def test_incremental_igual_a_completa(csvs, particionado):
+    JuntarCSV.consolidar_datos_incremental('incremental', particionado=particionado)
+    JuntarCSV.consolidar_datos_eficiente('completa', particionado=particionado)
+    assert _salida('incremental', particionado) == _salida('completa', particionado)
+
+    # Votos cambiados en una materia, comentarios borrados en otra y un docente nuevo en una tercera.
+    _modificar(csvs['encuesta_materia'], lambda filas: [f[:5] + ['999'] if f[1] == 'M00003' else f for f in filas])
+    _modificar(csvs['comentarios'], lambda filas: [f for f in filas if f[1] != 'M00004'])
+    _modificar(csvs['censo_docentes'], lambda filas: filas + [[filas[-1][0], filas[-1][1], filas[-1][2], 'Nuevo, Docente', 'JTP']])
+    JuntarCSV.consolidar_datos_incremental('incremental', particionado=particionado)
+    JuntarCSV.consolidar_datos_eficiente('completa', particionado=particionado)
+    assert _salida('incremental', particionado) == _salida('completa', particionado)
+    assert '999' in _salida('incremental', particionado) and 'Nuevo, Docente' in _salida('incremental', particionado)
+
+    # Sin cambios en los CSV no se reescribe nada.
+    antes = os.stat(os.path.join('incremental', consolidacion.ARCHIVO_INDICE) if particionado else 'incremental').st_mtime_ns
+    JuntarCSV.consolidar_datos_incremental('incremental', particionado=particionado)
+    assert os.stat(os.path.join('incremental', consolidacion.ARCHIVO_INDICE) if particionado else 'incremental').st_mtime_ns == antes
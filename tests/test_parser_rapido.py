@@ -0,0 +1,54 @@
+import pytest
+
+import bench_parser
+import extractores
+import parser_rapido
+from sitio_simulado import SitioSimulado
+
+# --- parser_rapido (lxml/XPath) vs extractores (BeautifulSoup) ---
+# Los dos tienen que devolver exactamente los mismos registros, en el mismo orden, sobre cada página.
+
+FIXTURES = bench_parser.cargar_fixtures()
+
+def _paginas_simuladas():
+    sitio = SitioSimulado(periodos=2, materias=12, sin_resultados=0.2)
+    paginas = {'inicio': sitio.pagina({})}
+    for anio_sem in sitio.periodos():
+        paginas[f'{anio_sem}'] = sitio.pagina({'anioSem': anio_sem})
+        for cod in sitio.materias(anio_sem):
+            paginas[f'{anio_sem}-{cod}'] = sitio.pagina({'anioSem': anio_sem, 'cod': cod})
+            for docente in sitio.docentes(anio_sem, cod)[:2]:
+                paginas[f'{anio_sem}-{cod}-{docente}'] = sitio.pagina({'anioSem': anio_sem, 'cod': cod, 'docente': docente})
+    return paginas
+
+SIMULADAS = _paginas_simuladas()
+
+def _comparar(html):
+    referencia = bench_parser.extraer_todo(extractores, html)
+    rapido = bench_parser.extraer_todo(parser_rapido, html)
+    assert rapido.keys() == referencia.keys()
+    for clave in referencia:
+        assert rapido[clave] == referencia[clave], clave
+        if isinstance(referencia[clave], list):  # mismos registros también como texto (CSV / JSON)
+            assert [r.como_dict() for r in rapido[clave]] == [r.como_dict() for r in referencia[clave]], clave
+    return referencia
+
+def test_hay_fixtures():
+    assert {'materia.html', 'docente.html', 'sin_resultados.html'} <= set(FIXTURES)
+
+@pytest.mark.parametrize('nombre', sorted(FIXTURES))
+def test_fixture_igual_a_beautifulsoup(nombre):
+    referencia = _comparar(FIXTURES[nombre])
+    if nombre != 'sin_resultados.html':
+        assert referencia['materia'] and referencia['comentarios'] and referencia['censo']
+    if nombre == 'docente.html':
+        assert referencia['docente']
+
+@pytest.mark.parametrize('nombre', sorted(SIMULADAS))
+def test_pagina_simulada_igual_a_beautifulsoup(nombre):
+    _comparar(SIMULADAS[nombre])
+
+def test_salidas_iguales():
+    """Los dos módulos declaran los mismos archivos y columnas."""
+    assert {k: v[:2] for k, v in parser_rapido.SALIDAS_MATERIA.items()} == {k: v[:2] for k, v in extractores.SALIDAS_MATERIA.items()}
+    assert parser_rapido.SALIDA_DOCENTE[:2] == extractores.SALIDA_DOCENTE[:2]
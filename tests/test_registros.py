@@ -0,0 +1,23 @@
+import concurrent.futures
+
+import registros
+
+# --- Catálogos de registros.py: internado desde varios hilos y reinicio entre corridas ---
+
+def test_catalogo_entre_hilos():
+    catalogo = registros.Catalogo()
+    textos = [f"Docente {i % 500}, Nombre" for i in range(20000)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        ids = list(executor.map(catalogo.id, textos, chunksize=100))
+    assert len(catalogo) == 500
+    assert [catalogo.textos[i] for i in ids] == textos
+
+def test_reiniciar_catalogos():
+    voto = registros.VotoDocente('2024 - Primer semestre', 'E0201', 'MATEMATICA A (E0201)', 'Perez, Ana', 'Pregunta', 'Bueno', '12')
+    assert voto.como_dict()['docente'] == 'Perez, Ana'
+    registros.reiniciar_catalogos()
+    assert all(len(catalogo) == 0 for catalogo in registros.CATALOGOS)
+    otro = registros.VotoMateria('2024 - Segundo semestre', 'E0202', 'MATEMATICA B (E0202)', 'Otra pregunta', 'Malo', 'N/A')
+    assert otro.como_dict() == {'periodo': '2024 - Segundo semestre', 'materia_codigo': 'E0202', 'materia_nombre': 'MATEMATICA B (E0202)',
+                                'pregunta': 'Otra pregunta', 'opcion_respuesta': 'Malo', 'cantidad_votos': 'N/A'}
+    assert len(registros.MATERIAS) == 1